@@ -1,6 +1,15 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import users, auth, problems, submissions
+from app.api.endpoints import (
+    activity,
+    auth,
+    contests,
+    leaderboards,
+    problems,
+    submissions,
+    system,
+    users,
+)
 
 api_router = APIRouter()
 
@@ -14,3 +23,13 @@ api_router.include_router(
 api_router.include_router(
     submissions.router, prefix="/submissions", tags=["Submissions"]
 )
+api_router.include_router(
+    leaderboards.router, prefix="/leaderboards", tags=["Leaderboards"]
+)
+api_router.include_router(
+    contests.router, prefix="/contests", tags=["Contests"]
+)
+api_router.include_router(
+    activity.router, prefix="/activity", tags=["Activity"]
+)
+api_router.include_router(system.router, prefix="/system", tags=["System"])
@@ -0,0 +1,74 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.deps import (
+    get_current_active_user,
+    get_current_admin_user,
+    get_db,
+)
+from app.models.problem import Problem
+from app.models.user import User
+from app.schemas.activity import (
+    ActivityEventBatch,
+    ActivityIngestResult,
+    ActivityStats,
+)
+from app.services.activity_service import activity_service
+
+router = APIRouter()
+
+
+@router.post(
+    "/",
+    response_model=ActivityIngestResult,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def record_activity(
+    *,
+    db: Session = Depends(get_db),
+    batch_in: ActivityEventBatch,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Record activity events of the current user. Events are written in the
+    background; a 429 means the buffer is full and the client should retry
+    later.
+    """
+    # Checked here, not at flush time: an unknown problem would fail the
+    # whole batch insert on databases that enforce foreign keys
+    problem_ids = {
+        event.problem_id
+        for event in batch_in.events
+        if event.problem_id is not None
+    }
+    if problem_ids:
+        found = set(
+            db.scalars(select(Problem.id).where(Problem.id.in_(problem_ids)))
+        )
+        if found != problem_ids:
+            raise HTTPException(status_code=404, detail="Problem not found")
+    accepted, dropped = activity_service.record(
+        db,
+        user_id=current_user.id,
+        events=[event.model_dump() for event in batch_in.events],
+    )
+    if dropped and not accepted:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Activity buffer is full",
+            headers={"Retry-After": "1"},
+        )
+    return {"accepted": accepted, "dropped": dropped}
+
+
+@router.get("/stats", response_model=ActivityStats)
+def read_activity_stats(
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Ingest throughput, buffer fill and drop counts (admin only).
+    """
+    return activity_service.stats()
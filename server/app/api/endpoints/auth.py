@@ -3,9 +3,10 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
+from app.api.deps import get_async_db, get_db
 from app.core.config import settings
 from app.core.security import create_access_token
 from app.schemas.token import Token
@@ -16,14 +17,14 @@ router = APIRouter()
 
 
 @router.post("/login", response_model=Token)
-def login_access_token(
-    db: Session = Depends(get_db),
+async def login_access_token(
+    db: AsyncSession = Depends(get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = user_service.authenticate(
+    user = await user_service.authenticate_async(
         db, username=form_data.username, password=form_data.password
     )
     if not user:
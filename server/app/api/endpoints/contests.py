@@ -0,0 +1,155 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.deps import (
+    get_current_active_user,
+    get_current_admin_user,
+    get_db,
+)
+from app.core.responses import ModelResponse
+from app.models.contest import Contest
+from app.models.problem import Problem
+from app.models.user import User
+from app.schemas.contest import (
+    Contest as ContestSchema,
+    ContestAdmissionStats,
+    ContestCreate,
+    ContestRefreshReport,
+    ContestScoreboard,
+)
+from app.services.contest_judge_service import contest_judge_service
+from app.services.contest_service import as_utc, contest_service
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[ContestSchema])
+def list_contests(
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    List contests, latest start first.
+    """
+    return contest_service.list_contests(db, skip=skip, limit=limit)
+
+
+@router.post("/", response_model=ContestSchema)
+def create_contest(
+    *,
+    db: Session = Depends(get_db),
+    contest_in: ContestCreate,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Create a contest (admin only).
+    """
+    # Times without a UTC offset are UTC
+    starts_at, ends_at, freeze_at = (
+        as_utc(contest_in.starts_at),
+        as_utc(contest_in.ends_at),
+        as_utc(contest_in.freeze_at),
+    )
+    if ends_at <= starts_at:
+        raise HTTPException(
+            status_code=400, detail="Contest must end after it starts"
+        )
+    if freeze_at is not None and not starts_at <= freeze_at < ends_at:
+        raise HTTPException(
+            status_code=400, detail="Freeze must be within the contest"
+        )
+    if not contest_in.problem_ids or len(set(contest_in.problem_ids)) != len(
+        contest_in.problem_ids
+    ):
+        raise HTTPException(
+            status_code=400, detail="Contest needs distinct problems"
+        )
+    found = set(
+        db.scalars(
+            select(Problem.id).where(Problem.id.in_(contest_in.problem_ids))
+        )
+    )
+    if len(found) != len(contest_in.problem_ids):
+        raise HTTPException(status_code=404, detail="Problem not found")
+
+    return contest_service.create(
+        db,
+        title=contest_in.title,
+        starts_at=starts_at,
+        ends_at=ends_at,
+        freeze_at=freeze_at,
+        problem_ids=contest_in.problem_ids,
+    )
+
+
+@router.post("/refresh", response_model=ContestRefreshReport)
+def refresh_contests(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Warm contest problem sets and materialize scoreboards now instead of
+    at the next periodic refresh (admin only).
+    """
+    return contest_service.refresh(db)
+
+
+@router.get("/admission", response_model=ContestAdmissionStats)
+def read_contest_admission(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Contest judge queue fill, admissions and rejections (admin only).
+    """
+    return contest_judge_service.stats(db)
+
+
+@router.get("/{contest_id}", response_model=ContestSchema)
+def get_contest(
+    *,
+    db: Session = Depends(get_db),
+    contest_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get a contest and its problem set.
+    """
+    contest = db.get(Contest, contest_id)
+    if not contest:
+        raise HTTPException(status_code=404, detail="Contest not found")
+    return contest
+
+
+@router.get("/{contest_id}/scoreboard", response_model=ContestScoreboard)
+def read_contest_scoreboard(
+    *,
+    db: Session = Depends(get_db),
+    contest_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Contest standings from the latest materialized snapshot. During the
+    freeze window the snapshot stops at the freeze.
+    """
+    contest = contest_service.get(db, contest_id=contest_id)
+    if contest is None:
+        raise HTTPException(status_code=404, detail="Contest not found")
+    scoreboard = contest_service.scoreboard(db, contest)
+    return ModelResponse(
+        ContestScoreboard,
+        {
+            "contest_id": contest_id,
+            "taken_at": scoreboard.taken_at,
+            "frozen": scoreboard.frozen,
+            "total": len(scoreboard.entries),
+            "entries": scoreboard.entries[skip : skip + limit],
+        },
+    )
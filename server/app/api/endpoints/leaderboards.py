@@ -0,0 +1,95 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user, get_db
+from app.models.user import User
+from app.schemas.leaderboard import Leaderboard, LeaderboardPosition
+from app.services.leaderboard_service import (
+    Entry,
+    Leaderboard as Board,
+    leaderboard_service,
+)
+
+router = APIRouter()
+
+
+@router.get("/{scope}", response_model=Leaderboard)
+def read_leaderboard(
+    *,
+    db: Session = Depends(get_db),
+    scope: str,
+    limit: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Top users of a leaderboard ("global", a problem type or a contest).
+    """
+    board = _get_board(db, scope)
+    return {
+        "scope": scope,
+        "total": len(board),
+        "entries": _entries(db, board.top(limit)),
+    }
+
+
+@router.get("/{scope}/me", response_model=LeaderboardPosition)
+def read_leaderboard_me(
+    *,
+    db: Session = Depends(get_db),
+    scope: str,
+    radius: int = Query(5, ge=0, le=50),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Rank of the current user and the users around them.
+    """
+    return _position(db, scope, current_user.id, radius)
+
+
+@router.get("/{scope}/users/{user_id}", response_model=LeaderboardPosition)
+def read_leaderboard_user(
+    *,
+    db: Session = Depends(get_db),
+    scope: str,
+    user_id: int,
+    radius: int = Query(5, ge=0, le=50),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Rank of a user and the users around them.
+    """
+    return _position(db, scope, user_id, radius)
+
+
+def _get_board(db: Session, scope: str) -> Board:
+    board = leaderboard_service.get_board(db, scope)
+    if board is None:
+        raise HTTPException(status_code=404, detail="Leaderboard not found")
+    return board
+
+
+def _entries(db: Session, entries: List[Entry]) -> List[dict]:
+    usernames = leaderboard_service.usernames(db, (e[1] for e in entries))
+    return [
+        {
+            "rank": rank,
+            "user_id": user_id,
+            "username": usernames.get(user_id),
+            "score": score,
+        }
+        for rank, user_id, score in entries
+    ]
+
+
+def _position(db: Session, scope: str, user_id: int, radius: int) -> dict:
+    board = _get_board(db, scope)
+    neighbors = _entries(db, board.around(user_id, radius))
+    entry = next((e for e in neighbors if e["user_id"] == user_id), None)
+    return {
+        "scope": scope,
+        "total": len(board),
+        "entry": entry,
+        "neighbors": neighbors,
+    }
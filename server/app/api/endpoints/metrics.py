@@ -0,0 +1,90 @@
+import secrets
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import APIRouter, Header, HTTPException, Response, status
+
+from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, REGISTRY, Sample
+from app.db.engine import engine_stats, engine_timings
+from app.db.session import async_engine, db_router, engine
+
+router = APIRouter()
+
+# Pool occupancy gauges and timing counters of every engine
+_POOL_GAUGES = (
+    ("db_pool_size", "pool_size", "Connections kept in the pool."),
+    ("db_pool_checked_out", "checked_out", "Connections checked out."),
+    ("db_pool_overflow", "overflow", "Overflow connections open."),
+)
+_TIMING_COUNTERS = (
+    ("db_pool_checkouts_total", "checkouts", "Pool checkouts."),
+    (
+        "db_pool_checkout_wait_seconds_total",
+        "checkout_wait_total",
+        "Time spent waiting for a pooled connection.",
+    ),
+    (
+        "db_pool_checkout_timeouts_total",
+        "checkout_timeouts",
+        "Checkouts that timed out waiting for a connection.",
+    ),
+    ("db_statements_total", "statements", "Statements executed."),
+    (
+        "db_statement_seconds_total",
+        "statement_time_total",
+        "Time spent executing statements.",
+    ),
+)
+
+
+def _engines() -> List[Tuple[str, object]]:
+    engines = [("sync", engine), ("async", async_engine)]
+    for replica in db_router.replicas:
+        engines.append((f"{replica.name}:sync", replica.engine))
+        engines.append((f"{replica.name}:async", replica.async_engine))
+    return engines
+
+
+def _database_families() -> Iterable[Tuple[str, str, str, List[Sample]]]:
+    engines = _engines()
+    stats = {name: engine_stats(e) for name, e in engines}
+    for metric, key, documentation in _POOL_GAUGES:
+        samples = [
+            ("", [("engine", name)], stats[name][key])
+            for name, _ in engines
+            if key in stats[name]
+        ]
+        yield metric, "gauge", documentation, samples
+
+    timings = {name: engine_timings(e) for name, e in engines}
+    for metric, attribute, documentation in _TIMING_COUNTERS:
+        samples = [
+            ("", [("engine", name)], getattr(timings[name], attribute))
+            for name, _ in engines
+            if timings[name] is not None
+        ]
+        yield metric, "counter", documentation, samples
+
+    yield "db_replica_healthy", "gauge", "1 if the replica is in rotation.", [
+        ("", [("replica", replica["name"])], int(replica["healthy"]))
+        for replica in db_router.stats()
+    ]
+
+
+REGISTRY.register_collector(_database_families)
+
+
+@router.get("/metrics", include_in_schema=False)
+def read_metrics(authorization: Optional[str] = Header(None)) -> Response:
+    """
+    Prometheus metrics. Requires ``Authorization: Bearer <METRICS_TOKEN>``
+    (the route is only mounted when a token is configured).
+    """
+    if not settings.METRICS_TOKEN or not secrets.compare_digest(
+        authorization or "", f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+        )
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,68 +1,257 @@
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api.deps import (
+    get_async_db,
     get_current_active_user,
+    get_current_active_user_async,
     get_current_admin_user,
     get_db,
 )
 from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.core.config import settings
+from app.core.responses import ModelResponse
 from app.models.user import User
 from app.schemas.problem import (
     Problem as ProblemSchema,
     ProblemCreate,
+    ProblemFacets,
+    ProblemImportReport,
     ProblemUpdate,
-    ProblemList,
+    ProblemSummaryList,
+    ProblemVersion as ProblemVersionSchema,
+    ProblemVersionSummary,
+    PROBLEM_LIST_FIELDS,
+    PROBLEM_SUMMARY_FIELDS,
 )
+from app.services.contest_service import contest_service
+from app.services.facet_service import facet_service
+from app.services.problem_io_service import problem_io_service
+from app.services.problem_version_service import problem_version_service
+from app.services.tag_service import tag_service
 
 router = APIRouter()
 
+# Versions are immutable, so clients and proxies may keep them forever
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
 
-@router.get("/", response_model=ProblemList)
-def list_problems(
-    db: Session = Depends(get_db),
+
+@router.get(
+    "/", response_model=ProblemSummaryList, response_model_exclude_unset=True
+)
+async def list_problems(
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 20,
     problem_type: Optional[ProblemType] = None,
     difficulty: Optional[DifficultyLevel] = None,
-    current_user: User = Depends(get_current_active_user),
+    tags: Optional[List[str]] = Query(None),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated list of fields to return"
+    ),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
-    Retrieve problems with optional filtering.
+    Retrieve problem summaries with optional filtering.
+
+    Repeating ``tags`` narrows the result to problems carrying every tag.
+    Only the requested ``fields`` are loaded from the database; use
+    ``GET /problems/{id}`` for the full problem.
     """
-    query = db.query(Problem)
+    selected = _parse_fields(fields)
 
     # Apply filters if provided
+    conditions = []
     if problem_type:
-        query = query.filter(Problem.problem_type == problem_type)
+        conditions.append(Problem.problem_type == problem_type)
     if difficulty:
-        query = query.filter(Problem.difficulty == difficulty)
+        conditions.append(Problem.difficulty == difficulty)
+    if tags:
+        tag_ids = await db.run_sync(
+            lambda session: tag_service.get_ids(session, names=tags)
+        )
+        if tag_ids is None:
+            return {"items": [], "total": 0}
+        conditions.append(facet_service.has_all_tags(tag_ids))
+
+    total = await db.scalar(
+        select(func.count()).select_from(Problem).where(*conditions)
+    )
+    # Core rows straight into the response model: no ORM identity map
+    rows = await db.execute(
+        select(*_projection_columns(selected))
+        .where(*conditions)
+        .order_by(Problem.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    items = [dict(row) for row in rows.mappings()]
+    if "tags" in selected and items:
+        tags = await db.execute(
+            tag_service.problem_tags_select([item["id"] for item in items])
+        )
+        by_problem: Dict[int, list] = {}
+        for row in tags.mappings():
+            by_problem.setdefault(row["problem_id"], []).append(row)
+        for item in items:
+            item["tags"] = by_problem.get(item["id"], [])
+    return ModelResponse(
+        ProblemSummaryList,
+        {"items": items, "total": total},
+        exclude_unset=True,
+    )
+
+
+@router.get("/facets", response_model=ProblemFacets)
+def get_problem_facets(
+    db: Session = Depends(get_db),
+    problem_type: Optional[ProblemType] = None,
+    difficulty: Optional[DifficultyLevel] = None,
+    tags: Optional[List[str]] = Query(None),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Problem counts per facet value for the given filter selection.
+    """
+    return facet_service.get_facets(
+        db, problem_type=problem_type, difficulty=difficulty, tags=tags
+    )
 
-    total = query.count()
-    problems = query.offset(skip).limit(limit).all()
 
-    return {"items": problems, "total": total}
+@router.get("/export")
+def export_problems(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Stream the whole problem bank as NDJSON (admin only).
+    """
 
+    def stream():
+        try:
+            yield from problem_io_service.export_ndjson(db)
+        finally:
+            db.close()
 
-@router.get("/{problem_id}", response_model=ProblemSchema)
-def get_problem(
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": 'attachment; filename="problems.ndjson"'
+        },
+    )
+
+
+@router.post("/import", response_model=ProblemImportReport)
+def import_problems(
     *,
     db: Session = Depends(get_db),
-    problem_id: int,
+    file: UploadFile = File(...),
+    batch_size: int = Query(
+        settings.PROBLEM_IMPORT_BATCH_SIZE, ge=1, le=10000
+    ),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Bulk import problems from an NDJSON file, one problem per line
+    (admin only). Invalid lines are reported and skipped.
+    """
+    return problem_io_service.import_ndjson(
+        db, file.file, batch_size=batch_size
+    )
+
+
+@router.get("/versions/{content_hash}", response_model=ProblemVersionSchema)
+def get_problem_version(
+    *,
+    db: Session = Depends(get_db),
+    content_hash: str,
     current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get an immutable problem version by its content hash.
+    """
+    version = problem_version_service.get_by_hash(
+        db, content_hash=content_hash
+    )
+    if not version:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return ModelResponse(
+        ProblemVersionSchema,
+        version,
+        headers={
+            "ETag": f'"{version.content_hash}"',
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        },
+    )
+
+
+@router.get("/{problem_id}", response_model=ProblemSchema)
+async def get_problem(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    problem_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Get a specific problem by ID.
+
+    The ETag is the head version hash, so clients can revalidate cheaply.
     """
-    problem = db.query(Problem).filter(Problem.id == problem_id).first()
-    if not problem:
-        raise HTTPException(status_code=404, detail="Problem not found")
+    # Problems of upcoming and running contests are served from memory
+    cached = contest_service.cached_problem(problem_id)
+    if cached is not None:
+        version_hash = cached.version_hash
+    else:
+        problem = await db.get(Problem, problem_id)
+        if not problem:
+            raise HTTPException(status_code=404, detail="Problem not found")
+        version_hash = problem.version_hash
+    headers = {}
+    if version_hash:
+        etag = f'"{version_hash}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if if_none_match == etag:
+            return Response(status_code=304, headers=headers)
+    if cached is not None:
+        return Response(
+            content=cached.body, media_type="application/json", headers=headers
+        )
+    response.headers.update(headers)
     return problem
 
 
+@router.get(
+    "/{problem_id}/versions", response_model=List[ProblemVersionSummary]
+)
+def list_problem_versions(
+    *,
+    db: Session = Depends(get_db),
+    problem_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    List the versions of a problem, newest first.
+    """
+    return problem_version_service.list_for_problem(db, problem_id=problem_id)
+
+
 @router.post("/", response_model=ProblemSchema)
 def create_problem(
     *,
@@ -79,6 +268,7 @@ def create_problem(
         problem_type=problem_in.problem_type,
         difficulty=problem_in.difficulty,
         problem_metadata=problem_in.problem_metadata,
+        tags=tag_service.get_or_create_many(db, names=problem_in.tags),
         # company_id=problem_in.company_id,
     )
     db.add(problem)
@@ -103,12 +293,16 @@ def update_problem(
         raise HTTPException(status_code=404, detail="Problem not found")
 
     update_data = problem_in.model_dump(exclude_unset=True)
+    tags = update_data.pop("tags", None)
     for field, value in update_data.items():
         setattr(problem, field, value)
+    if tags is not None:
+        problem.tags = tag_service.get_or_create_many(db, names=tags)
 
     db.add(problem)
     db.commit()
     db.refresh(problem)
+    contest_service.evict_problem(problem_id)
     return problem
 
 
@@ -128,4 +322,27 @@ def delete_problem(
 
     db.delete(problem)
     db.commit()
+    contest_service.evict_problem(problem_id)
     return problem
+
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(PROBLEM_SUMMARY_FIELDS)
+    selected = ["id"]
+    for field in fields.split(","):
+        field = field.strip()
+        if field and field not in selected:
+            selected.append(field)
+    unknown = [f for f in selected if f not in PROBLEM_LIST_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown or non-listable fields: {', '.join(unknown)}",
+        )
+    return selected
+
+
+def _projection_columns(selected: List[str]) -> list:
+    """The problem table columns behind the selected fields."""
+    return [Problem.__table__.c[f] for f in selected if f != "tags"]
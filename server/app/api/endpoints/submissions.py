@@ -1,14 +1,35 @@
-from typing import Any, List, Optional
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, select
 
 from app.api.deps import (
+    get_async_db,
     get_current_active_user,
+    get_current_active_user_async,
     get_current_admin_user,
     get_db,
 )
+from app.core.metrics import JUDGE_QUEUE_DEPTH
+from app.core.responses import ModelResponse
+from app.core.tracing import (
+    KIND_CLIENT,
+    KIND_SERVER,
+    Span,
+    SpanContext,
+    tracer,
+)
 from app.models.submission import Submission, SubmissionStatus
 from app.models.problem import Problem
 from app.models.user import User
@@ -17,50 +38,71 @@ from app.schemas.submission import (
     SubmissionCreate,
     SubmissionUpdate,
     SubmissionList,
+    SubmissionTrace,
 )
+from app.services.archive_service import submission_archive_service
+from app.services.contest_judge_service import contest_judge_service
+from app.services.contest_service import contest_service
+from app.services.judge_service import STAGES, judge_service
+from app.services.submission_service import submission_service
 
 router = APIRouter()
 
+# Row shape of SubmissionList items
+SUBMISSION_LIST_COLUMNS = (
+    *(
+        column
+        for column in Submission.__table__.c
+        if column.key not in ("archive_segment", "trace_id", "span_id")
+    ),
+    Submission.__table__.c.archive_segment.is_not(None).label("archived"),
+)
+
 
 @router.get("/", response_model=SubmissionList)
-def list_submissions(
-    db: Session = Depends(get_db),
+async def list_submissions(
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 20,
     problem_id: Optional[int] = None,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     List user's submissions with optional filtering by problem.
     """
-    query = db.query(Submission).filter(Submission.user_id == current_user.id)
+    conditions = [Submission.user_id == current_user.id]
 
     if problem_id:
-        query = query.filter(Submission.problem_id == problem_id)
+        conditions.append(Submission.problem_id == problem_id)
 
-    total = query.count()
-    submissions = (
-        query.order_by(desc(Submission.created_at))
+    total = await db.scalar(
+        select(func.count()).select_from(Submission).where(*conditions)
+    )
+    # Core rows straight into the response model: no ORM identity map
+    submissions = await db.execute(
+        select(*SUBMISSION_LIST_COLUMNS)
+        .where(*conditions)
+        .order_by(desc(Submission.created_at))
         .offset(skip)
         .limit(limit)
-        .all()
     )
 
-    return {"items": submissions, "total": total}
+    return ModelResponse(
+        SubmissionList,
+        {"items": submissions.mappings().all(), "total": total},
+    )
 
 
 @router.get("/{submission_id}", response_model=SubmissionSchema)
-def get_submission(
+async def get_submission(
     submission_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Get a specific submission by ID.
     """
-    submission = (
-        db.query(Submission).filter(Submission.id == submission_id).first()
-    )
+    submission = await db.get(Submission, submission_id)
 
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
@@ -72,49 +114,32 @@ def get_submission(
             detail="You don't have permission to access this submission",
         )
 
+    if submission.archived:
+        # Content and results live in an archive segment on disk
+        await run_in_threadpool(
+            submission_archive_service.fault_in, submission
+        )
+
     return submission
 
 
 # This would be where we implement our code execution system
-def process_submission_in_background(submission_id: int, db: Session) -> None:
+def process_submission_in_background(
+    submission_id: int,
+    db: Session,
+    queued_at: Optional[float] = None,
+    trace_context: Optional[SpanContext] = None,
+) -> Dict[str, float]:
     """
-    Dummy background task for processing submissions.
-    In a real implementation, this would:
-    1. Retrieve the submission from the database
-    2. Set up a sandboxed environment (e.g., Docker container)
-    3. Run the code against test cases
-    4. Update the submission status and results in the database
+    Background task judging a new submission; see ``JudgeService.judge``.
     """
-    submission = (
-        db.query(Submission).filter(Submission.id == submission_id).first()
+    return judge_service.judge(
+        db,
+        submission_id=submission_id,
+        queued_at=queued_at,
+        trace_context=trace_context,
     )
 
-    if not submission:
-        return
-
-    # In a real implementation, we'd actually run the tests
-    # For now, we'll just mock a successful submission
-    submission.status = SubmissionStatus.ACCEPTED
-    submission.score = 100.0
-    submission.results = {
-        "testCases": [
-            {
-                "name": "Basic Test",
-                "passed": True,
-                "executionTime": 0.05,
-                "memoryUsed": 2048,
-            }
-        ],
-        "summary": {
-            "totalTests": 1,
-            "passedTests": 1,
-            "failedTests": 0,
-        },
-    }
-
-    db.add(submission)
-    db.commit()
-
 
 @router.post("/", response_model=SubmissionSchema)
 def create_submission(
@@ -126,38 +151,104 @@ def create_submission(
 ) -> Any:
     """
     Create a new submission for a problem.
+
+    Submissions with a ``contest_id`` are judged by the contest judge
+    queue; a 429 means it is full and the client should retry after the
+    Retry-After seconds.
     """
-    # Check if the problem exists
-    problem = (
-        db.query(Problem)
-        .filter(Problem.id == submission_in.problem_id)
-        .first()
-    )
+    if submission_in.contest_id is not None:
+        version_hash = _admit_contest_submission(db, submission_in)
+    else:
+        # Check if the problem exists
+        problem = (
+            db.query(Problem)
+            .filter(Problem.id == submission_in.problem_id)
+            .first()
+        )
 
-    if not problem:
-        raise HTTPException(status_code=404, detail="Problem not found")
+        if not problem:
+            raise HTTPException(status_code=404, detail="Problem not found")
+        version_hash = problem.version_hash
 
     # Create the submission
     submission = Submission(
         user_id=current_user.id,
         problem_id=submission_in.problem_id,
+        problem_version_hash=version_hash,
         content=submission_in.content,
         language=submission_in.language,
         status=SubmissionStatus.PENDING,
+        contest_id=submission_in.contest_id,
     )
+    # The judge continues the trace of this request
+    context = tracer.current_context()
+    if context is not None:
+        submission.trace_id, submission.span_id = context
 
-    db.add(submission)
-    db.commit()
-    db.refresh(submission)
+    if submission_in.contest_id is not None:
+        try:
+            # Queued in the transaction that stores the submission
+            contest_judge_service.enqueue(db, submission=submission)
+            submission = submission_service.create(db, submission=submission)
+        finally:
+            contest_judge_service.release()
+        contest_judge_service.notify()
+        return submission
+
+    submission = submission_service.create(db, submission=submission)
 
     # Process the submission in the background
+    JUDGE_QUEUE_DEPTH.inc()
     background_tasks.add_task(
-        process_submission_in_background, submission.id, db
+        process_submission_in_background,
+        submission.id,
+        db,
+        queued_at=time.perf_counter(),
+        trace_context=submission.trace_context,
     )
 
     return submission
 
 
+def _admit_contest_submission(
+    db: Session, submission_in: SubmissionCreate
+) -> Optional[str]:
+    """
+    Check a contest submission against its (cached) contest and take a
+    write slot for it (see ``ContestJudgeService.admit``). Returns the
+    problem version to judge against.
+    """
+    contest = contest_service.get(db, contest_id=submission_in.contest_id)
+    if contest is None:
+        raise HTTPException(status_code=404, detail="Contest not found")
+    if not contest.running(datetime.now(timezone.utc)):
+        raise HTTPException(status_code=400, detail="Contest is not running")
+    if submission_in.problem_id not in contest.problem_ids:
+        raise HTTPException(
+            status_code=400, detail="Problem is not part of this contest"
+        )
+
+    cached = contest_service.cached_problem(submission_in.problem_id)
+    if cached is not None:
+        version_hash = cached.version_hash
+    else:
+        version_hash = db.scalar(
+            select(Problem.version_hash).where(
+                Problem.id == submission_in.problem_id
+            )
+        )
+
+    if not contest_judge_service.admit(db):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many contest submissions, retry later",
+            headers={
+                "Retry-After": str(contest_judge_service.retry_after(db))
+            },
+        )
+    return version_hash
+
+
 @router.put("/{submission_id}", response_model=SubmissionSchema)
 def update_submission(
     *,
@@ -178,12 +269,88 @@ def update_submission(
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
 
+    submission_archive_service.restore(db, submission=submission)
     update_data = submission_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(submission, field, value)
-
-    db.add(submission)
-    db.commit()
+    if "status" in update_data:
+        # A (re-)judged verdict also updates the progress aggregates
+        submission_service.record_verdict(
+            db,
+            submission=submission,
+            status=update_data["status"],
+            score=update_data.get("score", submission.score),
+            results=update_data.get("results", submission.results),
+        )
+    else:
+        for field, value in update_data.items():
+            setattr(submission, field, value)
+        db.add(submission)
+        db.commit()
     db.refresh(submission)
 
     return submission
+
+
+def _breakdown(spans: List[Span]) -> Dict[str, float]:
+    def total(matches) -> float:
+        return sum(span.duration_ns for span in spans if matches(span)) / 1e6
+
+    breakdown = {
+        "api": total(lambda span: span.kind == KIND_SERVER),
+        **{
+            stage: total(lambda span: span.name == f"judge.{stage}")
+            for stage in STAGES
+        },
+        "sql": total(lambda span: span.kind == KIND_CLIENT),
+    }
+    started = min(span.start_ns for span in spans)
+    ended = max(span.start_ns + span.duration_ns for span in spans)
+    breakdown["total"] = (ended - started) / 1e6
+    return breakdown
+
+
+@router.get("/{submission_id}/trace", response_model=SubmissionTrace)
+def get_submission_trace(
+    *,
+    db: Session = Depends(get_db),
+    submission_id: int,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Timing breakdown of a submission, from the API request through the
+    queue to each judge stage (admin only). Needs ``TRACING_ENABLED``;
+    spans are kept in memory per process, the complete record is the
+    ``TRACING_EXPORT_PATH`` file.
+    """
+    submission = submission_service.get(db, submission_id=submission_id)
+
+    if not submission:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    spans = (
+        tracer.collector.trace(submission.trace_id)
+        if submission.trace_id
+        else []
+    )
+    if not spans:
+        raise HTTPException(
+            status_code=404, detail="No trace recorded for this submission"
+        )
+
+    started = spans[0].start_ns
+    return {
+        "submission_id": submission.id,
+        "trace_id": submission.trace_id,
+        "breakdown": _breakdown(spans),
+        "spans": [
+            {
+                "span_id": span.span_id,
+                "parent_span_id": span.parent_span_id,
+                "name": span.name,
+                "start_ms": (span.start_ns - started) / 1e6,
+                "duration_ms": span.duration_ns / 1e6,
+                "attributes": span.attributes,
+                "error": span.status_message,
+            }
+            for span in spans
+        ],
+    }
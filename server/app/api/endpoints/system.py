@@ -0,0 +1,96 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import get_current_admin_user
+from app.core.profiling import collapsed, merge, profile_store
+from app.db.engine import engine_stats
+from app.core.config import settings
+from app.db.session import async_engine, db_router, engine
+from app.db.slow_queries import slow_query_log
+from app.models.user import User
+from app.schemas.system import DatabaseStats, ProfileSummary, SlowQueryLog
+
+router = APIRouter()
+
+
+@router.get("/database", response_model=DatabaseStats)
+def read_database_stats(
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Connection pool occupancy, checkout waits and statement times, and
+    read replica health (admin only).
+    """
+    engines = {
+        "sync": engine_stats(engine),
+        "async": engine_stats(async_engine),
+    }
+    for replica in db_router.replicas:
+        engines[f"{replica.name}:sync"] = engine_stats(replica.engine)
+        engines[f"{replica.name}:async"] = engine_stats(replica.async_engine)
+    return {"engines": engines, "replicas": db_router.stats()}
+
+
+@router.get("/slow-queries", response_model=SlowQueryLog)
+def read_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Statements slower than the threshold, grouped by normalized SQL, by
+    total time spent (admin only).
+    """
+    return {
+        "enabled": settings.SLOW_QUERY_LOG_ENABLED,
+        "threshold_ms": slow_query_log.threshold_ms,
+        "queries": slow_query_log.queries()[:limit],
+    }
+
+
+@router.delete("/slow-queries", status_code=204)
+def reset_slow_queries(
+    current_user: User = Depends(get_current_admin_user),
+) -> None:
+    """
+    Clear the slow query log (admin only).
+    """
+    slow_query_log.reset()
+
+
+@router.get("/profiles", response_model=List[ProfileSummary])
+def read_profiles(
+    route: Optional[str] = None,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Request profiles kept by this process, newest first (admin only).
+    """
+    return [profile.summary() for profile in profile_store.list(route)]
+
+
+@router.get("/profiles/collapsed", response_class=PlainTextResponse)
+def read_merged_profile(
+    route: Optional[str] = None,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Stacks of all kept profiles, or of one route template, merged into
+    collapsed-stack lines for flamegraph.pl or speedscope (admin only).
+    """
+    return collapsed(merge(profile_store.list(route)))
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def read_profile(
+    profile_id: int,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Stacks of one request profile as collapsed-stack lines (admin only).
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return collapsed(profile.stacks)
@@ -1,24 +1,31 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api.deps import (
     get_current_active_user,
+    get_current_active_user_async,
     get_current_admin_user,
     get_db,
 )
+from app.core.responses import ModelResponse
 from app.models.user import User
+from app.schemas.heatmap import ActivityHeatmap
+from app.schemas.progress import UserProgress, UserProblemProgress
 from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
+from app.services.heatmap_service import heatmap_service
+from app.services.progress_service import progress_service
 from app.services.user_service import user_service
 
 router = APIRouter()
 
 
 @router.get("/me", response_model=UserSchema)
-def read_user_me(
-    current_user: User = Depends(get_current_active_user),
+async def read_user_me(
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Get current user.
@@ -40,6 +47,104 @@ def update_user_me(
     return user
 
 
+@router.get("/me/progress", response_model=UserProgress)
+def read_user_me_progress(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get solved counts and attempts of the current user.
+    """
+    row = progress_service.get(db, user_id=current_user.id)
+    return progress_service.to_dict(current_user.id, row)
+
+
+@router.get("/me/progress/problems", response_model=List[UserProblemProgress])
+def read_user_me_problem_progress(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get per-problem progress of the current user.
+    """
+    return progress_service.list_problems(db, user_id=current_user.id)
+
+
+@router.get("/{user_id}/progress", response_model=UserProgress)
+def read_user_progress(
+    user_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Get solved counts and attempts of a specific user.
+    """
+    if user_id != current_user.id and not user_service.is_admin(current_user):
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions to access this resource",
+        )
+    row = progress_service.get(db, user_id=user_id)
+    return progress_service.to_dict(user_id, row)
+
+
+@router.get("/me/activity", response_model=ActivityHeatmap)
+def read_user_me_activity(
+    db: Session = Depends(get_db),
+    year: Optional[int] = Query(None, ge=2000, le=2100),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Daily submission calendar and streaks of the current user.
+    """
+    return heatmap_service.get_heatmap(db, user_id=current_user.id, year=year)
+
+
+@router.get("/{user_id}/activity", response_model=ActivityHeatmap)
+def read_user_activity(
+    user_id: int,
+    year: Optional[int] = Query(None, ge=2000, le=2100),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Daily submission calendar and streaks of a specific user.
+    """
+    if user_id != current_user.id and not user_service.is_admin(current_user):
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions to access this resource",
+        )
+    return heatmap_service.get_heatmap(db, user_id=user_id, year=year)
+
+
+# Admin only endpoints
+@router.get("/export")
+def export_users(
+    db: Session = Depends(get_db),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Stream every user as NDJSON or CSV.
+    """
+
+    def stream():
+        try:
+            yield from user_service.iter_export(db, fmt=format)
+        finally:
+            db.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="users.{format}"'
+        },
+    )
+
+
 @router.get("/{user_id}", response_model=UserSchema)
 def read_user_by_id(
     user_id: int,
@@ -63,19 +168,31 @@ def read_user_by_id(
     return user
 
 
-# Admin only endpoints
 @router.get("/", response_model=List[UserSchema])
 def read_users(
     db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    after_id: Optional[int] = Query(
+        None, description="Keyset cursor: return users with a larger id"
+    ),
+    skip: int = Query(0, deprecated=True),
+    limit: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_admin_user),
 ) -> Any:
     """
-    Retrieve users.
+    Retrieve users ordered by id.
+
+    Page with ``after_id`` set to the ``X-Next-Cursor`` header of the
+    previous page; the header is absent on the last page.
     """
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    if after_id is None and skip:
+        users = user_service.list_offset(db, skip=skip, limit=limit)
+        return ModelResponse(List[UserSchema], users)
+
+    users = user_service.list_after(db, after_id=after_id or 0, limit=limit)
+    headers = {}
+    if len(users) == limit:
+        headers["X-Next-Cursor"] = str(users[-1]["id"])
+    return ModelResponse(List[UserSchema], users, headers=headers)
 
 
 @router.post("/", response_model=UserSchema)
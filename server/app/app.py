@@ -1,8 +1,101 @@
+import asyncio
+import contextlib
+import logging
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from app.api.api import api_router
+from app.api.endpoints import metrics
 from app.core.config import settings
+from app.db import session as db_session
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.slow_queries import SlowQueryContextMiddleware
+from app.middleware.tracing import TracingMiddleware
+from app.services.activity_service import activity_service
+from app.services.contest_judge_service import contest_judge_service
+from app.services.contest_service import contest_service
+from app.services.leaderboard_service import leaderboard_service
+
+logger = logging.getLogger(__name__)
+
+# Seconds between event loop lag samples
+LOOP_LAG_INTERVAL = 0.05
+
+
+async def _snapshot_leaderboards(interval: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await run_in_threadpool(leaderboard_service.snapshot)
+
+
+async def _refresh_contests() -> None:
+    try:
+        # Other workers refresh too: keep a snapshot one of them just took
+        await run_in_threadpool(
+            contest_service.refresh,
+            max_age=settings.CONTEST_REFRESH_INTERVAL / 2,
+        )
+    except Exception:
+        logger.exception("Failed to refresh contests")
+
+
+async def _refresh_contests_every(interval: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await _refresh_contests()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Boards are loaded lazily from the database on first use
+    leaderboard_service.reset()
+    activity_service.reset()
+    activity_service.start()
+    contest_service.reset()
+    contest_service.bind(db_session.engine)
+    # Contests may be running when the app restarts: warm them before
+    # serving the first request
+    await _refresh_contests()
+    contest_judge_service.reset()
+    contest_judge_service.start(db_session.engine)
+    # Load signal of contest admission control
+    tasks = [
+        asyncio.create_task(
+            contest_judge_service.sample_loop_lag(LOOP_LAG_INTERVAL)
+        )
+    ]
+    if settings.LEADERBOARD_SNAPSHOT_INTERVAL > 0:
+        tasks.append(
+            asyncio.create_task(
+                _snapshot_leaderboards(settings.LEADERBOARD_SNAPSHOT_INTERVAL)
+            )
+        )
+    # Warms contest problem sets and materializes scoreboards
+    if settings.CONTEST_REFRESH_INTERVAL > 0:
+        tasks.append(
+            asyncio.create_task(
+                _refresh_contests_every(settings.CONTEST_REFRESH_INTERVAL)
+            )
+        )
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        # Queued contest submissions stay in the database for the next
+        # start or another worker
+        await run_in_threadpool(contest_judge_service.stop)
+        await run_in_threadpool(leaderboard_service.snapshot)
+        leaderboard_service.reset()
+        # Write out buffered activity events before exiting
+        await run_in_threadpool(activity_service.stop)
 
 
 def create_app() -> FastAPI:
@@ -11,6 +104,7 @@ def create_app() -> FastAPI:
         version=settings.VERSION,
         description=settings.DESCRIPTION,
         openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        lifespan=lifespan,
     )
 
     # Set up CORS middleware
@@ -25,8 +119,47 @@ def create_app() -> FastAPI:
             allow_headers=["*"],
         )
 
+    # Compress large payloads (problem and submission lists)
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.GZIP_MINIMUM_SIZE,
+        compresslevel=settings.GZIP_COMPRESS_LEVEL,
+    )
+
+    # Count SQL statements per request; outermost, so the headers also
+    # land on compressed responses
+    if settings.DEBUG:
+        app.add_middleware(
+            QueryStatsMiddleware,
+            repeat_warning=settings.QUERY_REPEAT_WARNING,
+        )
+
+    # Lets slow queries be traced back to the endpoint that issued them
+    if settings.SLOW_QUERY_LOG_ENABLED:
+        app.add_middleware(SlowQueryContextMiddleware)
+
+    # Sampled request profiles, served under /system/profiles
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(
+            ProfilingMiddleware,
+            sample_rate=settings.PROFILING_SAMPLE_RATE,
+            token=settings.PROFILING_TOKEN,
+            interval=settings.PROFILING_INTERVAL_MS / 1000,
+        )
+
+    # Trace spans per request, parent of the SQL and judge spans
+    if settings.TRACING_ENABLED:
+        app.add_middleware(TracingMiddleware)
+
+    # Request counts and latencies per route, around everything else
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
     # Include API router
     app.include_router(api_router, prefix=settings.API_V1_STR)
+    # Not served without a token, the metrics are not public
+    if settings.METRICS_ENABLED and settings.METRICS_TOKEN:
+        app.include_router(metrics.router)
 
     @app.get("/")
     def root():
@@ -1,6 +1,7 @@
-from typing import List, Optional, Union
+import json
+from typing import Annotated, List, Optional, Union
 from pydantic import AnyHttpUrl, validator
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, NoDecode
 
 
 class Settings(BaseSettings):
@@ -11,6 +12,12 @@ class Settings(BaseSettings):
     )
     API_V1_STR: str = "/api/v1"
 
+    # Debug mode adds per-request SQL statement counts and timings as
+    # response headers (X-Query-Count, X-Query-Time-Ms, Server-Timing)
+    DEBUG: bool = False
+    # ... and warns when a request repeats one statement this often
+    QUERY_REPEAT_WARNING: int = 10
+
     # CORS Configuration
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:3000",
@@ -27,8 +34,136 @@ class Settings(BaseSettings):
             return v
         raise ValueError(v)
 
+    # Responses larger than this many bytes are gzip-compressed for
+    # clients that send ``Accept-Encoding: gzip``
+    GZIP_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESS_LEVEL: int = 6
+
+    # Prometheus metrics at /metrics, only served when METRICS_TOKEN is set
+    # (scrapers send ``Authorization: Bearer <token>``) so that the
+    # endpoint is never public
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+
+    # Sampled request profiling (off by default: the middleware is not
+    # installed). A sample of requests is profiled, plus any request sent
+    # with ``X-Profile: <PROFILING_TOKEN>``; the last PROFILING_BUFFER_SIZE
+    # profiles are served under /system/profiles
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_TOKEN: Optional[str] = None
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_BUFFER_SIZE: int = 50
+
     # Database
     DATABASE_URL: str = "sqlite:///./designskills.db"
+    # Used by async endpoints; derived from DATABASE_URL when unset
+    # (sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg)
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Read replicas serving GET requests (JSON list or comma-separated);
+    # reads fall back to the primary when no replica is healthy
+    DATABASE_REPLICA_URLS: Annotated[List[str], NoDecode] = []
+    # Seconds a replica that failed to connect stays out of rotation
+    DB_REPLICA_RETRY_INTERVAL: float = 30.0
+    # Seconds a user's reads stay on the primary after they write
+    DB_READ_YOUR_WRITES_WINDOW: float = 5.0
+
+    @validator("DATABASE_REPLICA_URLS", pre=True)
+    def assemble_replica_urls(
+        cls, v: Union[str, List[str]]
+    ) -> Union[List[str], str]:
+        if isinstance(v, str):
+            if v.startswith("["):
+                return json.loads(v)
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
+
+    # Connection pool (see app/db/engine.py); pre-ping and recycle only
+    # apply to server databases
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Statements running longer than this are cancelled (0 disables)
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+
+    # Slow query log (see app/db/slow_queries.py), served to admins at
+    # /system/slow-queries. Parameters are reduced to their types unless
+    # SLOW_QUERY_REDACT_PARAMETERS is off; plans are captured at most once
+    # per statement every SLOW_QUERY_EXPLAIN_INTERVAL seconds
+    SLOW_QUERY_LOG_ENABLED: bool = False
+    SLOW_QUERY_THRESHOLD_MS: float = 100.0
+    SLOW_QUERY_REDACT_PARAMETERS: bool = True
+    SLOW_QUERY_EXPLAIN_INTERVAL: float = 60.0
+    SLOW_QUERY_MAX_FINGERPRINTS: int = 500
+    SLOW_QUERY_SAMPLES: int = 5
+
+    # Request tracing (see app/core/tracing.py): spans for requests, SQL
+    # statements and judge stages, the last TRACING_BUFFER_SIZE kept in
+    # memory for /submissions/{id}/trace and, with TRACING_EXPORT_PATH
+    # set, appended to that file as OTLP/JSON lines
+    TRACING_ENABLED: bool = False
+    TRACING_SERVICE_NAME: str = "skillslab-api"
+    TRACING_BUFFER_SIZE: int = 10000
+    TRACING_EXPORT_PATH: Optional[str] = None
+
+    # SQLite pragmas applied to every new connection (None skips one)
+    SQLITE_JOURNAL_MODE: Optional[str] = "wal"
+    SQLITE_SYNCHRONOUS: Optional[str] = "normal"
+    SQLITE_MMAP_SIZE: Optional[int] = 256 * 1024 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: Optional[int] = 5000
+
+    # Bulk problem import (rows inserted per transaction)
+    PROBLEM_IMPORT_BATCH_SIZE: int = 500
+
+    # Judged submissions older than this many days are moved to
+    # compressed segment files (``python -m scripts.archive submissions``),
+    # leaving stub rows in the submission table
+    SUBMISSION_ARCHIVE_DIR: str = "./archive/submissions"
+    SUBMISSION_ARCHIVE_AFTER_DAYS: int = 180
+    SUBMISSION_ARCHIVE_BATCH_SIZE: int = 10000
+    # Uncompressed bytes of rows per compressed block in a segment
+    SUBMISSION_ARCHIVE_BLOCK_SIZE: int = 64 * 1024
+
+    # Seconds between leaderboard snapshots (0 disables the periodic task;
+    # boards are still snapshotted on shutdown)
+    LEADERBOARD_SNAPSHOT_INTERVAL: int = 60
+
+    # Contests (see app/services/contest_service.py): problem sets are
+    # cached in memory from CONTEST_WARM_AHEAD seconds before the start,
+    # scoreboards are materialized every CONTEST_REFRESH_INTERVAL seconds
+    # (0 disables the periodic task) until CONTEST_FINAL_AFTER seconds
+    # after the end, and contest submissions are judged from a queue in
+    # the database holding at most CONTEST_QUEUE_SIZE submissions (see
+    # app/services/contest_judge_service.py)
+    CONTEST_WARM_AHEAD: int = 300
+    CONTEST_REFRESH_INTERVAL: int = 15
+    CONTEST_FINAL_AFTER: int = 300
+    CONTEST_QUEUE_SIZE: int = 2000
+    # Contest submissions are answered with 429 while the API process's
+    # event loop runs this late (it is short of CPU) or this many are
+    # already being stored, so a contest start cannot crowd out practice
+    CONTEST_MAX_LOOP_LAG_MS: float = 20.0
+    CONTEST_WRITE_CONCURRENCY: int = 4
+    # Judge threads in each API process; 0 leaves contest judging to
+    # ``python -m scripts.contest_judge`` workers
+    CONTEST_JUDGE_WORKERS: int = 1
+    # Seconds an idle worker waits before looking at the queue again, and
+    # after which a claimed submission whose worker died is retaken
+    CONTEST_JUDGE_POLL_INTERVAL: float = 0.5
+    CONTEST_JUDGE_LEASE: int = 60
+
+    # Activity events are buffered in memory and bulk-inserted by a
+    # background flusher once a batch fills up or the interval elapses
+    ACTIVITY_BUFFER_SIZE: int = 10000
+    ACTIVITY_FLUSH_BATCH_SIZE: int = 500
+    ACTIVITY_FLUSH_INTERVAL: float = 2.0
+    # Above this fill ratio only a sample of incoming events is kept
+    ACTIVITY_SAMPLE_THRESHOLD: float = 0.8
+    ACTIVITY_SAMPLE_RATE: float = 0.1
+    # Largest accepted event payload, in bytes of JSON
+    ACTIVITY_MAX_PAYLOAD_BYTES: int = 4096
 
     # JWT
     SECRET_KEY: str = "YOUR_SECRET_KEY_HERE"  # Change this in production!
@@ -0,0 +1,264 @@
+"""
+Process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms keep their values in per-thread shards:
+recording touches only the calling thread's dict, so the hot path takes
+no lock and never contends with other threads; shards are summed when
+``/metrics`` is scraped. Values computed on demand (pool occupancy) come
+from collector callbacks run at scrape time.
+
+Label values must come from bounded sets - route templates, methods,
+status codes - never from raw URLs or ids.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; tuned for API requests that mostly finish within 100 ms
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = Tuple[str, ...]
+# (metric name suffix, label pairs, value)
+Sample = Tuple[str, Sequence[Tuple[str, str]], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    inner = ",".join(f'{name}="{_escape(str(v))}"' for name, v in pairs)
+    return "{" + inner + "}"
+
+
+class _Shards:
+    """One value dict per recording thread, merged when scraped."""
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def mine(self) -> Dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values: Dict = {}
+            # Once per thread
+            with self._lock:
+                self._shards.append(values)
+            self._local.values = values
+            return values
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            shards = list(self._shards)
+        # dict.copy() runs without releasing the GIL
+        return [shard.copy() for shard in shards]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards = _Shards()
+
+    def _pairs(self, labels: Labels) -> List[Tuple[str, str]]:
+        return list(zip(self.labelnames, labels))
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        values = self._shards.mine()
+        values[labels] = values.get(labels, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        merged: Dict[Labels, float] = {}
+        for shard in self._shards.snapshot():
+            for labels, value in shard.items():
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in sorted(self.values().items()):
+            yield "", self._pairs(labels), value
+
+
+class Gauge(Counter):
+    """A counter that can go down (in-flight requests, queue depth)."""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        values = self._shards.mine()
+        row = values.get(labels)
+        if row is None:
+            # Per-bucket counts (+Inf last), then the sum
+            row = values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def values(self) -> Dict[Labels, List[float]]:
+        merged: Dict[Labels, List[float]] = {}
+        for shard in self._shards.snapshot():
+            for labels, row in shard.items():
+                total = merged.setdefault(labels, [0] * len(row))
+                for i, value in enumerate(row):
+                    total[i] += value
+        return merged
+
+    def samples(self) -> Iterable[Sample]:
+        bounds = [*self.buckets, float("inf")]
+        for labels, row in sorted(self.values().items()):
+            pairs = self._pairs(labels)
+            cumulative = 0
+            for bound, count in zip(bounds, row):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                yield "_bucket", [*pairs, le], cumulative
+            yield "_sum", pairs, row[-1]
+            yield "_count", pairs, cumulative
+
+
+# A collector returns (name, kind, documentation, samples) families
+Collector = Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def register_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        families = [
+            (m.name, m.kind, m.documentation, m.samples())
+            for m in self._metrics
+        ]
+        for collector in self._collectors:
+            families.extend(collector())
+        lines: List[str] = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, pairs, value in samples:
+                lines.append(
+                    f"{name}{suffix}{_format_labels(pairs)} "
+                    f"{_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template.",
+    ("method", "route"),
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."
+)
+
+JUDGE_QUEUE_DEPTH = REGISTRY.gauge(
+    "judge_queue_depth", "Submissions waiting to be judged."
+)
+JUDGE_DURATION = REGISTRY.histogram(
+    "judge_duration_seconds", "Time to judge one submission."
+)
+JUDGE_STAGE_DURATION = REGISTRY.histogram(
+    "judge_stage_duration_seconds",
+    "Time spent per judging stage (queue, load, compile, run, check, "
+    "persist).",
+    ("stage",),
+)
+JUDGE_VERDICTS = REGISTRY.counter(
+    "judge_verdicts_total", "Verdicts recorded, by status.", ("status",)
+)
+CONTEST_ADMISSIONS = REGISTRY.counter(
+    "contest_admissions_total",
+    "Contest submissions admitted to or rejected by the judge queue.",
+    ("outcome",),
+)
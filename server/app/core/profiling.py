@@ -0,0 +1,225 @@
+"""
+Sampled request profiles in the collapsed-stack format.
+
+While a request is profiled, a ``Sampler`` thread records the Python stack
+of the event loop thread and of the threadpool workers (where ``def``
+endpoints and dependencies run) that are working for that request, at a
+fixed interval. AnyIO runs every threadpool call in a copy of the caller's
+context, so a worker belongs to the profiled request when the context it
+runs in carries the request's sampler; workers busy with other requests
+are left out. Samples are wall-clock: a thread blocked in a query or
+waiting for a pooled connection is sampled there, while idle threads (the
+loop waiting for I/O, a worker waiting for work) are skipped. Only one
+request is profiled at a time; the loop thread is shared, so coroutines of
+requests served concurrently can still show up under ``loop``.
+
+Profiles are kept in a bounded in-memory ``ProfileStore``, one per process.
+``collapsed`` renders stacks as ``thread;frame;frame <count>`` lines, the
+input format of ``flamegraph.pl`` and speedscope.
+"""
+
+import itertools
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import Context, ContextVar, Token
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Names of the threads Starlette runs sync endpoints and dependencies on
+WORKER_THREAD_NAME = "AnyIO worker thread"
+# ... and the frame that runs each call there, in the caller's ``context``.
+# Frames are matched by module and function name: code objects only have
+# qualified names (co_qualname) from Python 3.11
+_WORKER_RUN = ("anyio._backends._asyncio", "run")
+
+# Frames a thread idles in, waiting for a lock, a queue or I/O
+_WAIT_MODULES = frozenset({"threading", "queue", "selectors"})
+# ... and the loops they idle under
+_IDLE_LOOPS = frozenset(
+    {
+        _WORKER_RUN,
+        ("asyncio.base_events", "_run_once"),
+        ("asyncio.base_events", "run_once"),
+    }
+)
+
+
+def _function(frame) -> Tuple[str, str]:
+    return frame.f_globals.get("__name__", "?"), frame.f_code.co_name
+
+
+def _label(frame) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    code = frame.f_code
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _stack(frame) -> Optional[str]:
+    """Collapsed stack of ``frame``, root first; None if the thread idles."""
+    labels = []
+    waiting = True
+    while frame is not None:
+        if waiting:
+            function = _function(frame)
+            if function in _IDLE_LOOPS:
+                return None
+            waiting = function[0] in _WAIT_MODULES
+        labels.append(_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def collapsed(stacks: Dict[str, int]) -> str:
+    """``stack count`` lines, heaviest first."""
+    return "".join(
+        f"{stack} {count}\n" for stack, count in Counter(stacks).most_common()
+    )
+
+
+# The sampler of the request being profiled, in that request's context
+_current_sampler: ContextVar[Optional["Sampler"]] = ContextVar(
+    "current_sampler", default=None
+)
+
+
+def _worker_context(frame) -> Optional[Context]:
+    """The context a threadpool worker is running a call in, if any."""
+    while frame is not None:
+        if _function(frame) == _WORKER_RUN:
+            context = frame.f_locals.get("context")
+            return context if isinstance(context, Context) else None
+        frame = frame.f_back
+    return None
+
+
+class Sampler:
+    """Samples the stacks of busy request threads every ``interval`` s."""
+
+    def __init__(self, interval: float, loop_thread: int) -> None:
+        self.interval = interval
+        self.loop_thread = loop_thread
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._token: Optional[Token] = None
+        self._thread = threading.Thread(
+            target=self._run, name="request profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        """Start sampling the calling request (call from its context)."""
+        self._token = _current_sampler.set(self)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+        if self._token is not None:
+            _current_sampler.reset(self._token)
+            self._token = None
+
+    def _threads(self) -> Dict[int, str]:
+        threads = {self.loop_thread: "loop"}
+        for thread in threading.enumerate():
+            if thread.name == WORKER_THREAD_NAME:
+                threads[thread.ident] = "worker"
+        return threads
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            threads = self._threads()
+            for ident, frame in sys._current_frames().items():
+                name = threads.get(ident)
+                if name is None:
+                    continue
+                if name == "worker":
+                    context = _worker_context(frame)
+                    if (
+                        context is None
+                        or context.get(_current_sampler) is not self
+                    ):
+                        continue
+                stack = _stack(frame)
+                if stack is not None:
+                    self.stacks[f"{name};{stack}"] += 1
+            self.samples += 1
+
+
+class Profile:
+    __slots__ = (
+        "id",
+        "method",
+        "path",
+        "route",
+        "status",
+        "started_at",
+        "duration_ms",
+        "interval_ms",
+        "samples",
+        "stacks",
+    )
+
+    def __init__(self, id: int, method: str, path: str) -> None:
+        self.id = id
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self.interval_ms = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def summary(self) -> Dict:
+        summary = {name: getattr(self, name) for name in self.__slots__}
+        summary["stacks"] = len(self.stacks)
+        return summary
+
+
+class ProfileStore:
+    """The most recent ``size`` profiles of this process."""
+
+    def __init__(self, size: int) -> None:
+        self._profiles: deque = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self, route: Optional[str] = None) -> List[Profile]:
+        """Stored profiles, newest first, optionally of one route."""
+        with self._lock:
+            profiles = list(reversed(self._profiles))
+        if route is not None:
+            profiles = [p for p in profiles if p.route == route]
+        return profiles
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        for profile in self.list():
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+def merge(profiles: Iterable[Profile]) -> Counter:
+    stacks: Counter = Counter()
+    for profile in profiles:
+        stacks.update(profile.stacks)
+    return stacks
+
+
+profile_store = ProfileStore(settings.PROFILING_BUFFER_SIZE)
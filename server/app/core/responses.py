@@ -0,0 +1,48 @@
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+
+from pydantic import TypeAdapter
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+
+
+@lru_cache(maxsize=None)
+def get_adapter(model: Any) -> TypeAdapter:
+    """Cached TypeAdapter per response model (building one is expensive)."""
+    return TypeAdapter(model)
+
+
+class ModelResponse(Response):
+    """
+    JSON response serialized straight from a response model to bytes.
+
+    FastAPI's default path validates the endpoint result, converts it to a
+    JSON-compatible dict and then runs ``json.dumps`` over that dict. Here
+    the content is validated once and dumped by pydantic-core directly,
+    skipping the intermediate Python objects. Endpoints keep declaring
+    ``response_model`` for the OpenAPI schema and return
+    ``ModelResponse(Model, content)``.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        model: Any,
+        content: Any,
+        *,
+        exclude_unset: bool = False,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ) -> None:
+        adapter = get_adapter(model)
+        value = adapter.validate_python(content, from_attributes=True)
+        body = adapter.dump_json(value, exclude_unset=exclude_unset)
+        super().__init__(
+            content=body,
+            status_code=status_code,
+            headers=headers,
+            media_type=self.media_type,
+            background=background,
+        )
@@ -0,0 +1,301 @@
+"""
+Lightweight request tracing.
+
+With ``TRACING_ENABLED`` set, every request gets a trace: the tracing
+middleware opens a server span (continuing the caller's trace when it
+sends a W3C ``traceparent`` header), SQL statements issued while a span is
+active become child spans, and a new submission stores the trace context
+of the request that created it, so the judge, which may run long after
+the response, continues the same trace with its queue wait and its
+``load``, ``run`` and ``persist`` stages.
+
+Finished spans are kept in memory, the last ``TRACING_BUFFER_SIZE`` of
+them, for the per-submission timing breakdown at
+``/submissions/{id}/trace``. With ``TRACING_EXPORT_PATH`` set they are
+also appended to that file as OTLP/JSON, one ``ExportTraceServiceRequest``
+per line for each request or judge run, which the OpenTelemetry
+collector's ``otlpjsonfile`` receiver (or anything that reads OTLP) can
+ingest.
+"""
+
+import contextlib
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from app.core.config import settings
+
+# OTLP span kinds and status codes
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: str
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[SpanContext]:
+    """The context in a W3C ``traceparent`` header, if it is valid."""
+    match = _TRACEPARENT.match((header or "").strip().lower())
+    if match is None:
+        return None
+    trace_id, span_id = match.groups()
+    if not int(trace_id, 16) or not int(span_id, 16):
+        return None
+    return SpanContext(trace_id, span_id)
+
+
+class Span:
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_span_id",
+        "name",
+        "kind",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "status",
+        "status_message",
+        "root",
+        "_tracer",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_span_id: Optional[str],
+        kind: int,
+        start_ns: int,
+        attributes: Dict[str, Any],
+        root: Optional["Span"],
+    ) -> None:
+        self._tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = STATUS_UNSET
+        self.status_message: Optional[str] = None
+        # The first span of this trace in this process (a request or a
+        # judge run); its descendants are exported together with it
+        self.root = root or self
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id)
+
+    @property
+    def duration_ns(self) -> int:
+        return (self.end_ns or time.time_ns()) - self.start_ns
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = end_ns or time.time_ns()
+            self._tracer.collector.record(self)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # 64-bit integers are strings in OTLP/JSON
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_json(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """Spans as an OTLP/JSON ``ExportTraceServiceRequest``."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {
+                            "key": "service.name",
+                            "value": {"stringValue": service_name},
+                        }
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [
+                            {
+                                "traceId": span.trace_id,
+                                "spanId": span.span_id,
+                                "parentSpanId": span.parent_span_id or "",
+                                "name": span.name,
+                                "kind": span.kind,
+                                "startTimeUnixNano": str(span.start_ns),
+                                "endTimeUnixNano": str(span.end_ns),
+                                "attributes": [
+                                    {"key": key, "value": _otlp_value(value)}
+                                    for key, value in span.attributes.items()
+                                ],
+                                "status": {
+                                    "code": span.status,
+                                    **(
+                                        {"message": span.status_message}
+                                        if span.status_message
+                                        else {}
+                                    ),
+                                },
+                            }
+                            for span in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class SpanCollector:
+    """Finished spans: the most recent in memory, all of them on file."""
+
+    def __init__(
+        self, size: int, export_path: Optional[str], service_name: str
+    ) -> None:
+        self.export_path = export_path
+        self.service_name = service_name
+        self._spans: deque = deque(maxlen=size)
+        # Finished spans waiting for their root span to be exported with
+        self._pending: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+            if self.export_path is None:
+                return
+            if span.root is not span and span.root.end_ns is None:
+                self._pending.setdefault(span.root.span_id, []).append(span)
+                return
+            batch = self._pending.pop(span.span_id, [])
+            batch.append(span)
+            line = json.dumps(otlp_json(batch, self.service_name))
+            with open(self.export_path, "a") as f:
+                f.write(line + "\n")
+
+    def trace(self, trace_id: str) -> List[Span]:
+        """The spans of a trace still in memory, in start order."""
+        with self._lock:
+            spans = [span for span in self._spans if span.trace_id == trace_id]
+        return sorted(spans, key=lambda span: span.start_ns)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._pending.clear()
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.enabled = settings.TRACING_ENABLED
+        self.collector = SpanCollector(
+            settings.TRACING_BUFFER_SIZE,
+            settings.TRACING_EXPORT_PATH,
+            settings.TRACING_SERVICE_NAME,
+        )
+        self._current: ContextVar[Optional[Span]] = ContextVar(
+            "current_span", default=None
+        )
+
+    def current(self) -> Optional[Span]:
+        return self._current.get()
+
+    def current_context(self) -> Optional[SpanContext]:
+        span = self._current.get()
+        return span.context if span is not None else None
+
+    def start_span(
+        self,
+        name: str,
+        *,
+        parent: Optional[SpanContext] = None,
+        kind: int = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        start_ns: Optional[int] = None,
+    ) -> Optional[Span]:
+        """
+        A span under ``parent``, or under the current span when no parent
+        is given; starts a new trace when there is neither. Returns None
+        when tracing is disabled.
+        """
+        if not self.enabled:
+            return None
+        current = self._current.get()
+        if parent is None and current is not None:
+            parent = current.context
+            root = current.root
+        else:
+            root = None
+        return Span(
+            self,
+            name,
+            parent.trace_id if parent else f"{random.getrandbits(128):032x}",
+            parent.span_id if parent else None,
+            kind,
+            start_ns or time.time_ns(),
+            dict(attributes or {}),
+            root,
+        )
+
+    @contextlib.contextmanager
+    def use(self, span: Optional[Span]) -> Iterator[Optional[Span]]:
+        """Make ``span`` the current span, without ending it."""
+        token = self._current.set(span)
+        try:
+            yield span
+        finally:
+            self._current.reset(token)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **kwargs: Any) -> Iterator[Optional[Span]]:
+        """A span around the block, current within it; None if disabled."""
+        span = self.start_span(name, **kwargs)
+        if span is None:
+            yield None
+            return
+        with self.use(span):
+            try:
+                yield span
+            except BaseException as e:
+                span.set_error(f"{type(e).__name__}: {e}")
+                raise
+            finally:
+                span.end()
+
+
+tracer = Tracer()
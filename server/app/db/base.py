@@ -4,5 +4,18 @@ from app.db.base_class import Base
 # Import all models here
 from app.models.user import User
 from app.models.problem import Problem
+from app.models.problem_version import ProblemVersion
 from app.models.submission import Submission
 from app.models.company import Company
+from app.models.tag import Tag
+from app.models.facet import ProblemFacetCount, TagFacetCount
+from app.models.progress import UserProgress, UserProblemProgress
+from app.models.leaderboard import LeaderboardSnapshot
+from app.models.activity import ActivityEvent
+from app.models.heatmap import UserActivityStreak, UserActivityYear
+from app.models.contest import (
+    Contest,
+    ContestJudgeJob,
+    ContestResult,
+    ContestScoreboardSnapshot,
+)
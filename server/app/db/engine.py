@@ -0,0 +1,261 @@
+"""
+Engine profiles.
+
+``create_db_engine`` / ``create_async_db_engine`` build engines configured
+from ``Settings`` for the database behind the URL:
+
+* Postgres: sized pool with overflow, pre-ping, recycle, and a server-side
+  ``statement_timeout``.
+* SQLite: WAL journal, ``synchronous=NORMAL``, ``mmap_size`` and
+  ``busy_timeout`` pragmas on every new connection, and a statement
+  timeout enforced through the SQLite progress handler.
+
+Every engine records pool checkout wait time separately from statement
+execution time (``engine_timings``), so pool starvation under load can be
+told apart from slow queries, and feeds the slow query log and request
+tracing when they are enabled (``app.db.slow_queries``,
+``app.db.tracing``).
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+from app.db import tracing as sql_tracing
+from app.db.slow_queries import slow_query_log
+
+# Where a statement's start time is kept on the connection record
+_STARTED_KEY = "statement_started"
+
+
+class EngineTimings:
+    """Pool checkout waits and statement times of one engine."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_wait_total = 0.0
+            self.checkout_wait_max = 0.0
+            self.checkout_timeouts = 0
+            self.statements = 0
+            self.statement_time_total = 0.0
+            self.statement_time_max = 0.0
+
+    def record_checkout(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_total += seconds
+            self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+
+    def record_checkout_timeout(self) -> None:
+        with self._lock:
+            self.checkout_timeouts += 1
+
+    def record_statement(self, seconds: float) -> None:
+        with self._lock:
+            self.statements += 1
+            self.statement_time_total += seconds
+            self.statement_time_max = max(self.statement_time_max, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_wait_avg_ms": _avg_ms(
+                    self.checkout_wait_total, self.checkouts
+                ),
+                "checkout_wait_max_ms": round(
+                    self.checkout_wait_max * 1000, 3
+                ),
+                "checkout_timeouts": self.checkout_timeouts,
+                "statements": self.statements,
+                "statement_time_avg_ms": _avg_ms(
+                    self.statement_time_total, self.statements
+                ),
+                "statement_time_max_ms": round(
+                    self.statement_time_max * 1000, 3
+                ),
+            }
+
+
+def _avg_ms(total: float, count: int) -> float:
+    return round(total / count * 1000, 3) if count else 0.0
+
+
+class _TimedPoolMixin:
+    """Times how long callers wait to check a connection out."""
+
+    timings: EngineTimings
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.timings.record_checkout_timeout()
+            raise
+        self.timings.record_checkout(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.timings = self.timings
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_timings(engine: Engine) -> Optional[EngineTimings]:
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+    return getattr(engine.pool, "timings", None)
+
+
+def engine_stats(engine: Engine) -> Dict[str, Any]:
+    """Pool occupancy and timings, for the admin and metrics endpoints."""
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+    pool = engine.pool
+    stats: Dict[str, Any] = {"dialect": engine.dialect.name}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            pool_size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    timings = engine_timings(engine)
+    if timings is not None:
+        stats.update(timings.snapshot())
+    return stats
+
+
+def _is_memory_sqlite(url) -> bool:
+    memory = url.database in (None, "", ":memory:")
+    return url.get_backend_name() == "sqlite" and memory
+
+
+def _engine_options(url, *, is_async: bool) -> Dict[str, Any]:
+    backend = url.get_backend_name()
+    options: Dict[str, Any] = {}
+    connect_args: Dict[str, Any] = {}
+
+    if not _is_memory_sqlite(url):
+        options.update(
+            poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+
+    if backend == "sqlite":
+        # Sessions are handed between threadpool workers
+        connect_args["check_same_thread"] = False
+    else:
+        options.update(
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+        timeout = settings.DB_STATEMENT_TIMEOUT_MS
+        if backend == "postgresql" and timeout:
+            if url.get_driver_name() == "asyncpg":
+                connect_args["server_settings"] = {
+                    "statement_timeout": str(timeout)
+                }
+            else:
+                connect_args["options"] = f"-c statement_timeout={timeout}"
+
+    options["connect_args"] = connect_args
+    return options
+
+
+def _sqlite_pragmas() -> Dict[str, Any]:
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+    }
+
+
+def _configure(engine: Engine, url) -> None:
+    if isinstance(engine.pool, _TimedPoolMixin):
+        engine.pool.timings = EngineTimings()
+    timings = engine_timings(engine)
+
+    if url.get_backend_name() == "sqlite":
+        pragmas = _sqlite_pragmas()
+        timeout = settings.DB_STATEMENT_TIMEOUT_MS / 1000
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record) -> None:
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                if value is not None:
+                    cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+            # aiosqlite's adapter has no progress handler
+            if timeout and hasattr(dbapi_connection, "set_progress_handler"):
+                info = connection_record.info
+
+                def _interrupt() -> int:
+                    started = info.get(_STARTED_KEY)
+                    return int(
+                        started is not None
+                        and time.perf_counter() - started > timeout
+                    )
+
+                dbapi_connection.set_progress_handler(_interrupt, 10000)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info[_STARTED_KEY] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop(_STARTED_KEY, None)
+        if started is not None and timings is not None:
+            timings.record_statement(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context) -> None:
+        if context.connection is not None:
+            context.connection.info.pop(_STARTED_KEY, None)
+
+    if settings.SLOW_QUERY_LOG_ENABLED:
+        slow_query_log.install(engine)
+    if settings.TRACING_ENABLED:
+        sql_tracing.install(engine)
+
+
+def create_db_engine(url: str, **overrides: Any) -> Engine:
+    url = make_url(url)
+    options = _engine_options(url, is_async=False)
+    options.update(overrides)
+    engine = create_engine(url, **options)
+    _configure(engine, url)
+    return engine
+
+
+def create_async_db_engine(url: str, **overrides: Any) -> AsyncEngine:
+    url = make_url(url)
+    options = _engine_options(url, is_async=True)
+    options.update(overrides)
+    engine = create_async_engine(url, **options)
+    _configure(engine.sync_engine, url)
+    return engine
@@ -0,0 +1,117 @@
+"""
+Per-request SQL statement counts and timings.
+
+Cursor-execute hooks on every ``Engine`` add each statement to the
+``QueryStats`` of the current context: ``track_queries`` scopes one to a
+request (see ``app.middleware.query_stats``), ``count_queries`` to a block
+of code on given engines (the pytest ``query_budget`` fixture). Statements
+are kept by text, so a query issued once per row of a result, the N+1
+pattern, shows up as one statement with a large count.
+"""
+
+import contextlib
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Where a statement's start time is kept on the connection
+_STARTED_KEY = "query_stats_started"
+
+
+class QueryStats:
+    """Statements issued within one request or block."""
+
+    __slots__ = ("count", "time", "statements")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.time = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.time += seconds
+        self.statements[statement] += 1
+
+    @property
+    def time_ms(self) -> float:
+        return round(self.time * 1000, 3)
+
+    def repeated(self, threshold: int = 2) -> List[Tuple[str, int]]:
+        """Statements issued at least ``threshold`` times, most first."""
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+    def report(self, limit: int = 10) -> str:
+        lines = [f"{self.count} statements in {self.time_ms} ms:"]
+        for statement, count in self.statements.most_common(limit):
+            lines.append(f"  {count:>4} x {' '.join(statement.split())}")
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextlib.contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the statements issued in this context (and its tasks)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info[_STARTED_KEY] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop(_STARTED_KEY, None)
+    stats = _current.get()
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+@contextlib.contextmanager
+def count_queries(*engines: Engine) -> Iterator[QueryStats]:
+    """
+    Collect every statement run on ``engines`` within the block, from
+    any thread (e.g. requests served by a test client).
+    """
+    stats = QueryStats()
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["count_queries_started"] = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("count_queries_started", None)
+        if started is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before)
+        event.listen(engine, "after_cursor_execute", after)
+    try:
+        yield stats
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", before)
+            event.remove(engine, "after_cursor_execute", after)
@@ -0,0 +1,237 @@
+"""
+Read/write routing between the primary database and read replicas.
+
+GET and HEAD requests get a session on one of the replicas listed in
+``DATABASE_REPLICA_URLS``, picked round-robin among the healthy ones;
+every other request gets the primary. A replica that fails to hand out a
+connection is taken out of rotation for ``DB_REPLICA_RETRY_INTERVAL``
+seconds and the read moves on to the next replica, or to the primary when
+none is left.
+
+Replicas lag behind the primary, so once a user's request commits a write
+their reads stay on the primary for ``DB_READ_YOUR_WRITES_WINDOW``
+seconds. The window is tracked per process.
+"""
+
+import itertools
+import threading
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+)
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.requests import Request
+
+from app.core.config import settings
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+
+# Session.info keys
+_PRIMARY_KEY = "primary_bind"
+_REPLICA_KEY = "replica"
+_WROTE_KEY = "wrote"
+_ON_WRITE_KEY = "on_write"
+
+
+@event.listens_for(Session, "after_flush")
+def _flag_flush(session: Session, flush_context: Any) -> None:
+    session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_statement(state: Any) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    if session.info.pop(_WROTE_KEY, False):
+        on_write = session.info.get(_ON_WRITE_KEY)
+        if on_write is not None:
+            on_write()
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_WROTE_KEY, None)
+
+
+def primary_bind(db: Session) -> Engine:
+    """
+    The primary engine behind a session, for services that keep writing
+    in the background after the request is gone.
+    """
+    bind = db.info.get(_PRIMARY_KEY)
+    return bind if bind is not None else db.get_bind()
+
+
+def request_user_key(request: Request) -> Optional[str]:
+    """The bearer token's subject, or None if absent or invalid."""
+    # Imported here so judge workers and scripts don't load jose
+    from jose import JWTError, jwt
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    token = token.strip()
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+    except JWTError:
+        return None
+    subject = payload.get("sub")
+    return str(subject) if subject is not None else None
+
+
+class Replica:
+    """A read replica: sync and async engines plus health state."""
+
+    def __init__(
+        self, name: str, engine: Engine, async_engine: AsyncEngine
+    ) -> None:
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.session = sessionmaker(autoflush=False, bind=engine)
+        self.async_session = async_sessionmaker(
+            async_engine, autoflush=False, expire_on_commit=False
+        )
+        self.down_until = 0.0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+
+class DatabaseRouter:
+    def __init__(
+        self,
+        primary: sessionmaker,
+        async_primary: async_sessionmaker,
+        replicas: Sequence[Replica] = (),
+        *,
+        window: Optional[float] = None,
+        retry_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.primary = primary
+        self.async_primary = async_primary
+        self.replicas = list(replicas)
+        self.window = (
+            window
+            if window is not None
+            else settings.DB_READ_YOUR_WRITES_WINDOW
+        )
+        self.retry_interval = (
+            retry_interval
+            if retry_interval is not None
+            else settings.DB_REPLICA_RETRY_INTERVAL
+        )
+        self.clock = clock
+        self._turn = itertools.count()
+        self._writes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record_write(self, user_key: str) -> None:
+        """Pin a user's reads to the primary for the next window."""
+        now = self.clock()
+        with self._lock:
+            self._writes[user_key] = now + self.window
+            if len(self._writes) > 1024:
+                self._writes = {
+                    key: until
+                    for key, until in self._writes.items()
+                    if until > now
+                }
+
+    def wrote_recently(self, user_key: Optional[str]) -> bool:
+        if user_key is None:
+            return False
+        with self._lock:
+            until = self._writes.get(user_key)
+        return until is not None and until > self.clock()
+
+    def read_candidates(self, user_key: Optional[str]) -> List[Replica]:
+        """Healthy replicas in round-robin order (empty: use the primary)."""
+        if not self.replicas or self.wrote_recently(user_key):
+            return []
+        now = self.clock()
+        healthy = [r for r in self.replicas if r.down_until <= now]
+        if not healthy:
+            return []
+        start = next(self._turn) % len(healthy)
+        return healthy[start:] + healthy[:start]
+
+    def mark_down(self, replica: Replica, error: Exception) -> None:
+        with self._lock:
+            replica.down_until = self.clock() + self.retry_interval
+            replica.failures += 1
+            replica.last_error = str(error).splitlines()[0]
+
+    def open_session(
+        self, *, read: bool, user_key: Optional[str] = None
+    ) -> Session:
+        if read:
+            for replica in self.read_candidates(user_key):
+                db = replica.session()
+                try:
+                    db.connection()
+                except SQLAlchemyError as error:
+                    db.close()
+                    self.mark_down(replica, error)
+                    continue
+                self._mark_replica(db, replica)
+                return db
+        db = self.primary()
+        self._mark_primary(db, user_key)
+        return db
+
+    async def open_async_session(
+        self, *, read: bool, user_key: Optional[str] = None
+    ) -> AsyncSession:
+        if read:
+            for replica in self.read_candidates(user_key):
+                db = replica.async_session()
+                try:
+                    await db.connection()
+                except SQLAlchemyError as error:
+                    await db.close()
+                    self.mark_down(replica, error)
+                    continue
+                self._mark_replica(db, replica)
+                return db
+        db = self.async_primary()
+        self._mark_primary(db, user_key)
+        return db
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = self.clock()
+        with self._lock:
+            return [
+                {
+                    "name": replica.name,
+                    "healthy": replica.down_until <= now,
+                    "failures": replica.failures,
+                    "last_error": replica.last_error,
+                }
+                for replica in self.replicas
+            ]
+
+    def _mark_replica(self, db: Any, replica: Replica) -> None:
+        db.info[_REPLICA_KEY] = replica.name
+        db.info[_PRIMARY_KEY] = self._primary_engine()
+
+    def _mark_primary(self, db: Any, user_key: Optional[str]) -> None:
+        if self.replicas and user_key is not None:
+            db.info[_ON_WRITE_KEY] = partial(self.record_write, user_key)
+
+    def _primary_engine(self) -> Optional[Engine]:
+        return self.primary.kw.get("bind")
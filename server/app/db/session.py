@@ -1,20 +1,81 @@
-from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-from app.core.config import settings
+# FastAPI's Request; importing it from fastapi would load the whole
+# framework into judge workers and scripts that only need SessionLocal
+from starlette.requests import Request
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False},  # Only needed for SQLite
+from app.core.config import settings
+from app.db.engine import create_async_db_engine, create_db_engine
+from app.db.routing import (
+    READ_METHODS,
+    DatabaseRouter,
+    Replica,
+    request_user_key,
 )
+
+engine = create_db_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for the sync URLs in DATABASE_URL
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    """The async-driver equivalent of a database URL."""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver for {url.get_backend_name()}")
+    return url.set(
+        drivername=f"{url.get_backend_name()}+{driver}"
+    ).render_as_string(hide_password=False)
+
+
+async_engine = create_async_db_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+)
+# Objects stay usable after commit; async code cannot lazy-load them
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
+# GET requests read from the replicas; see app/db/routing.py
+db_router = DatabaseRouter(
+    SessionLocal,
+    AsyncSessionLocal,
+    [
+        Replica(
+            f"replica-{index}",
+            create_db_engine(url),
+            create_async_db_engine(async_database_url(url)),
+        )
+        for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+    ],
+)
+
 
 # Dependency for FastAPI endpoints
-def get_db():
-    db = SessionLocal()
+def get_db(request: Request):
+    db = db_router.open_session(
+        read=request.method in READ_METHODS,
+        user_key=request_user_key(request),
+    )
     try:
         yield db
     finally:
         db.close()
+
+
+# Dependency for async endpoints
+async def get_async_db(request: Request):
+    db = await db_router.open_async_session(
+        read=request.method in READ_METHODS,
+        user_key=request_user_key(request),
+    )
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -0,0 +1,314 @@
+"""
+Slow query log.
+
+With ``SLOW_QUERY_LOG_ENABLED`` set, every engine built by
+``app.db.engine`` times its statements and passes those that take at
+least ``SLOW_QUERY_THRESHOLD_MS`` to ``slow_query_log``, which
+
+* normalizes the SQL (literals, placeholders and ``IN`` lists become
+  ``?``) and aggregates occurrences by fingerprint, a hash of the
+  normalized text: count, total and maximum time, latency percentiles and
+  the endpoints that issued it;
+* keeps the last ``SLOW_QUERY_SAMPLES`` occurrences of each, with their
+  parameters (only their types when ``SLOW_QUERY_REDACT_PARAMETERS``), the
+  endpoint and the application code that issued them;
+* runs ``EXPLAIN`` (``EXPLAIN QUERY PLAN`` on SQLite) for the statement
+  right away, on the same connection, so the plan reflects the data and
+  indexes of that moment; at most once per fingerprint every
+  ``SLOW_QUERY_EXPLAIN_INTERVAL`` seconds.
+
+The log is served to admins at ``/system/slow-queries``. A full table scan
+in a plan (``SCAN submission``) usually means a missing index.
+"""
+
+import contextlib
+import hashlib
+import math
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from types import FrameType
+from typing import Any, Dict, Iterator, List, Optional
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.middleware.metrics import route_template
+
+# Where a statement's start time is kept on the connection
+_STARTED_KEY = "slow_query_started"
+# Durations kept per fingerprint for percentiles
+_DURATIONS = 1000
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+# DBAPI placeholders: qmark, format, pyformat and numeric ($1, asyncpg)
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_REPEATED_LISTS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+
+# The request being served, so statements can be traced to an endpoint
+_request: ContextVar[Optional[Scope]] = ContextVar(
+    "slow_query_request", default=None
+)
+
+
+@contextlib.contextmanager
+def request_context(scope: Scope) -> Iterator[None]:
+    token = _request.set(scope)
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+def normalize(statement: str) -> str:
+    """The statement with literals and parameter lists replaced by ``?``."""
+    statement = " ".join(statement.split())
+    statement = _STRINGS.sub("?", statement)
+    statement = _PLACEHOLDERS.sub("?", statement)
+    statement = _NUMBERS.sub("?", statement)
+    statement = _LISTS.sub("(?)", statement)
+    return _REPEATED_LISTS.sub("(?)", statement)
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def _endpoint() -> Optional[str]:
+    scope = _request.get()
+    if scope is None:
+        return None
+    return f"{scope['method']} {route_template(scope)}"
+
+
+def _frames() -> Iterator[FrameType]:
+    """The calling frames, through the greenlets of ``AsyncSession`` calls."""
+    frame: Optional[FrameType] = sys._getframe(1)
+    current = greenlet.getcurrent()
+    while True:
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+        # Async sessions run statements in a child greenlet; the awaiting
+        # coroutines are on the stack of its parent
+        current = current.parent
+        if current is None:
+            return
+        frame = current.gr_frame
+
+
+def _caller() -> Optional[str]:
+    """The innermost application frame outside the database layer."""
+    for frame in _frames():
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.") and not module.startswith(
+            ("app.db.", "app.middleware.")
+        ):
+            # co_qualname is new in Python 3.11
+            code = frame.f_code
+            name = getattr(code, "co_qualname", code.co_name)
+            return f"{module}:{name}:{frame.f_lineno}"
+    return None
+
+
+def _redacted(parameters: Any, redact: bool) -> Any:
+    def show(value: Any) -> str:
+        if redact:
+            return f"<{type(value).__name__}>"
+        text = repr(value)
+        return text if len(text) <= 200 else text[:200] + "..."
+
+    if isinstance(parameters, dict):
+        return {name: show(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [show(value) for value in parameters]
+    return None
+
+
+def explain(conn, statement: str, parameters: Any) -> str:
+    """The plan of ``statement``, run on the DBAPI connection of ``conn``."""
+    sqlite = conn.dialect.name == "sqlite"
+    prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+    cursor = conn.connection.cursor()
+    try:
+        # A failed EXPLAIN must not abort the request's transaction
+        if not sqlite:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception as e:
+            if not sqlite:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return f"EXPLAIN failed: {e}"
+        if not sqlite:
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        cursor.close()
+
+    if not sqlite:
+        return "\n".join(str(row[0]) for row in rows)
+    # (id, parent, notused, detail) rows of a tree
+    depths = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depths[node] = depths.get(parent, -1) + 1
+        lines.append("  " * depths[node] + detail)
+    return "\n".join(lines)
+
+
+class SlowQuery:
+    """The occurrences of one statement fingerprint."""
+
+    def __init__(self, fingerprint: str, statement: str, samples: int):
+        self.fingerprint = fingerprint
+        self.statement = statement
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.durations: deque = deque(maxlen=_DURATIONS)
+        self.endpoints: Counter = Counter()
+        self.samples: deque = deque(maxlen=samples)
+        self.first_seen = datetime.now(timezone.utc)
+        self.last_seen = self.first_seen
+        self.plan: Optional[str] = None
+        self.planned_at: Optional[float] = None
+
+    def summary(self) -> Dict[str, Any]:
+        durations = sorted(self.durations)
+        return {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000,
+            "p50_ms": _percentile(durations, 0.50) * 1000,
+            "p95_ms": _percentile(durations, 0.95) * 1000,
+            "p99_ms": _percentile(durations, 0.99) * 1000,
+            "max_ms": self.max * 1000,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "endpoints": dict(self.endpoints),
+            "plan": self.plan,
+            "samples": list(reversed(self.samples)),
+        }
+
+
+class SlowQueryLog:
+    def __init__(self) -> None:
+        self.threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+        self.redact = settings.SLOW_QUERY_REDACT_PARAMETERS
+        self.explain_interval = settings.SLOW_QUERY_EXPLAIN_INTERVAL
+        self.max_fingerprints = settings.SLOW_QUERY_MAX_FINGERPRINTS
+        self.samples = settings.SLOW_QUERY_SAMPLES
+        # Least recently seen first, evicted when full
+        self._queries: "OrderedDict[str, SlowQuery]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._on_error)
+
+    def uninstall(self, engine: Engine) -> None:
+        event.remove(engine, "before_cursor_execute", self._before)
+        event.remove(engine, "after_cursor_execute", self._after)
+        event.remove(engine, "handle_error", self._on_error)
+
+    def _before(self, conn, cursor, statement, parameters, context, many):
+        conn.info[_STARTED_KEY] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, many):
+        started = conn.info.pop(_STARTED_KEY, None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        if seconds * 1000 >= self.threshold_ms:
+            self.record(conn, statement, parameters, seconds, many)
+
+    def _on_error(self, context) -> None:
+        if context.connection is not None:
+            context.connection.info.pop(_STARTED_KEY, None)
+
+    def record(
+        self,
+        conn,
+        statement: str,
+        parameters: Any,
+        seconds: float,
+        executemany: bool = False,
+    ) -> None:
+        normalized = normalize(statement)
+        key = fingerprint(normalized)
+        endpoint = _endpoint()
+        now = time.monotonic()
+        with self._lock:
+            query = self._queries.get(key)
+            if query is None:
+                query = self._queries[key] = SlowQuery(
+                    key, normalized, self.samples
+                )
+                if len(self._queries) > self.max_fingerprints:
+                    self._queries.popitem(last=False)
+            self._queries.move_to_end(key)
+            query.count += 1
+            query.total += seconds
+            query.max = max(query.max, seconds)
+            query.durations.append(seconds)
+            query.last_seen = seen = datetime.now(timezone.utc)
+            if endpoint is not None:
+                query.endpoints[endpoint] += 1
+            # Claimed under the lock so concurrent occurrences explain once
+            wants_plan = (
+                not executemany
+                and statement.lstrip()[:6].upper().startswith(_EXPLAINABLE)
+                and (
+                    query.planned_at is None
+                    or now - query.planned_at >= self.explain_interval
+                )
+            )
+            if wants_plan:
+                query.planned_at = now
+
+        plan = explain(conn, statement, parameters) if wants_plan else None
+        sample = {
+            "at": seen,
+            "duration_ms": seconds * 1000,
+            "endpoint": endpoint,
+            "caller": _caller(),
+            "parameters": _redacted(
+                parameters[0] if executemany else parameters, self.redact
+            ),
+            "plan": plan,
+        }
+        with self._lock:
+            if plan is not None:
+                query.plan = plan
+            query.samples.append(sample)
+
+    def queries(self) -> List[Dict[str, Any]]:
+        """Summaries of every fingerprint, most total time first."""
+        with self._lock:
+            summaries = [query.summary() for query in self._queries.values()]
+        return sorted(summaries, key=lambda q: q["total_ms"], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._queries.clear()
+
+
+slow_query_log = SlowQueryLog()
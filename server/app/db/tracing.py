@@ -0,0 +1,61 @@
+"""
+SQL statement spans for request tracing (see ``app/core/tracing.py``).
+
+Installed on every engine built by ``app.db.engine`` when
+``TRACING_ENABLED`` is set. A statement executed while a span is current
+(a request, a judge stage) becomes a client span under it, named after the
+operation and carrying the normalized statement, so literals and
+parameters never reach the trace; statements outside any trace are not
+recorded.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.tracing import KIND_CLIENT, tracer
+from app.db.slow_queries import normalize
+
+# Where a statement's span is kept on the connection
+_SPAN_KEY = "trace_span"
+
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if tracer.current() is None:
+        return
+    normalized = normalize(statement)
+    conn.info[_SPAN_KEY] = tracer.start_span(
+        normalized.split(" ", 1)[0].upper(),
+        kind=KIND_CLIENT,
+        attributes={
+            "db.system": conn.dialect.name,
+            "db.statement": normalized,
+        },
+    )
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    span = conn.info.pop(_SPAN_KEY, None)
+    if span is not None:
+        span.end()
+
+
+def _on_error(context) -> None:
+    if context.connection is None:
+        return
+    span = context.connection.info.pop(_SPAN_KEY, None)
+    if span is not None:
+        error = context.original_exception
+        span.set_error(f"{type(error).__name__}: {error}")
+        span.end()
+
+
+def install(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+    event.listen(engine, "handle_error", _on_error)
+
+
+def uninstall(engine: Engine) -> None:
+    event.remove(engine, "before_cursor_execute", _before)
+    event.remove(engine, "after_cursor_execute", _after)
+    event.remove(engine, "handle_error", _on_error)
@@ -0,0 +1,41 @@
+"""
+Race-free creation of aggregate rows.
+
+Services that keep one counter row per key (``user_progress``,
+``user_activity_year``, ...) look the row up and create it when it is
+missing. Two transactions can both miss and then both insert, and the
+loser would fail on the primary key. ``insert_missing`` inserts with
+``ON CONFLICT DO NOTHING`` where the database supports it (a savepoint
+that swallows the ``IntegrityError`` elsewhere), so the caller can lock
+and update the row either way. A row lock cannot protect a row that does
+not exist yet, so ``SELECT ... FOR UPDATE`` alone does not close the race.
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import Table, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.routing import primary_bind
+
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def insert_missing(db: Session, table: Table, values: Dict[str, Any]) -> None:
+    """Insert a row unless one with the same primary key exists."""
+    dialect_insert = _UPSERT_INSERTS.get(primary_bind(db).dialect.name)
+    if dialect_insert is not None:
+        db.execute(
+            dialect_insert(table).values(values).on_conflict_do_nothing()
+        )
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(table).values(values))
+    except IntegrityError:
+        pass
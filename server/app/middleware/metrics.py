@@ -0,0 +1,62 @@
+"""
+Records request counts, latencies and in-flight requests per route.
+
+Requests are labelled with the matched route's path template (e.g.
+``/api/v1/problems/{problem_id}``), which routing leaves in the ASGI
+scope, so label cardinality is bounded by the number of routes; requests
+that match no route share the ``unmatched`` label.
+"""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_FLIGHT,
+)
+
+UNMATCHED = "unmatched"
+
+
+def route_template(scope: Scope) -> str:
+    # Routes of included routers carry only their own path; FastAPI keeps
+    # the prefixed one on the route context it matched
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    for route in (context, scope.get("route")):
+        template = getattr(route, "path_format", None)
+        if template:
+            return template
+    return UNMATCHED
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = route_template(scope)
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, method, route
+            )
+            HTTP_REQUESTS.inc(method, route, str(status))
@@ -0,0 +1,80 @@
+"""
+Profiles a sample of requests (``PROFILING_ENABLED`` only).
+
+A request is profiled when it sends ``X-Profile: <PROFILING_TOKEN>`` or is
+picked at ``PROFILING_SAMPLE_RATE``, and no other request is being
+profiled. Its stacks are sampled for as long as it runs (see
+``app.core.profiling``) and stored with its route, status and duration;
+the response carries the profile's id in ``X-Profile-Id``. When profiling
+is disabled the middleware is not installed at all.
+"""
+
+import random
+import secrets
+import threading
+import time
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.profiling import Profile, ProfileStore, Sampler, profile_store
+from app.middleware.metrics import route_template
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        sample_rate: float = 0.0,
+        token: Optional[str] = None,
+        interval: float = 0.005,
+        store: ProfileStore = profile_store,
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.token = token
+        self.interval = interval
+        self.store = store
+        # One profile at a time keeps the sampling overhead bounded
+        self._busy = threading.Lock()
+
+    def _wanted(self, scope: Scope) -> bool:
+        requested = Headers(scope=scope).get("x-profile")
+        if requested is not None and self.token:
+            return secrets.compare_digest(requested, self.token)
+        return random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or not self._wanted(scope)
+            or not self._busy.acquire(blocking=False)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(self.store.next_id(), scope["method"], scope["path"])
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Profile-Id"] = str(profile.id)
+            await send(message)
+
+        sampler = Sampler(self.interval, threading.get_ident())
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            self._busy.release()
+            profile.duration_ms = (time.perf_counter() - started) * 1000
+            profile.interval_ms = self.interval * 1000
+            profile.route = route_template(scope)
+            profile.samples = sampler.samples
+            profile.stacks = sampler.stacks
+            self.store.add(profile)
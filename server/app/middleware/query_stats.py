@@ -0,0 +1,54 @@
+"""
+Reports the SQL statements each request issued (debug mode only).
+
+Adds ``X-Query-Count`` and ``X-Query-Time-Ms`` response headers, plus a
+``db`` entry in ``Server-Timing`` for browser dev tools, and logs a
+warning when one statement repeats ``QUERY_REPEAT_WARNING`` times or more
+in a request, which is usually an N+1 loop.
+"""
+
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.query_stats import track_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp, *, repeat_warning: int = 0) -> None:
+        self.app = app
+        self.repeat_warning = repeat_warning
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Query-Count"] = str(stats.count)
+                    headers["X-Query-Time-Ms"] = f"{stats.time_ms:.3f}"
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.time_ms:.3f};desc="{stats.count} '
+                        f'queries"',
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+        if self.repeat_warning:
+            for statement, count in stats.repeated(self.repeat_warning):
+                logger.warning(
+                    "%s %s issued the same statement %d times: %s",
+                    scope["method"],
+                    scope["path"],
+                    count,
+                    " ".join(statement.split())[:200],
+                )
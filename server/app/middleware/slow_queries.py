@@ -0,0 +1,22 @@
+"""
+Names the endpoint behind each statement in the slow query log
+(``SLOW_QUERY_LOG_ENABLED`` only).
+"""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.db.slow_queries import request_context
+
+
+class SlowQueryContextMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # The route is resolved later; the log reads it from the scope
+        with request_context(scope):
+            await self.app(scope, receive, send)
@@ -0,0 +1,73 @@
+"""
+Opens a server span per request (``TRACING_ENABLED`` only).
+
+The span continues the caller's trace when the request carries a W3C
+``traceparent`` header and is current while the request is handled, so
+SQL statements and new submissions (see ``app.core.tracing``) land in the
+same trace. It ends when the response has been sent: background tasks
+that run afterwards, like the judge, get spans of their own. The
+response carries the trace id in ``X-Trace-Id``.
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.tracing import KIND_SERVER, Tracer, parse_traceparent, tracer
+from app.middleware.metrics import route_template
+
+
+class TracingMiddleware:
+    def __init__(self, app: ASGIApp, *, tracer: Tracer = tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        span = self.tracer.start_span(
+            method,
+            parent=parse_traceparent(Headers(scope=scope).get("traceparent")),
+            kind=KIND_SERVER,
+            attributes={
+                "http.request.method": method,
+                "url.path": scope["path"],
+            },
+        )
+        if span is None:
+            await self.app(scope, receive, send)
+            return
+
+        def finish() -> None:
+            if span.end_ns is not None:
+                return
+            # Routing has run by now; name the span after the template
+            route = route_template(scope)
+            span.name = f"{method} {route}"
+            span.set_attribute("http.route", route)
+            span.end()
+
+        async def send_with_trace(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                span.set_attribute("http.response.status_code", status)
+                if status >= 500:
+                    span.set_error(f"HTTP {status}")
+                headers = MutableHeaders(scope=message)
+                headers["X-Trace-Id"] = span.trace_id
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                finish()
+
+        with self.tracer.use(span):
+            try:
+                await self.app(scope, receive, send_with_trace)
+            except BaseException as e:
+                span.set_error(f"{type(e).__name__}: {e}")
+                raise
+            finally:
+                finish()
@@ -0,0 +1,31 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    ForeignKey,
+    JSON,
+)
+
+from app.db.base_class import Base
+
+
+class ActivityEvent(Base):
+    """
+    A user activity event (page view, editor event, ...). Rows are written
+    in batches by the activity flusher, never inside a request.
+    """
+
+    __tablename__ = "activity_event"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(
+        Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False
+    )
+    event_type = Column(String(32), nullable=False)
+    problem_id = Column(
+        Integer, ForeignKey("problem.id", ondelete="SET NULL"), nullable=True
+    )
+    payload = Column(JSON, nullable=True)
+    # Time the event was received
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,124 @@
+from typing import List
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    Table,
+)
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+# Problems of a contest, in the order they are presented
+contest_problem = Table(
+    "contest_problem",
+    Base.metadata,
+    Column(
+        "contest_id",
+        Integer,
+        ForeignKey("contest.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "problem_id",
+        Integer,
+        ForeignKey("problem.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("position", Integer, nullable=False),
+)
+
+
+class Contest(Base):
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String(255), nullable=False)
+
+    starts_at = Column(DateTime(timezone=True), nullable=False)
+    ends_at = Column(DateTime(timezone=True), nullable=False)
+    # From here until the end the scoreboard shows only earlier solves
+    freeze_at = Column(DateTime(timezone=True), nullable=True)
+
+    problems = relationship(
+        "Problem",
+        secondary=contest_problem,
+        lazy="selectin",
+        order_by=contest_problem.c.position,
+        # Positions are written with the contest_problem rows themselves
+        viewonly=True,
+    )
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    @property
+    def problem_ids(self) -> List[int]:
+        return [problem.id for problem in self.problems]
+
+
+class ContestResult(Base):
+    """
+    Per-contest, per-user, per-problem outcome, maintained by the judge
+    whenever it records a verdict for a contest submission. Scoreboards
+    are computed from these rows, never from submissions.
+    """
+
+    __tablename__ = "contest_result"
+
+    contest_id = Column(
+        Integer, ForeignKey("contest.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id = Column(
+        Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    problem_id = Column(
+        Integer,
+        ForeignKey("problem.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # Rejected verdicts before the first accepted one
+    failed_attempts = Column(Integer, nullable=False, default=0)
+    # Submission time of the first accepted submission
+    solved_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class ContestScoreboardSnapshot(Base):
+    """Materialized contest standings, served as the scoreboard."""
+
+    __tablename__ = "contest_scoreboard_snapshot"
+
+    contest_id = Column(
+        Integer, ForeignKey("contest.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id = Column(
+        Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    rank = Column(Integer, nullable=False)
+    username = Column(String, nullable=True)
+    score = Column(Integer, nullable=False)
+    solved = Column(Integer, nullable=False)
+    # Minutes: time to each solve plus a penalty per rejected attempt
+    penalty = Column(Integer, nullable=False)
+    taken_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class ContestJudgeJob(Base):
+    """
+    A contest submission waiting for the contest judge. Stored with the
+    submission, claimed by a judge worker and deleted once judged.
+    """
+
+    __tablename__ = "contest_judge_queue"
+
+    submission_id = Column(
+        Integer,
+        ForeignKey("submission.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    enqueued_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    # Set by the worker judging it; claims older than the lease are retaken
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+
+    submission = relationship("Submission")
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Enum, ForeignKey
+
+from app.db.base_class import Base
+from app.models.problem import ProblemType, DifficultyLevel
+
+
+class ProblemFacetCount(Base):
+    """Number of problems per (problem_type, difficulty) cell."""
+
+    __tablename__ = "problem_facet_count"
+
+    problem_type = Column(Enum(ProblemType), primary_key=True)
+    difficulty = Column(Enum(DifficultyLevel), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class TagFacetCount(Base):
+    """Number of problems per (tag, problem_type, difficulty) cell."""
+
+    __tablename__ = "tag_facet_count"
+
+    tag_id = Column(
+        Integer, ForeignKey("tag.id", ondelete="CASCADE"), primary_key=True
+    )
+    problem_type = Column(Enum(ProblemType), primary_key=True)
+    difficulty = Column(Enum(DifficultyLevel), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
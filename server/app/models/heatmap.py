@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Date, Integer, LargeBinary, ForeignKey
+
+from app.db.base_class import Base
+
+
+class UserActivityYear(Base):
+    """
+    One user's daily submission and accept counts for one calendar year.
+
+    Each counter column is a packed array of 366 little-endian uint16
+    values indexed by day of year (see ``heatmap_service``), so a profile
+    calendar is a single primary-key read of ~1.5 KB.
+    """
+
+    __tablename__ = "user_activity_year"
+
+    user_id = Column(
+        Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    year = Column(Integer, primary_key=True)
+    submissions = Column(LargeBinary, nullable=False)
+    accepts = Column(LargeBinary, nullable=False)
+
+
+class UserActivityStreak(Base):
+    """
+    One user's streaks of consecutive days with a submission, kept up to
+    date as submissions arrive (see ``heatmap_service``).
+
+    ``current_streak`` is the run of days ending on ``last_active_day``; it
+    is only current while that day is today or yesterday.
+    """
+
+    __tablename__ = "user_activity_streak"
+
+    user_id = Column(
+        Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    current_streak = Column(Integer, nullable=False, default=0)
+    longest_streak = Column(Integer, nullable=False, default=0)
+    last_active_day = Column(Date, nullable=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+
+from app.db.base_class import Base
+
+
+class LeaderboardSnapshot(Base):
+    """
+    Periodic copy of the in-memory leaderboards, so a restarted process
+    can load its boards instead of re-ranking every user.
+    """
+
+    __tablename__ = "leaderboard_snapshot"
+
+    # "global", a ProblemType value, or "contest:<id>"
+    scope = Column(String(64), primary_key=True)
+    user_id = Column(
+        Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    score = Column(Integer, nullable=False)
+    taken_at = Column(DateTime(timezone=True), nullable=False)
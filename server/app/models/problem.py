@@ -7,11 +7,14 @@ from sqlalchemy import (
     DateTime,
     JSON,
     ForeignKey,
+    Index,
 )
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum as PyEnum
 
 from app.db.base_class import Base
+from app.models.tag import problem_tag
 
 
 class ProblemType(str, PyEnum):
@@ -30,6 +33,13 @@ class DifficultyLevel(str, PyEnum):
 
 
 class Problem(Base):
+    __table_args__ = (
+        # list_problems filters, in id order
+        Index(
+            "ix_problem_type_difficulty_id", "problem_type", "difficulty", "id"
+        ),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=False)
@@ -39,6 +49,14 @@ class Problem(Base):
     # Store test cases, template code, etc.
     problem_metadata = Column(JSON, nullable=True)
 
+    # Content hash of the head ProblemVersion
+    version_hash = Column(String(64), nullable=True)
+
+    # Topic tags (graphs, dp, caching, kubernetes, ...)
+    tags = relationship(
+        "Tag", secondary=problem_tag, lazy="selectin", order_by="Tag.name"
+    )
+
     # For company-specific challenges
     # company_id = Column(Integer, ForeignKey("company.id"), nullable=True)
 
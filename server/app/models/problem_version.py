@@ -0,0 +1,46 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    Enum,
+    DateTime,
+    JSON,
+    ForeignKey,
+    UniqueConstraint,
+)
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+from app.models.problem import ProblemType, DifficultyLevel
+
+
+class ProblemVersion(Base):
+    """
+    Immutable snapshot of a problem's content.
+
+    Every edit of a problem that changes its content produces a new row
+    identified by the SHA-256 of that content; rows are never updated.
+    ``Problem.version_hash`` points at the current (head) version.
+    """
+
+    __tablename__ = "problem_version"
+    __table_args__ = (UniqueConstraint("problem_id", "version"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    problem_id = Column(
+        Integer,
+        ForeignKey("problem.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    version = Column(Integer, nullable=False)
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)
+
+    title = Column(String(255), nullable=False)
+    description = Column(Text, nullable=False)
+    problem_type = Column(Enum(ProblemType), nullable=False)
+    difficulty = Column(Enum(DifficultyLevel), nullable=False)
+    problem_metadata = Column(JSON, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
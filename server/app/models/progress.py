@@ -0,0 +1,65 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+)
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+
+class UserProgress(Base):
+    """
+    Per-user solved/attempt counters, maintained incrementally by the judge
+    whenever it records a verdict. One row per user, read by primary key.
+    """
+
+    __tablename__ = "user_progress"
+
+    user_id = Column(
+        Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    # Judged submissions
+    attempts_total = Column(Integer, nullable=False, default=0)
+    # Distinct problems with at least one accepted submission
+    solved_total = Column(Integer, nullable=False, default=0)
+
+    # Solved problems per ProblemType
+    solved_dsa = Column(Integer, nullable=False, default=0)
+    solved_lld = Column(Integer, nullable=False, default=0)
+    solved_hld = Column(Integer, nullable=False, default=0)
+    solved_sql = Column(Integer, nullable=False, default=0)
+    solved_devops = Column(Integer, nullable=False, default=0)
+
+    # Solved problems per DifficultyLevel
+    solved_easy = Column(Integer, nullable=False, default=0)
+    solved_medium = Column(Integer, nullable=False, default=0)
+    solved_hard = Column(Integer, nullable=False, default=0)
+    solved_expert = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class UserProblemProgress(Base):
+    """Per-user, per-problem attempts, best score and first acceptance."""
+
+    __tablename__ = "user_problem_progress"
+
+    user_id = Column(
+        Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    problem_id = Column(
+        Integer,
+        ForeignKey("problem.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    attempts = Column(Integer, nullable=False, default=0)
+    solved = Column(Boolean, nullable=False, default=False)
+    best_score = Column(Float, nullable=True)
+    first_accepted_at = Column(DateTime(timezone=True), nullable=True)
+    last_submitted_at = Column(DateTime(timezone=True), nullable=True)
@@ -8,10 +8,13 @@ from sqlalchemy import (
     JSON,
     ForeignKey,
     Float,
+    Index,
 )
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from enum import Enum as PyEnum
+from typing import Optional
 
+from app.core.tracing import SpanContext
 from app.db.base_class import Base
 
 
@@ -25,10 +28,30 @@ class SubmissionStatus(str, PyEnum):
 
 
 class Submission(Base):
+    __table_args__ = (
+        # A user's submissions, newest first (list_submissions)
+        Index(
+            "ix_submission_user_id_created_at",
+            "user_id",
+            text("created_at DESC"),
+        ),
+        # A user's submissions to one problem, newest first (problem
+        # filter, progress)
+        Index(
+            "ix_submission_user_id_problem_id_created_at",
+            "user_id",
+            "problem_id",
+            text("created_at DESC"),
+        ),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     problem_id = Column(Integer, ForeignKey("problem.id"), nullable=False)
 
+    # Immutable ProblemVersion (content hash) the submission is judged against
+    problem_version_hash = Column(String(64), nullable=True)
+
     # Content of the submission (code, design document, etc.)
     content = Column(Text, nullable=False)
 
@@ -50,3 +73,27 @@ class Submission(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Archive segment holding content and results; set on stub rows left
+    # behind by the archival job (see app/services/archive_service.py)
+    archive_segment = Column(Integer, nullable=True)
+
+    # Contest the submission was made in, if any
+    contest_id = Column(
+        Integer, ForeignKey("contest.id", ondelete="SET NULL"), nullable=True
+    )
+
+    # Trace context of the request that created the submission; the judge
+    # continues its trace (see app/core/tracing.py)
+    trace_id = Column(String(32), nullable=True)
+    span_id = Column(String(16), nullable=True)
+
+    @property
+    def archived(self) -> bool:
+        return self.archive_segment is not None
+
+    @property
+    def trace_context(self) -> Optional[SpanContext]:
+        if self.trace_id is None or self.span_id is None:
+            return None
+        return SpanContext(self.trace_id, self.span_id)
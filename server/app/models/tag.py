@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Table, ForeignKey, DateTime
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+# Association table between problems and their topic tags
+problem_tag = Table(
+    "problem_tag",
+    Base.metadata,
+    Column(
+        "problem_id",
+        Integer,
+        ForeignKey("problem.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "tag_id",
+        Integer,
+        ForeignKey("tag.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    ),
+)
+
+
+class Tag(Base):
+    id = Column(Integer, primary_key=True, index=True)
+    # Normalized (lower-case) topic name, e.g. "graphs", "kubernetes"
+    name = Column(String(64), unique=True, index=True, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,51 @@
+import json
+
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+
+class ActivityEventCreate(BaseModel):
+    event_type: str = Field(..., pattern=r"^[a-z][a-z0-9_.]{0,31}$")
+    problem_id: Optional[int] = None
+    payload: Optional[Dict[str, Any]] = None
+
+    @field_validator("payload")
+    @classmethod
+    def limit_payload_size(
+        cls, v: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        if v is not None:
+            size = len(json.dumps(v, separators=(",", ":")).encode())
+            if size > settings.ACTIVITY_MAX_PAYLOAD_BYTES:
+                raise ValueError(
+                    "payload must be at most "
+                    f"{settings.ACTIVITY_MAX_PAYLOAD_BYTES} bytes"
+                )
+        return v
+
+
+class ActivityEventBatch(BaseModel):
+    events: List[ActivityEventCreate] = Field(..., max_length=100)
+
+
+class ActivityIngestResult(BaseModel):
+    accepted: int
+    dropped: int
+
+
+class ActivityStats(BaseModel):
+    buffered: int
+    capacity: int
+    received: int
+    accepted: int
+    sampled_out: int
+    dropped: int
+    flushed: int
+    flush_batches: int
+    flush_errors: int
+    rejected: int
+    uptime_seconds: float
+    ingest_per_second: float
+    flush_per_second: float
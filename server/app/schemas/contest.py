@@ -0,0 +1,66 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+from datetime import datetime
+
+
+# Shared properties
+class ContestBase(BaseModel):
+    title: str
+    starts_at: datetime
+    ends_at: datetime
+    # Start of the scoreboard freeze, before ends_at
+    freeze_at: Optional[datetime] = None
+
+
+# Properties to receive via API on creation
+class ContestCreate(ContestBase):
+    # In the order they are presented
+    problem_ids: List[int]
+
+
+class Contest(ContestBase):
+    id: int
+    problem_ids: List[int]
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ContestScoreboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: Optional[str] = None
+    score: int
+    solved: int
+    # Minutes to each solve plus the penalty for rejected attempts
+    penalty: int
+
+
+# Standings as of the latest materialized snapshot
+class ContestScoreboard(BaseModel):
+    contest_id: int
+    # None until the first snapshot is taken
+    taken_at: Optional[datetime] = None
+    # Only solves before the contest's freeze_at are counted
+    frozen: bool
+    total: int
+    entries: List[ContestScoreboardEntry]
+
+
+class ContestRefreshReport(BaseModel):
+    problems: int
+    scoreboards: int
+
+
+class ContestAdmissionStats(BaseModel):
+    admitted: int
+    rejected: int
+    judged: int
+    errors: int
+    # Stored submissions not judged yet, by any worker
+    queued: int
+    capacity: int
+    # Judge threads, mean judge time and event loop lag of this process
+    workers: int
+    mean_judge_seconds: float
+    loop_lag_ms: float
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import date
+
+
+class ActivityHeatmap(BaseModel):
+    user_id: int
+    year: int
+    # Counts per day, starting on January 1st
+    start_date: date
+    submissions: List[int]
+    accepts: List[int]
+    total_submissions: int
+    total_accepts: int
+    current_streak: int
+    longest_streak: int
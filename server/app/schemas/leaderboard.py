@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: Optional[str] = None
+    score: int
+
+
+class Leaderboard(BaseModel):
+    scope: str
+    total: int
+    entries: List[LeaderboardEntry]
+
+
+class LeaderboardPosition(BaseModel):
+    scope: str
+    total: int
+    entry: Optional[LeaderboardEntry] = None
+    neighbors: List[LeaderboardEntry]
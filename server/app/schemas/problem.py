@@ -3,6 +3,7 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 from app.models.problem import ProblemType, DifficultyLevel
+from app.schemas.tag import Tag
 
 
 # Shared properties
@@ -21,15 +22,19 @@ class ProblemCreate(ProblemBase):
     description: str
     problem_type: ProblemType
     difficulty: DifficultyLevel
+    tags: List[str] = []
 
 
 # Properties to receive via API on update
 class ProblemUpdate(ProblemBase):
-    pass
+    # When provided, replaces the full set of tags
+    tags: Optional[List[str]] = None
 
 
 class ProblemInDBBase(ProblemBase):
     id: int
+    tags: List[Tag] = []
+    version_hash: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -45,3 +50,75 @@ class Problem(ProblemInDBBase):
 class ProblemList(BaseModel):
     items: List[Problem]
     total: int
+
+
+# Fields that list endpoints may project with ``fields=``. problem_metadata
+# carries test cases and is never listable.
+PROBLEM_LIST_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "problem_type",
+    "difficulty",
+    "tags",
+    "created_at",
+    "updated_at",
+)
+PROBLEM_SUMMARY_FIELDS = ("id", "title", "problem_type", "difficulty", "tags")
+
+
+# Lightweight list item; only the projected fields are set
+class ProblemSummary(BaseModel):
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    problem_type: Optional[ProblemType] = None
+    difficulty: Optional[DifficultyLevel] = None
+    tags: Optional[List[Tag]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProblemSummaryList(BaseModel):
+    items: List[ProblemSummary]
+    total: int
+
+
+# Per-facet problem counts for the filter sidebar
+class ProblemFacets(BaseModel):
+    problem_type: Dict[ProblemType, int]
+    difficulty: Dict[DifficultyLevel, int]
+    tags: Dict[str, int]
+
+
+# Outcome of a bulk NDJSON import
+class ProblemImportError(BaseModel):
+    line: int
+    error: str
+
+
+class ProblemImportReport(BaseModel):
+    imported: int
+    failed: int
+    # Capped; ``failed`` holds the full count
+    errors: List[ProblemImportError]
+
+
+# Immutable problem versions
+class ProblemVersionSummary(BaseModel):
+    version: int
+    content_hash: str
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProblemVersion(ProblemVersionSummary):
+    problem_id: int
+    title: str
+    description: str
+    problem_type: ProblemType
+    difficulty: DifficultyLevel
+    problem_metadata: Optional[Dict[str, Any]] = None
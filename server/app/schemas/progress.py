@@ -0,0 +1,24 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, Optional
+from datetime import datetime
+
+from app.models.problem import ProblemType, DifficultyLevel
+
+
+class UserProgress(BaseModel):
+    user_id: int
+    attempts_total: int
+    solved_total: int
+    solved_by_type: Dict[ProblemType, int]
+    solved_by_difficulty: Dict[DifficultyLevel, int]
+
+
+class UserProblemProgress(BaseModel):
+    problem_id: int
+    attempts: int
+    solved: bool
+    best_score: Optional[float] = None
+    first_accepted_at: Optional[datetime] = None
+    last_submitted_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -10,6 +10,8 @@ class SubmissionBase(BaseModel):
     problem_id: Optional[int] = None
     content: Optional[str] = None
     language: Optional[str] = None
+    # Set to submit within a running contest
+    contest_id: Optional[int] = None
 
 
 # Properties to receive via API on creation
@@ -29,11 +31,15 @@ class SubmissionUpdate(BaseModel):
 class SubmissionInDBBase(SubmissionBase):
     id: int
     user_id: int
+    problem_version_hash: Optional[str] = None
     status: SubmissionStatus
     score: Optional[float] = None
     results: Optional[Dict[str, Any]] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    # Content and results of archived submissions are only returned when
+    # fetching the submission itself
+    archived: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -47,3 +53,24 @@ class Submission(SubmissionInDBBase):
 class SubmissionList(BaseModel):
     items: List[Submission]
     total: int
+
+
+class TraceSpan(BaseModel):
+    span_id: str
+    parent_span_id: Optional[str] = None
+    name: str
+    # Offset from the start of the trace
+    start_ms: float
+    duration_ms: float
+    attributes: Dict[str, Any] = {}
+    error: Optional[str] = None
+
+
+# Where a submission's time went, for admins
+class SubmissionTrace(BaseModel):
+    submission_id: int
+    trace_id: str
+    # Milliseconds in the API request, the queue, each judge stage (load,
+    # compile, run, check, persist), SQL statements overall, and end to end
+    breakdown: Dict[str, float]
+    spans: List[TraceSpan]
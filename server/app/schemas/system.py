@@ -0,0 +1,81 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+
+class EngineStats(BaseModel):
+    dialect: str
+    pool_size: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    # Time spent waiting for a pooled connection ...
+    checkouts: int = 0
+    checkout_wait_avg_ms: float = 0.0
+    checkout_wait_max_ms: float = 0.0
+    checkout_timeouts: int = 0
+    # ... versus time spent executing statements
+    statements: int = 0
+    statement_time_avg_ms: float = 0.0
+    statement_time_max_ms: float = 0.0
+
+
+class ReplicaStats(BaseModel):
+    name: str
+    healthy: bool
+    failures: int = 0
+    last_error: Optional[str] = None
+
+
+class DatabaseStats(BaseModel):
+    engines: Dict[str, EngineStats]
+    replicas: List[ReplicaStats] = []
+
+
+class ProfileSummary(BaseModel):
+    id: int
+    method: str
+    path: str
+    route: Optional[str] = None
+    status: Optional[int] = None
+    started_at: float
+    duration_ms: float
+    interval_ms: float
+    samples: int
+    # Distinct stacks sampled
+    stacks: int
+
+
+class SlowQuerySample(BaseModel):
+    at: datetime
+    duration_ms: float
+    endpoint: Optional[str] = None
+    # Innermost application frame that issued the statement
+    caller: Optional[str] = None
+    # Values, or only their types when parameters are redacted
+    parameters: Any = None
+    # Captured with this occurrence (plans are rate-limited)
+    plan: Optional[str] = None
+
+
+class SlowQuery(BaseModel):
+    fingerprint: str
+    statement: str
+    count: int
+    total_ms: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    first_seen: datetime
+    last_seen: datetime
+    endpoints: Dict[str, int]
+    # The most recently captured plan
+    plan: Optional[str] = None
+    samples: List[SlowQuerySample]
+
+
+class SlowQueryLog(BaseModel):
+    enabled: bool
+    threshold_ms: float
+    queries: List[SlowQuery]
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class Tag(BaseModel):
+    id: int
+    name: str
+
+    model_config = ConfigDict(from_attributes=True)
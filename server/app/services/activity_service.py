@@ -0,0 +1,251 @@
+"""
+Write-behind user activity tracking.
+
+Request handlers only append events to a bounded in-memory buffer; a
+background thread bulk-inserts them into ``activity_event`` whenever a
+batch fills up or the flush interval elapses. When the buffer runs hot
+(above ``ACTIVITY_SAMPLE_THRESHOLD``) only a sample of new events is kept,
+and once it is full new events are dropped and the API asks clients to
+back off. Everything still buffered is flushed on graceful shutdown.
+
+A batch the database rejects for its content (a constraint or a bad
+value) is split in halves until the offending rows are isolated; those
+are discarded and counted as ``rejected`` so that one bad event cannot
+hold up the rest. Other errors (connection loss, ...) put the unwritten
+rows back in front of the buffer for the next flush.
+
+Like the leaderboards, the flusher writes to the primary database of the
+first session that recorded an event.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.routing import primary_bind
+from app.models.activity import ActivityEvent
+
+logger = logging.getLogger(__name__)
+
+_STAT_NAMES = (
+    "received",
+    "accepted",
+    "sampled_out",
+    "dropped",
+    "flushed",
+    "flush_batches",
+    "flush_errors",
+    "rejected",
+)
+
+
+class ActivityService:
+    def __init__(
+        self,
+        *,
+        capacity: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        sample_threshold: Optional[float] = None,
+        sample_rate: Optional[float] = None,
+    ) -> None:
+        self.capacity = capacity or settings.ACTIVITY_BUFFER_SIZE
+        self.batch_size = batch_size or settings.ACTIVITY_FLUSH_BATCH_SIZE
+        self.flush_interval = (
+            flush_interval or settings.ACTIVITY_FLUSH_INTERVAL
+        )
+        self.sample_threshold = (
+            sample_threshold
+            if sample_threshold is not None
+            else settings.ACTIVITY_SAMPLE_THRESHOLD
+        )
+        self.sample_rate = (
+            sample_rate
+            if sample_rate is not None
+            else settings.ACTIVITY_SAMPLE_RATE
+        )
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._bind: Optional[Engine] = None
+        self._random = random.Random()
+        self._reset_stats()
+
+    def record(
+        self, db: Session, *, user_id: int, events: List[Dict[str, Any]]
+    ) -> Tuple[int, int]:
+        """
+        Buffer events for a user. Returns (accepted, dropped); events
+        left out by sampling count as neither.
+        """
+        received_at = datetime.now(timezone.utc)
+        accepted = dropped = 0
+        with self._lock:
+            if self._bind is None:
+                self._bind = primary_bind(db)
+            sample_above = self.capacity * self.sample_threshold
+            for event in events:
+                self._stats["received"] += 1
+                size = len(self._buffer)
+                if size >= self.capacity:
+                    dropped += 1
+                    continue
+                if (
+                    size >= sample_above
+                    and self._random.random() >= self.sample_rate
+                ):
+                    self._stats["sampled_out"] += 1
+                    continue
+                self._buffer.append(
+                    {
+                        "user_id": user_id,
+                        "event_type": event["event_type"],
+                        "problem_id": event.get("problem_id"),
+                        "payload": event.get("payload"),
+                        "created_at": received_at,
+                    }
+                )
+                accepted += 1
+            self._stats["accepted"] += accepted
+            self._stats["dropped"] += dropped
+            full_batch = len(self._buffer) >= self.batch_size
+        if full_batch:
+            self._wakeup.set()
+        return accepted, dropped
+
+    def flush(self) -> int:
+        """Write everything buffered, batch by batch; returns rows."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    if not self._buffer or self._bind is None:
+                        return written
+                    batch = [
+                        self._buffer.popleft()
+                        for _ in range(min(self.batch_size, len(self._buffer)))
+                    ]
+                    bind = self._bind
+                count, unwritten = self._write(bind, batch)
+                written += count
+                if unwritten:
+                    self._requeue(unwritten)
+                    return written
+
+    def start(self) -> None:
+        """Start the background flusher."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="activity-flusher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flusher and write out whatever is still buffered."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._lock:
+            self._bind = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            uptime = max(time.monotonic() - self._started, 1e-9)
+            return {
+                **self._stats,
+                "buffered": len(self._buffer),
+                "capacity": self.capacity,
+                "uptime_seconds": round(uptime, 3),
+                "ingest_per_second": round(
+                    self._stats["accepted"] / uptime, 2
+                ),
+                "flush_per_second": round(self._stats["flushed"] / uptime, 2),
+            }
+
+    def reset(self) -> None:
+        """Discard buffered events and counters (tests / restart)."""
+        with self._lock:
+            self._buffer.clear()
+            self._bind = None
+            self._reset_stats()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _write(
+        self, bind: Engine, batch: List[Dict[str, Any]]
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Insert a batch, splitting it on rows the database rejects. Returns
+        the rows written and those left unwritten by another error.
+        """
+        written = 0
+        pending = [batch]
+        while pending:
+            rows = pending.pop()
+            try:
+                with Session(bind=bind) as db:
+                    db.execute(insert(ActivityEvent.__table__), rows)
+                    db.commit()
+            except (IntegrityError, DataError):
+                with self._lock:
+                    self._stats["flush_errors"] += 1
+                    if len(rows) == 1:
+                        self._stats["rejected"] += 1
+                if len(rows) > 1:
+                    middle = len(rows) // 2
+                    pending += [rows[middle:], rows[:middle]]
+                else:
+                    logger.warning(
+                        "Discarding activity event rejected by the "
+                        "database: %r",
+                        rows[0],
+                    )
+                continue
+            except SQLAlchemyError:
+                logger.exception("Failed to flush activity events")
+                return written, rows + [
+                    row for part in reversed(pending) for row in part
+                ]
+            written += len(rows)
+            with self._lock:
+                self._stats["flushed"] += len(rows)
+                self._stats["flush_batches"] += 1
+        return written, []
+
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        """Put a failed batch back in front, dropping what no longer fits."""
+        with self._lock:
+            self._stats["flush_errors"] += 1
+            room = max(self.capacity - len(self._buffer), 0)
+            kept = batch[:room]
+            self._buffer.extendleft(reversed(kept))
+            self._stats["dropped"] += len(batch) - len(kept)
+
+    def _reset_stats(self) -> None:
+        self._stats = {name: 0 for name in _STAT_NAMES}
+        self._started = time.monotonic()
+
+
+activity_service = ActivityService()
@@ -0,0 +1,270 @@
+"""
+Cold storage for old submissions.
+
+``archive`` moves the content and results of judged submissions older
+than ``SUBMISSION_ARCHIVE_AFTER_DAYS`` into a new segment file under
+``SUBMISSION_ARCHIVE_DIR`` and leaves a stub row in ``submission``: same
+id, owner, problem, verdict and timestamps, but empty ``content``, no
+``results`` and ``archive_segment`` set to the segment number.
+
+Segments are written once and never modified:
+
+* ``segment-<n>.seg`` - the full rows as JSON, sorted by (user_id, id)
+  and packed into zlib-compressed blocks of about
+  ``SUBMISSION_ARCHIVE_BLOCK_SIZE`` bytes, so a user's history compresses
+  together;
+* ``segment-<n>.idx`` - fixed-size entries sorted by (user_id, id) that
+  locate each row's block and its place within it.
+
+Both files are fsynced and renamed into place before the stub rows are
+committed, so a failed run leaves at most an unreferenced segment.
+Faulting a row back in binary-searches the index and decompresses one
+block; indexes and recently read blocks are cached in memory. Every API
+process needs the archive directory, e.g. on a shared volume.
+"""
+
+import bisect
+import functools
+import json
+import os
+import re
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified, set_committed_value
+
+from app.core.config import settings
+from app.models.submission import Submission, SubmissionStatus
+
+SEGMENT_MAGIC = b"SKSEG001"
+INDEX_MAGIC = b"SKIDX001"
+# user_id, id, block offset, block length, record offset, record length
+_ENTRY = struct.Struct("<qqQIII")
+_SEGMENT_NAME = re.compile(r"segment-(\d+)\.seg(?:\.tmp)?$")
+
+# Fields that only live in the segment once a submission is archived
+ARCHIVED_FIELDS = ("content", "results")
+
+
+def _segment_path(directory: str, number: int, suffix: str) -> str:
+    return os.path.join(directory, f"segment-{number:06d}.{suffix}")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot archive {type(value).__name__}")
+
+
+def _write_file(path: str, chunks: List[bytes]) -> None:
+    """Write ``path`` under a temporary name, fsync and rename it."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def write_segment(
+    directory: str, number: int, rows: List[Dict[str, Any]], block_size: int
+) -> None:
+    """Write the rows (dicts with user_id and id) as segment ``number``."""
+    rows = sorted(rows, key=lambda row: (row["user_id"], row["id"]))
+    blocks: List[bytes] = [SEGMENT_MAGIC]
+    entries: List[bytes] = [INDEX_MAGIC]
+    offset = len(SEGMENT_MAGIC)
+    block = bytearray()
+    pending: List[Tuple[int, int, int, int]] = []
+
+    def close_block() -> None:
+        nonlocal offset
+        data = zlib.compress(bytes(block))
+        for user_id, row_id, start, length in pending:
+            entries.append(
+                _ENTRY.pack(user_id, row_id, offset, len(data), start, length)
+            )
+        blocks.append(data)
+        offset += len(data)
+        block.clear()
+        pending.clear()
+
+    for row in rows:
+        record = json.dumps(
+            row, default=_json_default, separators=(",", ":")
+        ).encode()
+        if block and len(block) + len(record) > block_size:
+            close_block()
+        pending.append((row["user_id"], row["id"], len(block), len(record)))
+        block.extend(record)
+    if block:
+        close_block()
+
+    _write_file(_segment_path(directory, number, "seg"), blocks)
+    _write_file(_segment_path(directory, number, "idx"), entries)
+
+
+class SegmentIndex:
+    """The (user_id, id) -> record location entries of one segment."""
+
+    def __init__(self, data: bytes) -> None:
+        if not data.startswith(INDEX_MAGIC):
+            raise ValueError("Not a submission archive index")
+        entries = list(_ENTRY.iter_unpack(data[len(INDEX_MAGIC) :]))
+        self._keys = [(entry[0], entry[1]) for entry in entries]
+        self._locations = [entry[2:] for entry in entries]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def find(
+        self, user_id: int, submission_id: int
+    ) -> Optional[Tuple[int, int, int, int]]:
+        key = (user_id, submission_id)
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            return self._locations[position]
+        return None
+
+
+# Segments never change, so their indexes and blocks can be cached by path
+@functools.lru_cache(maxsize=16)
+def _load_index(path: str) -> SegmentIndex:
+    with open(path, "rb") as f:
+        return SegmentIndex(f.read())
+
+
+@functools.lru_cache(maxsize=64)
+def _read_block(path: str, offset: int, length: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return zlib.decompress(f.read(length))
+
+
+class SubmissionArchiveService:
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        *,
+        block_size: Optional[int] = None,
+    ) -> None:
+        self.directory = directory or settings.SUBMISSION_ARCHIVE_DIR
+        self.block_size = block_size or settings.SUBMISSION_ARCHIVE_BLOCK_SIZE
+
+    def archive(
+        self,
+        db: Session,
+        *,
+        older_than: Optional[timedelta] = None,
+        limit: Optional[int] = None,
+        now: Optional[datetime] = None,
+    ) -> int:
+        """
+        Archive one batch of judged submissions created before the cutoff
+        into a new segment. Returns the number archived (0 once none are
+        left).
+        """
+        older_than = older_than or timedelta(
+            days=settings.SUBMISSION_ARCHIVE_AFTER_DAYS
+        )
+        cutoff = (now or datetime.now(timezone.utc)) - older_than
+        submissions = (
+            db.query(Submission)
+            .filter(
+                Submission.archive_segment.is_(None),
+                Submission.status != SubmissionStatus.PENDING,
+                Submission.created_at < cutoff,
+            )
+            .order_by(Submission.user_id, Submission.id)
+            .limit(limit or settings.SUBMISSION_ARCHIVE_BATCH_SIZE)
+            .with_for_update()
+            .all()
+        )
+        if not submissions:
+            db.rollback()
+            return 0
+
+        columns = [column.key for column in Submission.__table__.columns]
+        rows = [
+            {column: getattr(submission, column) for column in columns}
+            for submission in submissions
+        ]
+        number = self._reserve_segment()
+        write_segment(self.directory, number, rows, self.block_size)
+
+        for submission in submissions:
+            submission.content = ""
+            submission.results = None
+            submission.archive_segment = number
+        db.commit()
+        return len(submissions)
+
+    def read(self, submission: Submission) -> Dict[str, Any]:
+        """The archived row of a stub submission."""
+        index = _load_index(
+            _segment_path(self.directory, submission.archive_segment, "idx")
+        )
+        location = index.find(submission.user_id, submission.id)
+        if location is None:
+            raise LookupError(
+                f"Submission {submission.id} is missing from archive "
+                f"segment {submission.archive_segment}"
+            )
+        block_offset, block_length, start, length = location
+        block = _read_block(
+            _segment_path(self.directory, submission.archive_segment, "seg"),
+            block_offset,
+            block_length,
+        )
+        return json.loads(block[start : start + length])
+
+    def fault_in(self, submission: Submission) -> Submission:
+        """
+        Load an archived submission's content and results into the
+        instance without marking it modified; it stays archived.
+        """
+        if submission.archived:
+            record = self.read(submission)
+            for field in ARCHIVED_FIELDS:
+                set_committed_value(submission, field, record[field])
+        return submission
+
+    def restore(self, db: Session, *, submission: Submission) -> Submission:
+        """Move an archived submission back into the hot table."""
+        if submission.archived:
+            record = self.read(submission)
+            for field in ARCHIVED_FIELDS:
+                setattr(submission, field, record[field])
+                # The instance may hold the faulted-in values already
+                flag_modified(submission, field)
+            submission.archive_segment = None
+            db.add(submission)
+        return submission
+
+    def _reserve_segment(self) -> int:
+        """Claim the next segment number, also against other archivers."""
+        os.makedirs(self.directory, exist_ok=True)
+        numbers = [
+            int(match.group(1))
+            for match in map(_SEGMENT_NAME.match, os.listdir(self.directory))
+            if match
+        ]
+        number = max(numbers, default=0) + 1
+        while True:
+            path = _segment_path(self.directory, number, "seg")
+            try:
+                fd = os.open(
+                    f"{path}.tmp", os.O_CREAT | os.O_EXCL | os.O_WRONLY
+                )
+            except FileExistsError:
+                number += 1
+                continue
+            os.close(fd)
+            return number
+
+
+submission_archive_service = SubmissionArchiveService()
@@ -0,0 +1,308 @@
+"""
+Admission control and judging for contest submissions.
+
+Practice submissions are judged as background tasks of the request that
+created them. Contest submissions arrive in a burst at the start, so they
+are queued in the database instead (``contest_judge_queue``): the request
+stores the submission and its queue row in one transaction, and judge
+workers claim rows in submission order, judge them and delete them.
+
+Workers run as ``CONTEST_JUDGE_WORKERS`` threads of each API process, one
+by default so that judging and its writes never take more than one
+request thread's share of the process, or, with ``CONTEST_JUDGE_WORKERS``
+set to 0, only in separate processes (``python -m scripts.contest_judge``),
+which keeps contest judging off the interpreter serving practice traffic.
+
+Admission control keeps a contest start from crowding out practice
+traffic, which shares the request thread pool and the CPU of the API
+processes. A contest submission is only stored while
+
+* the process keeps up: its event loop runs less than
+  ``CONTEST_MAX_LOOP_LAG_MS`` late (``sample_loop_lag``), which it does
+  not once requests queue for the CPU,
+* fewer than ``CONTEST_WRITE_CONCURRENCY`` other contest submissions are
+  being stored by the same process, and
+* the queue holds fewer than ``CONTEST_QUEUE_SIZE`` submissions
+  (concurrent requests can overshoot it by a few).
+
+Otherwise the API answers 429 with a Retry-After of how long the oldest
+queued submission has waited (at least a second), so excess submitters
+wait on their side and stop polling for verdicts in the meantime. The
+queue survives restarts, and a submission claimed by a worker that died
+is retaken once its claim is ``CONTEST_JUDGE_LEASE`` seconds old.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import CONTEST_ADMISSIONS, JUDGE_QUEUE_DEPTH
+from app.models.contest import ContestJudgeJob
+from app.models.submission import Submission, SubmissionStatus
+from app.services.contest_service import as_utc
+from app.services.judge_service import judge_service
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest judge run in the moving average
+_MEAN_WEIGHT = 0.1
+# Oldest unclaimed submissions a worker tries to claim in one pass
+_CLAIM_CANDIDATES = 8
+
+
+class ContestJudgeService:
+    def __init__(
+        self,
+        *,
+        capacity: Optional[int] = None,
+        workers: Optional[int] = None,
+    ) -> None:
+        self.capacity = (
+            capacity if capacity is not None else settings.CONTEST_QUEUE_SIZE
+        )
+        self.workers = (
+            workers if workers is not None else settings.CONTEST_JUDGE_WORKERS
+        )
+        self.max_loop_lag = settings.CONTEST_MAX_LOOP_LAG_MS / 1000
+        self.poll_interval = settings.CONTEST_JUDGE_POLL_INTERVAL
+        self.lease = timedelta(seconds=settings.CONTEST_JUDGE_LEASE)
+        self._lock = threading.Lock()
+        # Contest submissions being stored by requests of this process
+        self._writers = threading.BoundedSemaphore(
+            settings.CONTEST_WRITE_CONCURRENCY
+        )
+        # Set when a submission is queued or the workers should stop
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._bind: Optional[Engine] = None
+        # Moving average of the event loop's lag, in seconds
+        self._loop_lag = 0.0
+        self._threads: List[threading.Thread] = []
+        self._mean_seconds = 0.0
+        self._reset_stats()
+
+    def admit(self, db: Session) -> bool:
+        """
+        Take a write slot for a submission if the process and the queue
+        have room for it (see the module docstring); ``release`` gives it
+        back once the submission is stored.
+        """
+        if self._loop_lag < self.max_loop_lag and self._writers.acquire(
+            blocking=False
+        ):
+            if self._queued(db) < self.capacity:
+                with self._lock:
+                    self._stats["admitted"] += 1
+                CONTEST_ADMISSIONS.inc("admitted")
+                return True
+            self._writers.release()
+        with self._lock:
+            self._stats["rejected"] += 1
+        CONTEST_ADMISSIONS.inc("rejected")
+        return False
+
+    def release(self) -> None:
+        """Give back the write slot taken by ``admit``."""
+        self._writers.release()
+
+    def enqueue(self, db: Session, *, submission: Submission) -> None:
+        """
+        Queue a submission admitted by ``admit``. The queue row is written
+        by the transaction that stores the submission; call ``notify``
+        once it is committed.
+        """
+        db.add(
+            ContestJudgeJob(
+                submission=submission, enqueued_at=datetime.now(timezone.utc)
+            )
+        )
+
+    def notify(self) -> None:
+        """Wake the workers of this process to look at the queue."""
+        self._wakeup.set()
+
+    def retry_after(self, db: Session) -> int:
+        """Seconds until the backlog has likely made room again."""
+        oldest = db.scalar(select(func.min(ContestJudgeJob.enqueued_at)))
+        if oldest is None:
+            return 1
+        waited = datetime.now(timezone.utc) - as_utc(oldest)
+        return max(1, math.ceil(waited.total_seconds()))
+
+    def join(self) -> None:
+        """Wait until the queue is empty (workers running)."""
+        while True:
+            with Session(bind=self._bind) as db:
+                if not self._queued(db):
+                    return
+            time.sleep(0.01)
+
+    def start(self, bind: Engine) -> None:
+        """Start this process's judge workers on ``bind``."""
+        self._bind = bind
+        if self._threads:
+            return
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(
+                target=self._run, name=f"contest-judge-{i}", daemon=True
+            )
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop the workers once they finish the submission at hand."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    async def sample_loop_lag(self, interval: float) -> None:
+        """
+        Measure how late the event loop wakes up from a sleep, every
+        ``interval`` seconds (a task of the app).
+        """
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.perf_counter() - started - interval)
+            self._loop_lag += _MEAN_WEIGHT * (lag - self._loop_lag)
+
+    def judge_next(self, bind: Engine) -> bool:
+        """Judge the oldest queued submission; False if there is none."""
+        job = self._claim(bind)
+        if job is None:
+            return False
+        self._judge(bind, *job)
+        return True
+
+    def stats(self, db: Session) -> Dict[str, Any]:
+        queued = self._queued(db)
+        with self._lock:
+            return {
+                **self._stats,
+                "queued": queued,
+                "capacity": self.capacity,
+                "workers": self.workers,
+                "mean_judge_seconds": round(self._mean_seconds, 6),
+                "loop_lag_ms": round(self._loop_lag * 1000, 3),
+            }
+
+    def reset(self) -> None:
+        """Zero the counters (tests / restart)."""
+        with self._lock:
+            self._mean_seconds = 0.0
+            self._loop_lag = 0.0
+            self._reset_stats()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if self.judge_next(self._bind):
+                    continue
+            except Exception:
+                logger.exception("Contest judge worker failed")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _claim(self, bind: Engine) -> Optional[Tuple[int, datetime]]:
+        now = datetime.now(timezone.utc)
+        claimable = or_(
+            ContestJudgeJob.claimed_at.is_(None),
+            ContestJudgeJob.claimed_at < now - self.lease,
+        )
+        with Session(bind=bind) as db:
+            candidates = db.execute(
+                select(
+                    ContestJudgeJob.submission_id, ContestJudgeJob.enqueued_at
+                )
+                .where(claimable)
+                .order_by(
+                    ContestJudgeJob.enqueued_at, ContestJudgeJob.submission_id
+                )
+                .limit(_CLAIM_CANDIDATES)
+            ).all()
+            db.commit()
+            # Another worker may claim a candidate first: the claim only
+            # succeeds if the row is still claimable when it is updated
+            for submission_id, enqueued_at in candidates:
+                claimed = db.execute(
+                    update(ContestJudgeJob)
+                    .where(
+                        ContestJudgeJob.submission_id == submission_id,
+                        claimable,
+                    )
+                    .values(claimed_at=now)
+                )
+                db.commit()
+                if claimed.rowcount:
+                    return submission_id, as_utc(enqueued_at)
+        return None
+
+    def _judge(
+        self, bind: Engine, submission_id: int, enqueued_at: datetime
+    ) -> None:
+        started = time.perf_counter()
+        waited = (datetime.now(timezone.utc) - enqueued_at).total_seconds()
+        failed = False
+        try:
+            with Session(bind=bind) as db:
+                submission = db.get(Submission, submission_id)
+                # Skips submissions a worker judged and then died before
+                # deleting their queue row
+                if (
+                    submission is not None
+                    and submission.status == SubmissionStatus.PENDING
+                ):
+                    # Counted out again by judge_service.judge
+                    JUDGE_QUEUE_DEPTH.inc()
+                    judge_service.judge(
+                        db,
+                        submission_id=submission_id,
+                        queued_at=started - max(waited, 0.0),
+                        trace_context=submission.trace_context,
+                    )
+        except Exception:
+            logger.exception(
+                "Failed to judge contest submission %s", submission_id
+            )
+            failed = True
+        # Also after a failure, so that one bad submission is not retried
+        # forever; if this fails the claim expires and it is retaken
+        with Session(bind=bind) as db:
+            db.execute(
+                delete(ContestJudgeJob).where(
+                    ContestJudgeJob.submission_id == submission_id
+                )
+            )
+            db.commit()
+        seconds = time.perf_counter() - started
+        with self._lock:
+            self._stats["errors" if failed else "judged"] += 1
+            self._mean_seconds = (
+                seconds
+                if not self._mean_seconds
+                else self._mean_seconds
+                + _MEAN_WEIGHT * (seconds - self._mean_seconds)
+            )
+
+    def _queued(self, db: Session) -> int:
+        return db.scalar(select(func.count()).select_from(ContestJudgeJob))
+
+    def _reset_stats(self) -> None:
+        self._stats = {"admitted": 0, "rejected": 0, "judged": 0, "errors": 0}
+
+
+contest_judge_service = ContestJudgeService()
@@ -0,0 +1,521 @@
+"""
+Contests with burst-safe starts and frozen scoreboards.
+
+A contest is a fixed problem set open for submissions between
+``starts_at`` and ``ends_at``. When it starts, every participant reads
+the same few problems and submits within the same minute, so contests
+keep that burst away from the database and from practice traffic:
+
+* Problem sets are warmed into memory from ``CONTEST_WARM_AHEAD`` seconds
+  before the start. ``get_problem`` serves contest problems as
+  pre-serialized JSON without a query, and contest submissions are
+  checked against the cached contest without one.
+* Contest submissions are judged from a bounded queue in the database by
+  workers of their own, in the API or in separate processes (see
+  ``app.services.contest_judge_service``). Admission control turns excess
+  submitters away with a Retry-After while the queue is full or the API
+  process is short of CPU, instead of letting them crowd out practice
+  requests.
+* The judge rebuilds ``contest_result``, one row per user and problem,
+  from that user's contest submissions on every verdict. Every
+  ``CONTEST_REFRESH_INTERVAL`` seconds the standings are materialized
+  from those rows into ``contest_scoreboard_snapshot``, and the
+  scoreboard is served from the latest snapshot in memory; no scoreboard
+  read touches submissions. From ``freeze_at`` until the end, snapshots
+  only count earlier solves.
+
+Standings rank by points (``DIFFICULTY_POINTS`` per solved problem), then
+by penalty: minutes from the start to each solve plus
+``PENALTY_MINUTES`` per rejected attempt before it.
+
+The periodic refresh runs on the primary engine the app binds at startup
+(``bind``), so problem sets are warm again right after a restart. With
+several API workers each keeps its own caches, but only one writes each
+snapshot: materializing locks the contest row, and a periodic refresh
+that then finds a snapshot taken less than half an interval ago (by
+another worker) loads it instead. Editing a problem evicts it only from
+the cache of the worker that served the edit; the others serve the
+previous body and ETag until their next refresh, at most
+``CONTEST_REFRESH_INTERVAL`` seconds later.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.routing import primary_bind
+from app.db.upsert import insert_missing
+from app.models.contest import (
+    Contest,
+    ContestResult,
+    ContestScoreboardSnapshot,
+    contest_problem,
+)
+from app.models.problem import Problem
+from app.models.submission import Submission, SubmissionStatus
+from app.services.leaderboard_service import (
+    DIFFICULTY_POINTS,
+    leaderboard_service,
+)
+
+# Minutes added to a solve's time per rejected attempt before it
+PENALTY_MINUTES = 20
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """An aware UTC datetime (SQLite hands back naive UTC values)."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class ContestInfo(NamedTuple):
+    id: int
+    starts_at: datetime
+    ends_at: datetime
+    freeze_at: Optional[datetime]
+    problem_ids: Tuple[int, ...]
+    # Points per solved problem
+    points: Dict[int, int]
+
+    def running(self, now: datetime) -> bool:
+        return self.starts_at <= now < self.ends_at
+
+    def frozen(self, now: datetime) -> bool:
+        return self.freeze_at is not None and self.freeze_at <= now < (
+            self.ends_at
+        )
+
+
+class CachedProblem(NamedTuple):
+    # The problem as the get_problem response body
+    body: bytes
+    version_hash: Optional[str]
+
+
+class Scoreboard(NamedTuple):
+    contest_id: int
+    # None until the first snapshot is materialized
+    taken_at: Optional[datetime]
+    frozen: bool
+    entries: List[Dict]
+    # time.monotonic() when this process loaded or materialized it
+    loaded_at: float
+
+
+class ContestService:
+    def __init__(self) -> None:
+        self._contests: Dict[int, ContestInfo] = {}
+        self._problems: Dict[int, CachedProblem] = {}
+        self._scoreboards: Dict[int, Scoreboard] = {}
+        self._bind: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    def bind(self, engine: Engine) -> None:
+        """Use ``engine`` (the primary) for the periodic refresh."""
+        self._bind = engine
+
+    def create(
+        self,
+        db: Session,
+        *,
+        title: str,
+        starts_at: datetime,
+        ends_at: datetime,
+        freeze_at: Optional[datetime],
+        problem_ids: List[int],
+    ) -> Contest:
+        contest = Contest(
+            title=title,
+            starts_at=as_utc(starts_at),
+            ends_at=as_utc(ends_at),
+            freeze_at=as_utc(freeze_at),
+        )
+        db.add(contest)
+        db.flush()
+        db.execute(
+            insert(contest_problem),
+            [
+                {
+                    "contest_id": contest.id,
+                    "problem_id": problem_id,
+                    "position": position,
+                }
+                for position, problem_id in enumerate(problem_ids)
+            ],
+        )
+        db.commit()
+        db.refresh(contest)
+        self._bind = self._bind or primary_bind(db)
+        return contest
+
+    def get(self, db: Session, *, contest_id: int) -> Optional[ContestInfo]:
+        """A contest, cached after the first lookup (contests don't change)."""
+        self._bind = self._bind or primary_bind(db)
+        contest = self._contests.get(contest_id)
+        if contest is not None:
+            return contest
+        row = db.get(Contest, contest_id)
+        return self._cache_contest(row) if row is not None else None
+
+    def list_contests(
+        self, db: Session, *, skip: int = 0, limit: int = 20
+    ) -> List[Contest]:
+        """Contests, latest start first."""
+        self._bind = self._bind or primary_bind(db)
+        return (
+            db.execute(
+                select(Contest)
+                .order_by(Contest.starts_at.desc(), Contest.id.desc())
+                .offset(skip)
+                .limit(limit)
+            )
+            .scalars()
+            .all()
+        )
+
+    def cached_problem(self, problem_id: int) -> Optional[CachedProblem]:
+        return self._problems.get(problem_id)
+
+    def evict_problem(self, problem_id: int) -> None:
+        """
+        Forget a changed problem; the next refresh caches it again. Only
+        this process's cache: other API workers keep serving the old
+        version until their next refresh.
+        """
+        with self._lock:
+            self._problems.pop(problem_id, None)
+
+    def record_verdict(
+        self,
+        db: Session,
+        *,
+        submission: Submission,
+        previous_status: Optional[SubmissionStatus],
+    ) -> None:
+        """
+        Rebuild the ``contest_result`` row of a contest submission's user
+        and problem from their contest submissions. The caller commits.
+
+        The problem is solved at the earliest accepted submission, and
+        every judged submission created before that one is a failed
+        attempt, whatever order the judge workers finish them in.
+        """
+        if submission.contest_id is None:
+            return
+        same_problem = (
+            Submission.contest_id == submission.contest_id,
+            Submission.user_id == submission.user_id,
+            Submission.problem_id == submission.problem_id,
+        )
+        query = db.query(ContestResult).filter(
+            ContestResult.contest_id == submission.contest_id,
+            ContestResult.user_id == submission.user_id,
+            ContestResult.problem_id == submission.problem_id,
+        )
+        # Locked first, so that concurrent verdicts of the same user and
+        # problem rebuild it one after the other
+        row = query.with_for_update().first()
+        if row is None:
+            insert_missing(
+                db,
+                ContestResult.__table__,
+                {
+                    "contest_id": submission.contest_id,
+                    "user_id": submission.user_id,
+                    "problem_id": submission.problem_id,
+                    "failed_attempts": 0,
+                },
+            )
+            row = query.with_for_update().one()
+        db.flush()
+
+        # Ties on created_at (second resolution on some databases) are
+        # broken by id
+        first_accepted = db.execute(
+            select(Submission.id, Submission.created_at)
+            .where(
+                *same_problem, Submission.status == SubmissionStatus.ACCEPTED
+            )
+            .order_by(Submission.created_at, Submission.id)
+            .limit(1)
+        ).first()
+        failed = select(func.count()).where(
+            *same_problem,
+            Submission.status.not_in(
+                (SubmissionStatus.PENDING, SubmissionStatus.ACCEPTED)
+            ),
+        )
+        if first_accepted is not None:
+            failed = failed.where(
+                or_(
+                    Submission.created_at < first_accepted.created_at,
+                    and_(
+                        Submission.created_at == first_accepted.created_at,
+                        Submission.id < first_accepted.id,
+                    ),
+                )
+            )
+        row.solved_at = first_accepted.created_at if first_accepted else None
+        row.failed_attempts = db.scalar(failed)
+
+    def refresh(
+        self, db: Optional[Session] = None, *, max_age: Optional[float] = None
+    ) -> Dict[str, int]:
+        """
+        Warm the problem sets of upcoming and running contests and
+        materialize the scoreboards of running contests (and of ended
+        ones, for ``CONTEST_FINAL_AFTER`` seconds, while the judge
+        catches up), keeping snapshots younger than ``max_age`` seconds
+        (see ``materialize``). Returns the number of problems cached and
+        scoreboards materialized.
+        """
+        if db is None:
+            if self._bind is None:
+                return {"problems": 0, "scoreboards": 0}
+            with Session(bind=self._bind) as db:
+                return self.refresh(db, max_age=max_age)
+
+        now = datetime.now(timezone.utc)
+        contests = (
+            db.execute(
+                select(Contest).where(
+                    Contest.starts_at
+                    <= now + timedelta(seconds=settings.CONTEST_WARM_AHEAD),
+                    Contest.ends_at
+                    > now - timedelta(seconds=settings.CONTEST_FINAL_AFTER),
+                )
+            )
+            .scalars()
+            .all()
+        )
+        problems: Dict[int, CachedProblem] = {}
+        due: List[ContestInfo] = []
+        for contest in contests:
+            info = self._cache_contest(contest)
+            if now < info.ends_at:
+                for problem in contest.problems:
+                    problems[problem.id] = _cached_problem(problem)
+            if info.starts_at <= now:
+                due.append(info)
+        with self._lock:
+            self._problems = problems
+        for info in due:
+            self.materialize(db, info, now=now, max_age=max_age)
+        return {"problems": len(problems), "scoreboards": len(due)}
+
+    def materialize(
+        self,
+        db: Session,
+        contest: ContestInfo,
+        *,
+        now: Optional[datetime] = None,
+        max_age: Optional[float] = None,
+    ) -> Scoreboard:
+        """
+        Rank ``contest_result`` and store it as the scoreboard snapshot.
+        Snapshots of a contest are written one at a time (the contest row
+        is locked until the commit); with ``max_age``, a snapshot taken
+        less than that many seconds before ``now``, as of the same freeze
+        state, is loaded instead of written again.
+        """
+        now = now or datetime.now(timezone.utc)
+        frozen = contest.frozen(now)
+        table = ContestScoreboardSnapshot.__table__
+        db.execute(
+            select(Contest.id)
+            .where(Contest.id == contest.id)
+            .with_for_update()
+        )
+        if max_age is not None:
+            taken_at = as_utc(
+                db.scalar(
+                    select(func.max(table.c.taken_at)).where(
+                        table.c.contest_id == contest.id
+                    )
+                )
+            )
+            if (
+                taken_at is not None
+                and (now - taken_at).total_seconds() < max_age
+                and contest.frozen(taken_at) == frozen
+            ):
+                # Releases the lock
+                db.commit()
+                return self._load_scoreboard(db, contest)
+
+        standings: Dict[int, Tuple[int, int, int]] = {}
+        for user_id, problem_id, failed_attempts, solved_at in db.execute(
+            select(
+                ContestResult.user_id,
+                ContestResult.problem_id,
+                ContestResult.failed_attempts,
+                ContestResult.solved_at,
+            ).where(
+                ContestResult.contest_id == contest.id,
+                ContestResult.solved_at.is_not(None),
+            )
+        ):
+            solved_at = as_utc(solved_at)
+            if frozen and solved_at >= contest.freeze_at:
+                continue
+            minutes = int(
+                (solved_at - contest.starts_at).total_seconds() // 60
+            )
+            score, solved, penalty = standings.get(user_id, (0, 0, 0))
+            standings[user_id] = (
+                score + contest.points.get(problem_id, 0),
+                solved + 1,
+                penalty + max(minutes, 0) + PENALTY_MINUTES * failed_attempts,
+            )
+
+        usernames = leaderboard_service.usernames(db, standings)
+        entries: List[Dict] = []
+        rank, previous = 0, None
+        for position, (user_id, (score, solved, penalty)) in enumerate(
+            sorted(
+                standings.items(),
+                key=lambda item: (-item[1][0], item[1][2], item[0]),
+            ),
+            start=1,
+        ):
+            # Equal points and penalty share a rank
+            if (score, penalty) != previous:
+                rank, previous = position, (score, penalty)
+            entries.append(
+                {
+                    "rank": rank,
+                    "user_id": user_id,
+                    "username": usernames.get(user_id),
+                    "score": score,
+                    "solved": solved,
+                    "penalty": penalty,
+                }
+            )
+
+        db.execute(delete(table).where(table.c.contest_id == contest.id))
+        if entries:
+            db.execute(
+                insert(table),
+                [
+                    {**entry, "contest_id": contest.id, "taken_at": now}
+                    for entry in entries
+                ],
+            )
+        db.commit()
+        scoreboard = Scoreboard(
+            contest.id, now, frozen, entries, time.monotonic()
+        )
+        with self._lock:
+            self._scoreboards[contest.id] = scoreboard
+        return scoreboard
+
+    def scoreboard(self, db: Session, contest: ContestInfo) -> Scoreboard:
+        """
+        The latest snapshot of a contest's standings, reloaded from the
+        database at most once per refresh interval. While one request
+        reloads it, the others keep serving the previous copy.
+        """
+        cached = self._scoreboards.get(contest.id)
+        if (
+            cached is not None
+            and time.monotonic() - cached.loaded_at
+            < settings.CONTEST_REFRESH_INTERVAL
+        ):
+            return cached
+        if not self._reload_lock.acquire(blocking=cached is None):
+            return cached
+        try:
+            return self._load_scoreboard(db, contest)
+        finally:
+            self._reload_lock.release()
+
+    def reset(self) -> None:
+        """Drop all cached contests, problems and scoreboards."""
+        with self._lock:
+            self._contests = {}
+            self._problems = {}
+            self._scoreboards = {}
+            self._bind = None
+
+    def _load_scoreboard(
+        self, db: Session, contest: ContestInfo
+    ) -> Scoreboard:
+        table = ContestScoreboardSnapshot.__table__
+        rows = db.execute(
+            select(
+                table.c.rank,
+                table.c.user_id,
+                table.c.username,
+                table.c.score,
+                table.c.solved,
+                table.c.penalty,
+                table.c.taken_at,
+            )
+            .where(table.c.contest_id == contest.id)
+            .order_by(table.c.rank, table.c.user_id)
+        ).all()
+        taken_at = as_utc(rows[0].taken_at) if rows else None
+        scoreboard = Scoreboard(
+            contest.id,
+            taken_at,
+            taken_at is not None and contest.frozen(taken_at),
+            [
+                {
+                    "rank": row.rank,
+                    "user_id": row.user_id,
+                    "username": row.username,
+                    "score": row.score,
+                    "solved": row.solved,
+                    "penalty": row.penalty,
+                }
+                for row in rows
+            ],
+            time.monotonic(),
+        )
+        with self._lock:
+            self._scoreboards[contest.id] = scoreboard
+        return scoreboard
+
+    def _cache_contest(self, contest: Contest) -> ContestInfo:
+        info = ContestInfo(
+            contest.id,
+            as_utc(contest.starts_at),
+            as_utc(contest.ends_at),
+            as_utc(contest.freeze_at),
+            tuple(problem.id for problem in contest.problems),
+            {
+                problem.id: DIFFICULTY_POINTS[problem.difficulty]
+                for problem in contest.problems
+            },
+        )
+        with self._lock:
+            self._contests[contest.id] = info
+        return info
+
+
+def _cached_problem(problem: Problem) -> CachedProblem:
+    # Imported here: serialization is only needed by the API, and judge
+    # workers import this module through the submission service
+    from app.core.responses import get_adapter
+    from app.schemas.problem import Problem as ProblemSchema
+
+    adapter = get_adapter(ProblemSchema)
+    return CachedProblem(
+        adapter.dump_json(
+            adapter.validate_python(problem, from_attributes=True)
+        ),
+        problem.version_hash,
+    )
+
+
+contest_service = ContestService()
@@ -0,0 +1,286 @@
+"""
+Precomputed facet counts for the problem filter sidebar.
+
+Counts live in two small aggregate tables (``problem_facet_count`` and
+``tag_facet_count``) keyed by (problem_type, difficulty) and
+(tag, problem_type, difficulty). They are maintained by a session flush
+hook, so every insert, edit or delete of a ``Problem`` - through the API
+or directly through the ORM - adjusts the counts in the same transaction.
+Reading the facets is then a sum over at most a few hundred rows instead
+of a GROUP BY over the problem table.
+
+Counts are kept per single tag only. With two or more tags selected, the
+problem type and difficulty facets are counted by a GROUP BY over the
+problems carrying every selected tag: counts for every combination of tags
+would grow combinatorially, and a tag intersection is narrow.
+"""
+
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, insert, select, update, delete
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db.upsert import insert_missing
+from app.models.facet import ProblemFacetCount, TagFacetCount
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.tag import Tag, problem_tag
+from app.services.tag_service import tag_service
+
+# problem_id -> (problem_type, difficulty, tag ids)
+FacetState = Dict[int, Tuple[ProblemType, DifficultyLevel, FrozenSet[int]]]
+
+_BEFORE_KEY = "facet_state_before"
+
+
+def _snapshot(
+    connection: Connection, problem_ids: Iterable[int]
+) -> FacetState:
+    problem_ids = list(problem_ids)
+    if not problem_ids:
+        return {}
+    tag_ids: Dict[int, set] = {}
+    for problem_id, tag_id in connection.execute(
+        select(problem_tag.c.problem_id, problem_tag.c.tag_id).where(
+            problem_tag.c.problem_id.in_(problem_ids)
+        )
+    ):
+        tag_ids.setdefault(problem_id, set()).add(tag_id)
+    return {
+        problem_id: (
+            problem_type,
+            difficulty,
+            frozenset(tag_ids.get(problem_id, ())),
+        )
+        for problem_id, problem_type, difficulty in connection.execute(
+            select(Problem.id, Problem.problem_type, Problem.difficulty).where(
+                Problem.id.in_(problem_ids)
+            )
+        )
+    }
+
+
+def _apply_deltas(
+    session: Session, table, deltas: Counter, key_columns: List[str]
+) -> None:
+    # In key order, so that concurrent flushes lock the rows in one order
+    for key, delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        values = dict(zip(key_columns, key))
+        # A concurrent flush may create the row first: insert it if it is
+        # missing, then increment whichever row is there
+        insert_missing(session, table, {**values, "count": 0})
+        session.execute(
+            update(table)
+            .where(*(table.c[name] == value for name, value in values.items()))
+            .values(count=table.c.count + delta)
+        )
+
+
+def _problem_ids(objects: Iterable[object]) -> List[int]:
+    return [
+        obj.id
+        for obj in objects
+        if isinstance(obj, Problem) and obj.id is not None
+    ]
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_facet_state(session: Session, flush_context, instances) -> None:
+    touched = _problem_ids(list(session.dirty) + list(session.deleted))
+    if touched:
+        session.info[_BEFORE_KEY] = _snapshot(session.connection(), touched)
+
+
+@event.listens_for(Session, "after_flush")
+def _update_facet_counts(session: Session, flush_context) -> None:
+    before: FacetState = session.info.pop(_BEFORE_KEY, {})
+    new_ids = _problem_ids(session.new)
+    if not before and not new_ids:
+        return
+
+    connection = session.connection()
+    after = _snapshot(connection, list(before) + new_ids)
+
+    problem_deltas: Counter = Counter()
+    tag_deltas: Counter = Counter()
+    for state, sign in ((before, -1), (after, 1)):
+        for problem_type, difficulty, tag_ids in state.values():
+            problem_deltas[(problem_type, difficulty)] += sign
+            for tag_id in tag_ids:
+                tag_deltas[(tag_id, problem_type, difficulty)] += sign
+
+    _apply_deltas(
+        session,
+        ProblemFacetCount.__table__,
+        problem_deltas,
+        ["problem_type", "difficulty"],
+    )
+    _apply_deltas(
+        session,
+        TagFacetCount.__table__,
+        tag_deltas,
+        ["tag_id", "problem_type", "difficulty"],
+    )
+
+
+class FacetService:
+    def get_facets(
+        self,
+        db: Session,
+        *,
+        problem_type: Optional[ProblemType] = None,
+        difficulty: Optional[DifficultyLevel] = None,
+        tags: Optional[List[str]] = None,
+    ) -> Dict[str, Dict]:
+        """
+        Facet counts for the current filter selection.
+
+        Each facet is counted with every filter applied except its own
+        (disjunctive faceting), so the sidebar shows how many problems
+        each alternative value would return.
+        """
+        tag_ids = tag_service.get_ids(db, names=tags) if tags else None
+        if tags and tag_ids is None:
+            # An unknown tag matches no problems at all
+            return {
+                "problem_type": {value: 0 for value in ProblemType},
+                "difficulty": {value: 0 for value in DifficultyLevel},
+                "tags": self._tag_counts(
+                    db, problem_type=problem_type, difficulty=difficulty
+                ),
+            }
+        return {
+            "problem_type": self._enum_counts(
+                db,
+                ProblemType,
+                "problem_type",
+                filters={"difficulty": difficulty},
+                tag_ids=tag_ids,
+            ),
+            "difficulty": self._enum_counts(
+                db,
+                DifficultyLevel,
+                "difficulty",
+                filters={"problem_type": problem_type},
+                tag_ids=tag_ids,
+            ),
+            "tags": self._tag_counts(
+                db, problem_type=problem_type, difficulty=difficulty
+            ),
+        }
+
+    def _enum_counts(
+        self,
+        db: Session,
+        enum_cls,
+        facet: str,
+        *,
+        filters: Dict[str, object],
+        tag_ids: Optional[List[int]],
+    ) -> Dict:
+        """
+        Problems per value of ``facet``. Read from the precomputed counts
+        with no tag or one tag selected; with several tags, counted per
+        request from the problems carrying all of them.
+        """
+        counts = {value: 0 for value in enum_cls}
+        if tag_ids is not None and len(tag_ids) > 1:
+            # Tag intersections are not precomputed (see the module
+            # docstring)
+            table = Problem.__table__
+            query = select(table.c[facet], func.count()).where(
+                table.c.id.in_(self._problems_with_all_tags(tag_ids))
+            )
+        elif tag_ids:
+            table = TagFacetCount.__table__
+            query = select(table.c[facet], func.sum(table.c.count)).where(
+                table.c.tag_id == tag_ids[0]
+            )
+        else:
+            table = ProblemFacetCount.__table__
+            query = select(table.c[facet], func.sum(table.c.count))
+        for name, value in filters.items():
+            if value is not None:
+                query = query.where(table.c[name] == value)
+        for value, count in db.execute(query.group_by(table.c[facet])):
+            counts[value] = int(count or 0)
+        return counts
+
+    def _tag_counts(
+        self,
+        db: Session,
+        *,
+        problem_type: Optional[ProblemType],
+        difficulty: Optional[DifficultyLevel],
+    ) -> Dict[str, int]:
+        table = TagFacetCount.__table__
+        total = func.sum(table.c.count)
+        query = (
+            select(Tag.name, total)
+            .select_from(table)
+            .join(Tag, Tag.id == table.c.tag_id)
+            .group_by(Tag.name)
+            .having(total > 0)
+            .order_by(Tag.name)
+        )
+        if problem_type is not None:
+            query = query.where(table.c.problem_type == problem_type)
+        if difficulty is not None:
+            query = query.where(table.c.difficulty == difficulty)
+        return {name: int(count) for name, count in db.execute(query)}
+
+    def _problems_with_all_tags(self, tag_ids: List[int]):
+        return (
+            select(problem_tag.c.problem_id)
+            .where(problem_tag.c.tag_id.in_(tag_ids))
+            .group_by(problem_tag.c.problem_id)
+            .having(func.count() == len(set(tag_ids)))
+        )
+
+    def has_all_tags(self, tag_ids: List[int]):
+        """Condition matching problems that carry every tag."""
+        return Problem.id.in_(self._problems_with_all_tags(tag_ids))
+
+    def filter_by_tags(self, query, tag_ids: List[int]):
+        """Restrict a ``Problem`` query to problems carrying every tag."""
+        return query.filter(self.has_all_tags(tag_ids))
+
+    def rebuild(self, db: Session) -> None:
+        """Recompute all facet counts from scratch (repair / backfill)."""
+        problems = Problem.__table__
+        db.execute(delete(ProblemFacetCount.__table__))
+        db.execute(delete(TagFacetCount.__table__))
+        db.execute(
+            insert(ProblemFacetCount.__table__).from_select(
+                ["problem_type", "difficulty", "count"],
+                select(
+                    problems.c.problem_type,
+                    problems.c.difficulty,
+                    func.count(),
+                ).group_by(problems.c.problem_type, problems.c.difficulty),
+            )
+        )
+        db.execute(
+            insert(TagFacetCount.__table__).from_select(
+                ["tag_id", "problem_type", "difficulty", "count"],
+                select(
+                    problem_tag.c.tag_id,
+                    problems.c.problem_type,
+                    problems.c.difficulty,
+                    func.count(),
+                )
+                .join(problems, problems.c.id == problem_tag.c.problem_id)
+                .group_by(
+                    problem_tag.c.tag_id,
+                    problems.c.problem_type,
+                    problems.c.difficulty,
+                ),
+            )
+        )
+        db.commit()
+
+
+facet_service = FacetService()
@@ -0,0 +1,276 @@
+"""
+Daily activity rollups for profile calendars and streaks.
+
+Every submission and every change of an accepted verdict bumps one day in
+``user_activity_year``: a row per user and year holding packed uint16
+arrays of submissions and accepts per day of year. The first submission of
+a day extends the user's streaks in ``user_activity_streak``, so rendering
+a calendar reads one row of each. A submission dated before the last
+active day (backdated) rescans the user's year rows instead. ``rebuild``
+recomputes everything from submissions.
+"""
+
+import sys
+from array import array
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.upsert import insert_missing
+from app.models.heatmap import UserActivityStreak, UserActivityYear
+from app.models.submission import Submission, SubmissionStatus
+
+DAYS_PER_ROW = 366
+MAX_COUNT = 0xFFFF
+COUNTER_COLUMNS = ("submissions", "accepts")
+
+
+def _decode(blob: Optional[bytes]) -> array:
+    counts = array("H")
+    if blob:
+        counts.frombytes(blob)
+        if sys.byteorder == "big":
+            counts.byteswap()
+    else:
+        counts.extend([0] * DAYS_PER_ROW)
+    return counts
+
+
+def _encode(counts: array) -> bytes:
+    if sys.byteorder == "big":
+        counts = array("H", counts)
+        counts.byteswap()
+    return counts.tobytes()
+
+
+def _empty() -> bytes:
+    return bytes(2 * DAYS_PER_ROW)
+
+
+def _days_in_year(year: int) -> int:
+    return (date(year + 1, 1, 1) - date(year, 1, 1)).days
+
+
+def _day_of(moment: Optional[datetime]) -> date:
+    return (moment or datetime.now(timezone.utc)).date()
+
+
+def _streaks(
+    years: Iterable[Tuple[int, array]],
+) -> Tuple[int, int, Optional[date]]:
+    """
+    (run ending on the last active day, longest run, last active day) of
+    consecutive days with a submission, from (year, submissions) arrays.
+    """
+    longest = run = 0
+    last: Optional[int] = None
+    for year, counts in sorted(years, key=lambda item: item[0]):
+        first_day = date(year, 1, 1).toordinal()
+        for index in range(_days_in_year(year)):
+            if counts[index]:
+                day = first_day + index
+                run = run + 1 if last == day - 1 else 1
+                last = day
+                longest = max(longest, run)
+    return run, longest, date.fromordinal(last) if last else None
+
+
+class HeatmapService:
+    def record_submission(
+        self, db: Session, *, submission: Submission
+    ) -> None:
+        """Count a new submission. The caller commits."""
+        self._bump(
+            db,
+            user_id=submission.user_id,
+            day=_day_of(submission.created_at),
+            submissions=1,
+        )
+
+    def record_verdict(
+        self,
+        db: Session,
+        *,
+        submission: Submission,
+        previous_status: Optional[SubmissionStatus],
+    ) -> None:
+        """Count (or un-count) an accept on its submission's day."""
+        accepted = SubmissionStatus.ACCEPTED
+        delta = int(submission.status == accepted) - int(
+            previous_status == accepted
+        )
+        if delta:
+            self._bump(
+                db,
+                user_id=submission.user_id,
+                day=_day_of(submission.created_at),
+                accepts=delta,
+            )
+
+    def get_heatmap(
+        self,
+        db: Session,
+        *,
+        user_id: int,
+        year: Optional[int] = None,
+        today: Optional[date] = None,
+    ) -> Dict:
+        """Calendar for ``year`` (default: the current one) and streaks."""
+        today = today or _day_of(None)
+        year = year or today.year
+        row = db.get(UserActivityYear, (user_id, year))
+        days = _days_in_year(year)
+        submissions = _decode(row.submissions if row else None)[:days]
+        accepts = _decode(row.accepts if row else None)[:days]
+        streak = db.get(UserActivityStreak, user_id)
+        current = longest = 0
+        if streak is not None and streak.last_active_day is not None:
+            longest = streak.longest_streak
+            # A streak stays current until a whole day passes without
+            # activity
+            if (today - streak.last_active_day).days <= 1:
+                current = streak.current_streak
+        return {
+            "user_id": user_id,
+            "year": year,
+            "start_date": date(year, 1, 1),
+            "submissions": submissions.tolist(),
+            "accepts": accepts.tolist(),
+            "total_submissions": sum(submissions),
+            "total_accepts": sum(accepts),
+            "current_streak": current,
+            "longest_streak": longest,
+        }
+
+    def _bump(
+        self,
+        db: Session,
+        *,
+        user_id: int,
+        day: date,
+        submissions: int = 0,
+        accepts: int = 0,
+    ) -> None:
+        query = db.query(UserActivityYear).filter(
+            UserActivityYear.user_id == user_id,
+            UserActivityYear.year == day.year,
+        )
+        row = query.with_for_update().first()
+        if row is None:
+            # A concurrent first submission of the year may create it too
+            insert_missing(
+                db,
+                UserActivityYear.__table__,
+                {
+                    "user_id": user_id,
+                    "year": day.year,
+                    "submissions": _empty(),
+                    "accepts": _empty(),
+                },
+            )
+            row = query.with_for_update().one()
+        index = day.timetuple().tm_yday - 1
+        # Read under the row lock, so one of concurrent first submissions
+        # of the day sees it inactive
+        first_of_day = submissions > 0 and not _decode(row.submissions)[index]
+        deltas = zip(COUNTER_COLUMNS, (submissions, accepts))
+        for column, delta in deltas:
+            if delta:
+                counts = _decode(getattr(row, column))
+                counts[index] = min(max(counts[index] + delta, 0), MAX_COUNT)
+                setattr(row, column, _encode(counts))
+        if first_of_day:
+            self._extend_streak(db, user_id=user_id, day=day)
+
+    def _extend_streak(self, db: Session, *, user_id: int, day: date) -> None:
+        """Count ``day`` as newly active in the user's streaks."""
+        query = db.query(UserActivityStreak).filter(
+            UserActivityStreak.user_id == user_id
+        )
+        streak = query.with_for_update().first()
+        if streak is None:
+            insert_missing(
+                db,
+                UserActivityStreak.__table__,
+                {"user_id": user_id, "current_streak": 0, "longest_streak": 0},
+            )
+            streak = query.with_for_update().one()
+        last = streak.last_active_day
+        if last is None or day > last:
+            consecutive = last is not None and (day - last).days == 1
+            run = streak.current_streak + 1 if consecutive else 1
+            streak.current_streak = run
+            streak.longest_streak = max(streak.longest_streak, run)
+            streak.last_active_day = day
+            return
+        # A backdated submission may join two runs: rescan the user's years
+        # (their rows, including the one just bumped, are in the session)
+        rows = (
+            db.query(UserActivityYear)
+            .filter(UserActivityYear.user_id == user_id)
+            .all()
+        )
+        (
+            streak.current_streak,
+            streak.longest_streak,
+            streak.last_active_day,
+        ) = _streaks((r.year, _decode(r.submissions)) for r in rows)
+
+    def rebuild(self, db: Session) -> None:
+        """Recompute all activity rows from the submission table."""
+        accepted = Submission.status == SubmissionStatus.ACCEPTED
+        day = func.date(Submission.created_at)
+        rows: Dict[Tuple[int, int], Dict[str, array]] = {}
+        for user_id, day_value, submitted, accepts in db.execute(
+            select(
+                Submission.user_id,
+                day,
+                func.count(),
+                func.count(case((accepted, 1))),
+            ).group_by(Submission.user_id, day)
+        ):
+            if isinstance(day_value, str):
+                day_value = date.fromisoformat(day_value)
+            counts = rows.setdefault(
+                (user_id, day_value.year),
+                {name: _decode(None) for name in COUNTER_COLUMNS},
+            )
+            index = day_value.timetuple().tm_yday - 1
+            counts["submissions"][index] = min(submitted, MAX_COUNT)
+            counts["accepts"][index] = min(accepts, MAX_COUNT)
+
+        db.execute(delete(UserActivityYear.__table__))
+        db.execute(delete(UserActivityStreak.__table__))
+        values: List[Dict] = [
+            {
+                "user_id": user_id,
+                "year": year,
+                **{name: _encode(counts[name]) for name in COUNTER_COLUMNS},
+            }
+            for (user_id, year), counts in rows.items()
+        ]
+        if values:
+            db.execute(insert(UserActivityYear.__table__), values)
+
+        years: Dict[int, List[Tuple[int, array]]] = {}
+        for (user_id, year), counts in rows.items():
+            years.setdefault(user_id, []).append((year, counts["submissions"]))
+        streaks: List[Dict] = []
+        for user_id, user_years in years.items():
+            current, longest, last = _streaks(user_years)
+            streaks.append(
+                {
+                    "user_id": user_id,
+                    "current_streak": current,
+                    "longest_streak": longest,
+                    "last_active_day": last,
+                }
+            )
+        if streaks:
+            db.execute(insert(UserActivityStreak.__table__), streaks)
+        db.commit()
+
+
+heatmap_service = HeatmapService()
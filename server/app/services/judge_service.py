@@ -0,0 +1,159 @@
+"""
+Judging of stored submissions.
+
+Kept free of FastAPI (and of jose, passlib and the API schemas) so that
+judge workers importing it together with ``app.db.session`` start quickly;
+``tests/api/test_startup.py`` checks that it stays that way.
+"""
+
+import contextlib
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.metrics import (
+    JUDGE_DURATION,
+    JUDGE_QUEUE_DEPTH,
+    JUDGE_STAGE_DURATION,
+)
+from app.core.tracing import SpanContext, tracer
+from app.models.submission import Submission, SubmissionStatus
+from app.services.submission_service import submission_service
+
+# Judging stages, in order; ``queue`` is the wait before judging starts
+STAGES = ("queue", "load", "compile", "run", "check", "persist")
+# Languages run from source: their compile stage takes no time. So do
+# submissions without a language (designs and other non-code answers)
+INTERPRETED_LANGUAGES = frozenset({"python", "javascript", "ruby", "sql"})
+
+
+@contextlib.contextmanager
+def _stage(stages: Dict[str, float], name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        with tracer.span(f"judge.{name}"):
+            yield
+    finally:
+        stages[name] = time.perf_counter() - started
+
+
+class JudgeService:
+    def judge(
+        self,
+        db: Session,
+        *,
+        submission_id: int,
+        queued_at: Optional[float] = None,
+        trace_context: Optional[SpanContext] = None,
+    ) -> Dict[str, float]:
+        """
+        Judge a queued submission and record its verdict.
+
+        Returns the seconds spent in each stage: waiting in the queue (since
+        ``queued_at``, a ``time.perf_counter()`` value), loading, compiling
+        (0 for interpreted languages), running the tests, checking their
+        output and persisting the verdict. With tracing enabled the stages
+        are spans of the trace in ``trace_context``, the submission's.
+        """
+        JUDGE_QUEUE_DEPTH.dec()
+        stages: Dict[str, float] = {}
+        started_ns = time.time_ns()
+        if queued_at is not None:
+            stages["queue"] = time.perf_counter() - queued_at
+            started_ns -= int(stages["queue"] * 1e9)
+        # Detached from whatever span is current (the request's, for
+        # background tasks); the trace continues from the submission only
+        with tracer.use(None), tracer.span(
+            "judge",
+            parent=trace_context,
+            start_ns=started_ns,
+            attributes={"submission.id": submission_id},
+        ), JUDGE_DURATION.time():
+            if "queue" in stages:
+                queue = tracer.start_span("judge.queue", start_ns=started_ns)
+                if queue is not None:
+                    queue.end()
+            self._judge(db, submission_id, stages)
+        for stage, seconds in stages.items():
+            JUDGE_STAGE_DURATION.observe(seconds, stage)
+        return stages
+
+    def _judge(
+        self, db: Session, submission_id: int, stages: Dict[str, float]
+    ) -> None:
+        with _stage(stages, "load"):
+            submission = submission_service.get(
+                db, submission_id=submission_id
+            )
+
+        if not submission:
+            return
+
+        language = submission.language
+        if language is None or language in INTERPRETED_LANGUAGES:
+            stages["compile"] = 0.0
+        else:
+            with _stage(stages, "compile"):
+                self._compile(submission)
+
+        with _stage(stages, "run"):
+            test_cases = self._run_tests(submission)
+
+        with _stage(stages, "check"):
+            status, score, results = self._check(test_cases)
+
+        with _stage(stages, "persist"):
+            submission_service.record_verdict(
+                db,
+                submission=submission,
+                status=status,
+                score=score,
+                results=results,
+            )
+
+    def _compile(self, submission: Submission) -> None:
+        # In a real implementation, this would build the submission in its
+        # sandbox (e.g., a Docker container) once, before running the
+        # tests. For now, builds take no time.
+        pass
+
+    def _run_tests(self, submission: Submission) -> List[Dict[str, Any]]:
+        # In a real implementation, this would run the code against the
+        # problem's test cases in the sandbox and collect their output.
+        # For now, we mock a successful run.
+        return [
+            {
+                "name": "Basic Test",
+                "passed": True,
+                "executionTime": 0.05,
+                "memoryUsed": 2048,
+            }
+        ]
+
+    def _check(
+        self, test_cases: List[Dict[str, Any]]
+    ) -> Tuple[SubmissionStatus, float, Dict[str, Any]]:
+        """The verdict, score and results of a run's test cases."""
+        passed = sum(1 for case in test_cases if case["passed"])
+        total = len(test_cases)
+        status = (
+            SubmissionStatus.ACCEPTED
+            if total and passed == total
+            else SubmissionStatus.REJECTED
+        )
+        return (
+            status,
+            100.0 * passed / total if total else 0.0,
+            {
+                "testCases": test_cases,
+                "summary": {
+                    "totalTests": total,
+                    "passedTests": passed,
+                    "failedTests": total - passed,
+                },
+            },
+        )
+
+
+judge_service = JudgeService()
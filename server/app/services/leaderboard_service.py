@@ -0,0 +1,392 @@
+"""
+In-memory leaderboards with O(log n) rank queries.
+
+Each scope ("global", one per ``ProblemType``, and one per contest) keeps
+a Fenwick tree over integer score buckets plus, per bucket, the sorted ids
+of the users holding that score. The tree answers "how many users score
+above s" and "which score holds the k-th place" in O(log S), so top-K,
+a user's rank and the users around them never touch the database.
+
+Scores are points for solved problems, weighted by difficulty. Boards are
+loaded lazily from the last ``leaderboard_snapshot`` (users whose progress
+changed since the snapshot are re-scored) or, without a snapshot, built
+from ``user_problem_progress``. After that the judge keeps them current:
+``SubmissionService.record_verdict`` reports every change to a user's
+solved set once it is committed. The app snapshots dirty boards
+periodically and on shutdown.
+
+Boards live in the process that records verdicts; with several API
+workers each one loads its own copy from the database.
+"""
+
+import bisect
+import threading
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.routing import primary_bind
+from app.models.leaderboard import LeaderboardSnapshot
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.progress import UserProgress, UserProblemProgress
+from app.models.user import User
+from app.services.progress_service import SolvedChange
+
+GLOBAL_SCOPE = "global"
+
+# Points per solved problem
+DIFFICULTY_POINTS = {
+    DifficultyLevel.EASY: 1,
+    DifficultyLevel.MEDIUM: 2,
+    DifficultyLevel.HARD: 3,
+    DifficultyLevel.EXPERT: 5,
+}
+
+# Progress rows updated this long before a snapshot was taken are still
+# re-scored on load, covering clock differences between app and database
+SNAPSHOT_CLOCK_SKEW = timedelta(seconds=5)
+
+# (rank, user_id, score)
+Entry = Tuple[int, int, int]
+
+
+def contest_scope(contest_id: int) -> str:
+    return f"contest:{contest_id}"
+
+
+def _derived_scopes() -> List[str]:
+    return [GLOBAL_SCOPE] + [t.value for t in ProblemType]
+
+
+class _Fenwick:
+    """Binary indexed tree of user counts per score."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, index: int, delta: int) -> None:
+        index += 1
+        while index <= self.size:
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index: int) -> int:
+        """Number of users with a score <= index."""
+        index = min(index, self.size - 1) + 1
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def find(self, k: int) -> int:
+        """Smallest score whose prefix count reaches k (1-based)."""
+        position = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = position + step
+            if nxt <= self.size and self.tree[nxt] < k:
+                position = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return position
+
+
+class Leaderboard:
+    """
+    One ranked scope. Users are ordered by score descending, then by user
+    id; equal scores share a rank (1, 2, 2, 4).
+    """
+
+    def __init__(self, scope: str, capacity: int = 1024) -> None:
+        self.scope = scope
+        self._scores: Dict[int, int] = {}
+        self._buckets: Dict[int, List[int]] = {}
+        self._tree = _Fenwick(capacity)
+        self._lock = threading.RLock()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def score(self, user_id: int) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def set_score(self, user_id: int, score: int) -> None:
+        """Place a user at ``score``; a score of 0 removes them."""
+        with self._lock:
+            old = self._scores.get(user_id)
+            if old == score or (old is None and score <= 0):
+                return
+            if old is not None:
+                bucket = self._buckets[old]
+                bucket.pop(bisect.bisect_left(bucket, user_id))
+                if not bucket:
+                    del self._buckets[old]
+                self._tree.add(old, -1)
+                del self._scores[user_id]
+            if score > 0:
+                if score >= self._tree.size:
+                    self._grow(score)
+                bisect.insort(self._buckets.setdefault(score, []), user_id)
+                self._tree.add(score, 1)
+                self._scores[user_id] = score
+            self.dirty = True
+
+    def add(self, user_id: int, delta: int) -> None:
+        with self._lock:
+            self.set_score(user_id, self._scores.get(user_id, 0) + delta)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None:
+                return None
+            return self._above(score) + 1
+
+    def top(self, k: int) -> List[Entry]:
+        with self._lock:
+            return self._range(1, min(k, len(self._scores)))
+
+    def around(self, user_id: int, radius: int) -> List[Entry]:
+        """The user and up to ``radius`` users on either side."""
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None:
+                return []
+            position = (
+                self._above(score)
+                + bisect.bisect_left(self._buckets[score], user_id)
+                + 1
+            )
+            return self._range(
+                max(1, position - radius),
+                min(len(self._scores), position + radius),
+            )
+
+    def items(self) -> List[Tuple[int, int]]:
+        with self._lock:
+            return list(self._scores.items())
+
+    def _above(self, score: int) -> int:
+        """Number of users scoring strictly more than ``score``."""
+        return len(self._scores) - self._tree.prefix(score)
+
+    def _range(self, first: int, last: int) -> List[Entry]:
+        """Entries at positions first..last (1-based, best first)."""
+        entries: List[Entry] = []
+        position = first
+        while position <= last:
+            # The position-th best is the (n - position + 1)-th smallest
+            score = self._tree.find(len(self._scores) - position + 1)
+            above = self._above(score)
+            bucket = self._buckets[score]
+            for user_id in bucket[position - above - 1 :]:
+                if position > last:
+                    break
+                entries.append((above + 1, user_id, score))
+                position += 1
+        return entries
+
+    def _grow(self, score: int) -> None:
+        size = self._tree.size
+        while size <= score:
+            size *= 2
+        self._tree = _Fenwick(size)
+        for bucket_score, bucket in self._buckets.items():
+            self._tree.add(bucket_score, len(bucket))
+
+
+class LeaderboardService:
+    def __init__(self) -> None:
+        self._boards: Dict[str, Leaderboard] = {}
+        self._bind: Optional[Engine] = None
+        self._lock = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._bind is not None
+
+    def get_board(self, db: Session, scope: str) -> Optional[Leaderboard]:
+        """The board for a scope, or None if the scope is unknown."""
+        self._ensure_loaded(db)
+        return self._boards.get(scope)
+
+    def create_board(self, db: Session, scope: str) -> Leaderboard:
+        """Get or create an explicitly managed board (e.g. a contest)."""
+        self._ensure_loaded(db)
+        with self._lock:
+            return self._boards.setdefault(scope, Leaderboard(scope))
+
+    def usernames(
+        self, db: Session, user_ids: Iterable[int]
+    ) -> Dict[int, str]:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        return dict(
+            db.execute(
+                select(User.id, User.username).where(User.id.in_(user_ids))
+            ).all()
+        )
+
+    def apply_change(self, db: Session, change: SolvedChange) -> None:
+        """
+        Re-score a user after a committed change to their solved set.
+
+        The user's scores are read back rather than adjusted by a delta,
+        so applying a change the boards were loaded with is harmless.
+        """
+        if not self.loaded:
+            # The first read loads the boards with this change included
+            return
+        with self._lock:
+            self._set_scores(
+                self._score_users(db, [change.user_id]),
+                [change.user_id],
+                scopes=[GLOBAL_SCOPE, change.problem_type.value],
+            )
+
+    def reset(self) -> None:
+        """Drop all boards; the next read loads them again."""
+        with self._lock:
+            self._boards = {}
+            self._bind = None
+
+    def rebuild(self, db: Session) -> None:
+        """Rank every user from ``user_problem_progress`` (no snapshot)."""
+        with self._lock:
+            contests = {
+                scope: board
+                for scope, board in self._boards.items()
+                if scope not in _derived_scopes()
+            }
+            self._boards = {
+                scope: Leaderboard(scope) for scope in _derived_scopes()
+            }
+            self._boards.update(contests)
+            self._set_scores(self._score_users(db), None)
+            self._bind = primary_bind(db)
+
+    def snapshot(self) -> int:
+        """Write dirty boards to ``leaderboard_snapshot``; returns rows."""
+        with self._lock:
+            if not self.loaded:
+                return 0
+            dirty = [board for board in self._boards.values() if board.dirty]
+            if not dirty:
+                return 0
+            taken_at = datetime.now(timezone.utc)
+            table = LeaderboardSnapshot.__table__
+            written = 0
+            with Session(bind=self._bind) as db:
+                for board in dirty:
+                    rows = [
+                        {
+                            "scope": board.scope,
+                            "user_id": user_id,
+                            "score": score,
+                            "taken_at": taken_at,
+                        }
+                        for user_id, score in board.items()
+                    ]
+                    db.execute(
+                        delete(table).where(table.c.scope == board.scope)
+                    )
+                    if rows:
+                        db.execute(insert(table), rows)
+                    written += len(rows)
+                db.commit()
+            for board in dirty:
+                board.dirty = False
+            return written
+
+    def _ensure_loaded(self, db: Session) -> None:
+        if self.loaded:
+            return
+        with self._lock:
+            if not self.loaded:
+                self._load(db)
+
+    def _load(self, db: Session) -> None:
+        table = LeaderboardSnapshot.__table__
+        taken_at = db.execute(select(func.min(table.c.taken_at))).scalar()
+        if taken_at is None:
+            self.rebuild(db)
+            return
+
+        boards: Dict[str, Leaderboard] = {
+            scope: Leaderboard(scope) for scope in _derived_scopes()
+        }
+        for scope, user_id, score in db.execute(
+            select(table.c.scope, table.c.user_id, table.c.score)
+        ):
+            boards.setdefault(scope, Leaderboard(scope)).set_score(
+                user_id, score
+            )
+        for board in boards.values():
+            board.dirty = False
+        self._boards = boards
+
+        # Catch up with verdicts recorded after the snapshot
+        stale = (
+            db.execute(
+                select(UserProgress.user_id).where(
+                    UserProgress.updated_at >= taken_at - SNAPSHOT_CLOCK_SKEW
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if stale:
+            self._set_scores(self._score_users(db, stale), stale)
+        self._bind = primary_bind(db)
+
+    def _score_users(
+        self, db: Session, user_ids: Optional[List[int]] = None
+    ) -> Dict[str, Dict[int, int]]:
+        """Derived-scope scores, from solved problems, per scope and user."""
+        progress = UserProblemProgress.__table__
+        query = (
+            select(
+                progress.c.user_id,
+                Problem.problem_type,
+                Problem.difficulty,
+                func.count(),
+            )
+            .join(Problem, Problem.id == progress.c.problem_id)
+            .where(progress.c.solved.is_(True))
+            .group_by(
+                progress.c.user_id, Problem.problem_type, Problem.difficulty
+            )
+        )
+        if user_ids is not None:
+            query = query.where(progress.c.user_id.in_(user_ids))
+        scores: Dict[str, Dict[int, int]] = {
+            scope: {} for scope in _derived_scopes()
+        }
+        for user_id, problem_type, difficulty, solved in db.execute(query):
+            points = DIFFICULTY_POINTS[difficulty] * solved
+            for scope in (GLOBAL_SCOPE, problem_type.value):
+                scores[scope][user_id] = scores[scope].get(user_id, 0) + points
+        return scores
+
+    def _set_scores(
+        self,
+        scores: Dict[str, Dict[int, int]],
+        user_ids: Optional[List[int]],
+        scopes: Optional[List[str]] = None,
+    ) -> None:
+        """Apply scores; listed users missing from ``scores`` drop to 0."""
+        for scope in scopes or _derived_scopes():
+            board = self._boards.setdefault(scope, Leaderboard(scope))
+            scope_scores = scores.get(scope, {})
+            for user_id in user_ids if user_ids is not None else scope_scores:
+                board.set_score(user_id, scope_scores.get(user_id, 0))
+
+
+leaderboard_service = LeaderboardService()
@@ -0,0 +1,142 @@
+"""
+Streaming NDJSON import and export of the problem bank.
+
+Import validates one line at a time and inserts in batches, one
+transaction per batch, so a bad record only fails its own line and memory
+stays bounded by the batch size. Export walks a server-side cursor in
+chunks and yields one JSON document per line.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+from pydantic import ValidationError
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.problem import Problem
+from app.models.tag import Tag, problem_tag
+from app.schemas.problem import ProblemCreate
+from app.services import facet_service  # noqa: F401  (flush hooks)
+from app.services import problem_version_service  # noqa: F401
+from app.services.tag_service import tag_service
+
+EXPORT_COLUMNS = (
+    "id",
+    "title",
+    "description",
+    "problem_type",
+    "difficulty",
+    "problem_metadata",
+    "created_at",
+    "updated_at",
+)
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'record'}: {err['msg']}"
+        for err in exc.errors()
+    )
+
+
+class ProblemIOService:
+    max_reported_errors = 100
+
+    def import_ndjson(
+        self,
+        db: Session,
+        lines: Iterable[Union[str, bytes]],
+        *,
+        batch_size: int,
+    ) -> Dict:
+        report: Dict = {"imported": 0, "failed": 0, "errors": []}
+        batch: List[Tuple[int, ProblemCreate]] = []
+        for line_no, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = ProblemCreate.model_validate_json(line)
+            except ValidationError as exc:
+                self._add_error(report, line_no, _format_validation_error(exc))
+                continue
+            batch.append((line_no, record))
+            if len(batch) >= batch_size:
+                self._insert_batch(db, batch, report)
+                batch = []
+        if batch:
+            self._insert_batch(db, batch, report)
+        return report
+
+    def _insert_batch(
+        self,
+        db: Session,
+        batch: List[Tuple[int, ProblemCreate]],
+        report: Dict,
+    ) -> None:
+        try:
+            names = [name for _, rec in batch for name in rec.tags]
+            tags = {
+                tag.name: tag
+                for tag in tag_service.get_or_create_many(db, names=names)
+            }
+            db.add_all(
+                Problem(
+                    title=rec.title,
+                    description=rec.description,
+                    problem_type=rec.problem_type,
+                    difficulty=rec.difficulty,
+                    problem_metadata=rec.problem_metadata,
+                    tags=[tags[n] for n in tag_service.normalize(rec.tags)],
+                )
+                for _, rec in batch
+            )
+            db.commit()
+            report["imported"] += len(batch)
+        except SQLAlchemyError as exc:
+            db.rollback()
+            for line_no, _ in batch:
+                self._add_error(report, line_no, f"database error: {exc}")
+        finally:
+            # Don't let the identity map grow with the whole bank
+            db.expunge_all()
+
+    def _add_error(self, report: Dict, line_no: int, error: str) -> None:
+        report["failed"] += 1
+        if len(report["errors"]) < self.max_reported_errors:
+            report["errors"].append({"line": line_no, "error": error})
+
+    def export_ndjson(
+        self, db: Session, *, chunk_size: int = 1000
+    ) -> Iterator[bytes]:
+        table = Problem.__table__
+        result = db.execute(
+            select(*(table.c[name] for name in EXPORT_COLUMNS))
+            .order_by(table.c.id)
+            .execution_options(stream_results=True, max_row_buffer=chunk_size)
+        )
+        for rows in result.partitions(chunk_size):
+            tags = self._tag_names(db, [row.id for row in rows])
+            for row in rows:
+                record = dict(row._mapping)
+                record["tags"] = tags.get(row.id, [])
+                yield to_json(record) + b"\n"
+
+    def _tag_names(
+        self, db: Session, problem_ids: List[int]
+    ) -> Dict[int, List[str]]:
+        tags: Dict[int, List[str]] = defaultdict(list)
+        for problem_id, name in db.execute(
+            select(problem_tag.c.problem_id, Tag.name)
+            .join(Tag, Tag.id == problem_tag.c.tag_id)
+            .where(problem_tag.c.problem_id.in_(problem_ids))
+            .order_by(Tag.name)
+        ):
+            tags[problem_id].append(name)
+        return tags
+
+
+problem_io_service = ProblemIOService()
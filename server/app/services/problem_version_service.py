@@ -0,0 +1,173 @@
+"""
+Immutable, content-addressed problem versions.
+
+A flush hook snapshots every inserted or edited ``Problem`` into
+``problem_version`` keyed by a SHA-256 of its content, numbered after the
+problem's latest version under a lock of the problem row, and moves the
+problem's ``version_hash`` head pointer. Versions never change once
+written, so anything keyed by a version hash (judge test-set caches, HTTP
+caches, verdict caches) can be cached forever; only the head pointer of a
+problem ever needs invalidating.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.problem import Problem
+from app.models.problem_version import ProblemVersion
+
+# Problem columns that make up a version's content
+CONTENT_COLUMNS = (
+    "title",
+    "description",
+    "problem_type",
+    "difficulty",
+    "problem_metadata",
+)
+
+
+def content_hash(problem_id: int, content: Dict[str, Any]) -> str:
+    """SHA-256 over the canonical JSON form of a problem's content."""
+    payload = {"problem_id": problem_id}
+    payload.update((name, content[name]) for name in CONTENT_COLUMNS)
+    encoded = json.dumps(
+        payload,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _snapshot_versions(
+    connection: Connection, problem_ids: Iterable[int]
+) -> Dict[int, str]:
+    """
+    Create versions for the current content of the given problems and
+    move their head pointers. Returns the new hash per changed problem.
+    """
+    problem_ids = list(problem_ids)
+    if not problem_ids:
+        return {}
+    problems = Problem.__table__
+    versions = ProblemVersion.__table__
+
+    # Locked until the commit, so that concurrent edits of a problem number
+    # their versions one after the other: the next version is only read
+    # (max + 1) and written under the problem's row lock
+    rows = connection.execute(
+        select(
+            problems.c.id,
+            problems.c.version_hash,
+            *(problems.c[name] for name in CONTENT_COLUMNS),
+        )
+        .where(problems.c.id.in_(problem_ids))
+        .order_by(problems.c.id)
+        .with_for_update()
+    ).all()
+    hashes = {row.id: content_hash(row.id, row._mapping) for row in rows}
+    changed = [row for row in rows if hashes[row.id] != row.version_hash]
+    if not changed:
+        return {}
+
+    existing = set(
+        connection.execute(
+            select(versions.c.content_hash).where(
+                versions.c.content_hash.in_(
+                    [hashes[row.id] for row in changed]
+                )
+            )
+        ).scalars()
+    )
+    latest = dict(
+        connection.execute(
+            select(versions.c.problem_id, func.max(versions.c.version))
+            .where(versions.c.problem_id.in_([row.id for row in changed]))
+            .group_by(versions.c.problem_id)
+        ).all()
+    )
+    new_versions = [
+        {
+            "problem_id": row.id,
+            "version": (latest.get(row.id) or 0) + 1,
+            "content_hash": hashes[row.id],
+            **{name: row._mapping[name] for name in CONTENT_COLUMNS},
+        }
+        for row in changed
+        # Reverting to earlier content points back at the existing version
+        if hashes[row.id] not in existing
+    ]
+    if new_versions:
+        connection.execute(insert(versions), new_versions)
+    for row in changed:
+        connection.execute(
+            update(problems)
+            .where(problems.c.id == row.id)
+            .values(version_hash=hashes[row.id])
+        )
+    return {row.id: hashes[row.id] for row in changed}
+
+
+@event.listens_for(Session, "after_flush")
+def _version_problems(session: Session, flush_context) -> None:
+    problems = {
+        obj.id: obj
+        for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, Problem)
+        and obj.id is not None
+        and obj not in session.deleted
+    }
+    if not problems:
+        return
+    changed = _snapshot_versions(session.connection(), problems)
+    for problem_id, version_hash in changed.items():
+        set_committed_value(problems[problem_id], "version_hash", version_hash)
+
+
+class ProblemVersionService:
+    def get_by_hash(
+        self, db: Session, *, content_hash: str
+    ) -> Optional[ProblemVersion]:
+        return (
+            db.query(ProblemVersion)
+            .filter(ProblemVersion.content_hash == content_hash)
+            .first()
+        )
+
+    def list_for_problem(
+        self, db: Session, *, problem_id: int
+    ) -> List[ProblemVersion]:
+        return (
+            db.query(ProblemVersion)
+            .filter(ProblemVersion.problem_id == problem_id)
+            .order_by(ProblemVersion.version.desc())
+            .all()
+        )
+
+    def backfill(self, db: Session, *, batch_size: int = 500) -> int:
+        """Create head versions for problems that don't have one yet."""
+        created = 0
+        while True:
+            problem_ids = (
+                db.execute(
+                    select(Problem.id)
+                    .where(Problem.version_hash.is_(None))
+                    .limit(batch_size)
+                )
+                .scalars()
+                .all()
+            )
+            if not problem_ids:
+                return created
+            created += len(_snapshot_versions(db.connection(), problem_ids))
+            db.commit()
+
+
+problem_version_service = ProblemVersionService()
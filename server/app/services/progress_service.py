@@ -0,0 +1,253 @@
+"""
+Incrementally maintained user progress aggregates.
+
+The judge calls ``apply_verdict`` in the same transaction that stores a
+verdict, so ``user_progress`` (one row per user) and
+``user_problem_progress`` (one row per user and problem) never drift from
+the submissions they summarize. Profile pages then read a single row by
+primary key instead of scanning a user's submissions. ``rebuild``
+recomputes everything from the submission table (backfill / repair).
+"""
+
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import and_, case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db.upsert import insert_missing
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.progress import UserProgress, UserProblemProgress
+from app.models.submission import Submission, SubmissionStatus
+
+
+def _solved_column(value) -> str:
+    return f"solved_{value.value}"
+
+
+class SolvedChange(NamedTuple):
+    """A problem entering (+1) or leaving (-1) a user's solved set."""
+
+    user_id: int
+    problem_type: ProblemType
+    difficulty: DifficultyLevel
+    delta: int
+
+
+class ProgressService:
+    def get(self, db: Session, *, user_id: int) -> Optional[UserProgress]:
+        return db.get(UserProgress, user_id)
+
+    def list_problems(
+        self, db: Session, *, user_id: int
+    ) -> List[UserProblemProgress]:
+        return (
+            db.query(UserProblemProgress)
+            .filter(UserProblemProgress.user_id == user_id)
+            .order_by(UserProblemProgress.problem_id)
+            .all()
+        )
+
+    def to_dict(self, user_id: int, row: Optional[UserProgress]) -> Dict:
+        """Shape a progress row (or no row yet) for the API."""
+
+        def count(column: str) -> int:
+            return getattr(row, column) or 0 if row is not None else 0
+
+        return {
+            "user_id": user_id,
+            "attempts_total": count("attempts_total"),
+            "solved_total": count("solved_total"),
+            "solved_by_type": {
+                t: count(_solved_column(t)) for t in ProblemType
+            },
+            "solved_by_difficulty": {
+                d: count(_solved_column(d)) for d in DifficultyLevel
+            },
+        }
+
+    def apply_verdict(
+        self,
+        db: Session,
+        *,
+        submission: Submission,
+        previous_status: Optional[SubmissionStatus],
+    ) -> Optional[SolvedChange]:
+        """
+        Fold a verdict into the aggregates. The caller commits.
+
+        A first verdict (the submission was pending) is applied as an
+        increment. Re-judging an already judged submission recomputes the
+        user's row for that problem from its submissions. Returns the
+        change to the user's solved set, if any.
+        """
+        query = db.query(UserProblemProgress).filter(
+            UserProblemProgress.user_id == submission.user_id,
+            UserProblemProgress.problem_id == submission.problem_id,
+        )
+        row = query.with_for_update().first()
+        if row is None:
+            insert_missing(
+                db,
+                UserProblemProgress.__table__,
+                {
+                    "user_id": submission.user_id,
+                    "problem_id": submission.problem_id,
+                    "attempts": 0,
+                    "solved": False,
+                },
+            )
+            row = query.with_for_update().one()
+        old_attempts, was_solved = row.attempts, row.solved
+
+        first_verdict = (
+            previous_status in (None, SubmissionStatus.PENDING)
+            and submission.status != SubmissionStatus.PENDING
+        )
+        if first_verdict:
+            row.attempts += 1
+            if submission.score is not None:
+                row.best_score = max(row.best_score or 0, submission.score)
+            if row.last_submitted_at is None or (
+                submission.created_at
+                and submission.created_at > row.last_submitted_at
+            ):
+                row.last_submitted_at = submission.created_at
+            if submission.status == SubmissionStatus.ACCEPTED:
+                row.solved = True
+                if row.first_accepted_at is None or (
+                    submission.created_at
+                    and submission.created_at < row.first_accepted_at
+                ):
+                    row.first_accepted_at = submission.created_at
+        else:
+            self._recompute_problem_row(db, row)
+
+        attempts_delta = row.attempts - old_attempts
+        solved_delta = int(row.solved) - int(was_solved)
+        if attempts_delta or solved_delta:
+            problem = db.get(Problem, submission.problem_id)
+            self._bump_user(
+                db,
+                user_id=submission.user_id,
+                problem=problem,
+                attempts_delta=attempts_delta,
+                solved_delta=solved_delta,
+            )
+            if solved_delta:
+                return SolvedChange(
+                    user_id=submission.user_id,
+                    problem_type=problem.problem_type,
+                    difficulty=problem.difficulty,
+                    delta=solved_delta,
+                )
+        return None
+
+    def _recompute_problem_row(
+        self, db: Session, row: UserProblemProgress
+    ) -> None:
+        db.flush()
+        accepted = Submission.status == SubmissionStatus.ACCEPTED
+        attempts, best_score, first_accepted, last_submitted = db.execute(
+            select(
+                func.count(),
+                func.max(Submission.score),
+                func.min(case((accepted, Submission.created_at))),
+                func.max(Submission.created_at),
+            ).where(
+                Submission.user_id == row.user_id,
+                Submission.problem_id == row.problem_id,
+                Submission.status != SubmissionStatus.PENDING,
+            )
+        ).one()
+        row.attempts = attempts
+        row.best_score = best_score
+        row.solved = first_accepted is not None
+        row.first_accepted_at = first_accepted
+        row.last_submitted_at = last_submitted
+
+    def _bump_user(
+        self,
+        db: Session,
+        *,
+        user_id: int,
+        problem: Problem,
+        attempts_delta: int,
+        solved_delta: int,
+    ) -> None:
+        table = UserProgress.__table__
+        deltas = {"attempts_total": attempts_delta}
+        if solved_delta:
+            deltas["solved_total"] = solved_delta
+            deltas[_solved_column(problem.problem_type)] = solved_delta
+            deltas[_solved_column(problem.difficulty)] = solved_delta
+        bump = (
+            update(table)
+            .where(table.c.user_id == user_id)
+            .values({name: table.c[name] + d for name, d in deltas.items()})
+        )
+        if db.execute(bump).rowcount == 0:
+            # Another judge may be creating the row concurrently
+            insert_missing(db, table, {"user_id": user_id})
+            db.execute(bump)
+
+    def rebuild(self, db: Session) -> None:
+        """Recompute all progress aggregates from the submission table."""
+        accepted = Submission.status == SubmissionStatus.ACCEPTED
+        problems = UserProblemProgress.__table__
+        users = UserProgress.__table__
+
+        db.execute(delete(users))
+        db.execute(delete(problems))
+        db.execute(
+            insert(problems).from_select(
+                [
+                    "user_id",
+                    "problem_id",
+                    "attempts",
+                    "solved",
+                    "best_score",
+                    "first_accepted_at",
+                    "last_submitted_at",
+                ],
+                select(
+                    Submission.user_id,
+                    Submission.problem_id,
+                    func.count(),
+                    func.count(case((accepted, 1))) > 0,
+                    func.max(Submission.score),
+                    func.min(case((accepted, Submission.created_at))),
+                    func.max(Submission.created_at),
+                )
+                .where(Submission.status != SubmissionStatus.PENDING)
+                .group_by(Submission.user_id, Submission.problem_id),
+            )
+        )
+
+        solved = problems.c.solved.is_(True)
+        per_value = [
+            (_solved_column(t), Problem.problem_type == t) for t in ProblemType
+        ] + [
+            (_solved_column(d), Problem.difficulty == d)
+            for d in DifficultyLevel
+        ]
+        db.execute(
+            insert(users).from_select(
+                ["user_id", "attempts_total", "solved_total"]
+                + [name for name, _ in per_value],
+                select(
+                    problems.c.user_id,
+                    func.sum(problems.c.attempts),
+                    func.sum(case((solved, 1), else_=0)),
+                    *(
+                        func.sum(case((and_(solved, cond), 1), else_=0))
+                        for _, cond in per_value
+                    ),
+                )
+                .join(Problem, Problem.id == problems.c.problem_id)
+                .group_by(problems.c.user_id),
+            )
+        )
+        db.commit()
+
+
+progress_service = ProgressService()
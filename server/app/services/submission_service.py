@@ -0,0 +1,60 @@
+from typing import Any, Dict, Optional
+from sqlalchemy.orm import Session
+
+from app.core.metrics import JUDGE_VERDICTS
+from app.models.submission import Submission, SubmissionStatus
+from app.services.contest_service import contest_service
+from app.services.heatmap_service import heatmap_service
+from app.services.leaderboard_service import leaderboard_service
+from app.services.progress_service import progress_service
+
+
+class SubmissionService:
+    def get(self, db: Session, *, submission_id: int) -> Optional[Submission]:
+        return (
+            db.query(Submission).filter(Submission.id == submission_id).first()
+        )
+
+    def create(self, db: Session, *, submission: Submission) -> Submission:
+        """Store a new submission and count it in the activity rollups."""
+        db.add(submission)
+        heatmap_service.record_submission(db, submission=submission)
+        db.commit()
+        db.refresh(submission)
+        return submission
+
+    def record_verdict(
+        self,
+        db: Session,
+        *,
+        submission: Submission,
+        status: SubmissionStatus,
+        score: Optional[float] = None,
+        results: Optional[Dict[str, Any]] = None,
+    ) -> Submission:
+        """
+        Store a judge verdict and fold it into the derived aggregates in
+        one transaction. Leaderboards follow once it is committed.
+        """
+        previous_status = submission.status
+        submission.status = status
+        submission.score = score
+        submission.results = results
+        db.add(submission)
+        change = progress_service.apply_verdict(
+            db, submission=submission, previous_status=previous_status
+        )
+        heatmap_service.record_verdict(
+            db, submission=submission, previous_status=previous_status
+        )
+        contest_service.record_verdict(
+            db, submission=submission, previous_status=previous_status
+        )
+        db.commit()
+        JUDGE_VERDICTS.inc(SubmissionStatus(status).value)
+        if change is not None:
+            leaderboard_service.apply_change(db, change)
+        return submission
+
+
+submission_service = SubmissionService()
@@ -0,0 +1,59 @@
+from typing import Iterable, List, Optional
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from app.models.tag import Tag, problem_tag
+
+
+class TagService:
+    def normalize(self, names: Iterable[str]) -> List[str]:
+        """Lower-case, strip and de-duplicate tag names, keeping order."""
+        normalized: List[str] = []
+        for name in names:
+            name = " ".join(name.split()).lower()
+            if name and name not in normalized:
+                normalized.append(name)
+        return normalized
+
+    def get_many(self, db: Session, *, names: Iterable[str]) -> List[Tag]:
+        names = self.normalize(names)
+        if not names:
+            return []
+        return db.query(Tag).filter(Tag.name.in_(names)).all()
+
+    def get_ids(
+        self, db: Session, *, names: Iterable[str]
+    ) -> Optional[List[int]]:
+        """Map tag names to ids, or None if any of them does not exist."""
+        names = self.normalize(names)
+        tags = self.get_many(db, names=names)
+        if len(tags) != len(names):
+            return None
+        return [tag.id for tag in tags]
+
+    def problem_tags_select(self, problem_ids: Iterable[int]) -> Select:
+        """Core select of (problem_id, id, name) rows, tags by name."""
+        tag = Tag.__table__
+        return (
+            select(problem_tag.c.problem_id, tag.c.id, tag.c.name)
+            .join(tag, tag.c.id == problem_tag.c.tag_id)
+            .where(problem_tag.c.problem_id.in_(list(problem_ids)))
+            .order_by(tag.c.name)
+        )
+
+    def get_or_create_many(
+        self, db: Session, *, names: Iterable[str]
+    ) -> List[Tag]:
+        names = self.normalize(names)
+        existing = {tag.name: tag for tag in self.get_many(db, names=names)}
+        tags = []
+        for name in names:
+            tag = existing.get(name)
+            if tag is None:
+                tag = Tag(name=name)
+                db.add(tag)
+            tags.append(tag)
+        return tags
+
+
+tag_service = TagService()
@@ -1,10 +1,28 @@
-from typing import Optional
+import csv
+import io
+from typing import Iterator, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash, verify_password
 
+# Columns exposed by the user schema (never hashed_password)
+USER_PUBLIC_COLUMNS = (
+    "id",
+    "email",
+    "username",
+    "full_name",
+    "is_active",
+    "is_admin",
+    "created_at",
+)
+
 
 class UserService:
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
@@ -58,6 +76,90 @@ class UserService:
             return None
         return user
 
+    async def get_async(
+        self, db: AsyncSession, *, user_id: int
+    ) -> Optional[User]:
+        return await db.scalar(select(User).where(User.id == user_id))
+
+    async def authenticate_async(
+        self, db: AsyncSession, *, username: str, password: str
+    ) -> Optional[User]:
+        user = await db.scalar(select(User).where(User.username == username))
+        if not user:
+            return None
+        # bcrypt is deliberately slow; keep it off the event loop
+        if not await run_in_threadpool(
+            verify_password, password, user.hashed_password
+        ):
+            return None
+        return user
+
+    def list_after(
+        self, db: Session, *, after_id: int = 0, limit: int = 100
+    ) -> List[RowMapping]:
+        """
+        Keyset page of users ordered by id, starting after ``after_id``.
+
+        Unlike OFFSET paging, every page is a primary-key range scan, so
+        page 10,000 costs the same as page 1.
+        """
+        return (
+            db.execute(
+                self._public_select()
+                .where(User.id > after_id)
+                .order_by(User.id)
+                .limit(limit)
+            )
+            .mappings()
+            .all()
+        )
+
+    def list_offset(
+        self, db: Session, *, skip: int = 0, limit: int = 100
+    ) -> List[RowMapping]:
+        """OFFSET page of users ordered by id (deprecated paging)."""
+        return (
+            db.execute(
+                self._public_select()
+                .order_by(User.id)
+                .offset(skip)
+                .limit(limit)
+            )
+            .mappings()
+            .all()
+        )
+
+    def iter_export(
+        self, db: Session, *, fmt: str = "ndjson", chunk_size: int = 1000
+    ) -> Iterator[bytes]:
+        """
+        Stream all users as CSV or NDJSON from a server-side cursor.
+
+        Rows are fetched ``chunk_size`` at a time and emitted per chunk, so
+        memory stays constant however many users there are.
+        """
+        if fmt == "csv":
+            # Send the header before touching the database
+            yield (",".join(USER_PUBLIC_COLUMNS) + "\r\n").encode("utf-8")
+        result = db.execute(
+            self._public_select()
+            .order_by(User.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        for rows in result.mappings().partitions():
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows(
+                    [row[c] for c in USER_PUBLIC_COLUMNS] for row in rows
+                )
+                yield buffer.getvalue().encode("utf-8")
+            else:
+                yield b"".join(to_json(dict(row)) + b"\n" for row in rows)
+
+    def _public_select(self):
+        return select(*(User.__table__.c[c] for c in USER_PUBLIC_COLUMNS))
+
     def is_active(self, user: User) -> bool:
         return user.is_active
 
@@ -0,0 +1,254 @@
+"""
+Benchmark: async endpoints versus the threadpool model under concurrency.
+
+Drives routes of the real app (``create_app()``, its middleware and auth
+included) with N concurrent in-process ASGI clients for a fixed time,
+against a temporary SQLite database, and reports sustained requests per
+second and latency percentiles per route:
+
+* ``async`` - ``async def`` handlers on an ``AsyncSession``
+  (``GET /users/me``, ``GET /problems/{id}``)
+* ``sync``  - ``def`` handlers on a blocking ``Session``, run in
+  Starlette's threadpool, 40 threads by default (``GET /users/{id}``,
+  ``GET /users/me/progress``)
+
+SQLite answers in microseconds, so ``--db-latency-ms`` delays every SQL
+statement by that much, standing in for the network round trip to a
+Postgres server: the sync engine blocks its thread for the wait, the
+async engine yields to the event loop. The delay is simulated; point
+``--database-url`` at a real server (with ``--db-latency-ms 0``) for
+measured latency. The app's lifespan does not run, so background services
+(judge, flushers) stay idle.
+
+Usage (from ``server/``)::
+
+    python -m benchmarks.bench_async [--concurrency 1 50 200]
+        [--duration 3] [--db-latency-ms 5] [--pool-size 200]
+        [--database-url URL]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List, Tuple
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.util import await_only
+
+from app.app import create_app
+from app.core.security import create_access_token, get_password_hash
+from app.db.base import Base
+from app.db.query_stats import count_queries
+from app.db.session import async_database_url, get_async_db, get_db
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.user import User
+
+PROBLEMS = 200
+
+# (model, path); {id} is a problem id, {user} the benchmark user's id
+ROUTES: List[Tuple[str, str]] = [
+    ("async", "/api/v1/users/me"),
+    ("async", "/api/v1/problems/{id}"),
+    ("sync", "/api/v1/users/{user}"),
+    ("sync", "/api/v1/users/me/progress"),
+]
+
+
+def add_latency(engine: Engine, seconds: float, *, blocking: bool) -> None:
+    """Delay every statement on ``engine`` by ``seconds``."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def wait(conn, cursor, statement, parameters, context, executemany):
+        if blocking:
+            time.sleep(seconds)
+        else:
+            # Runs inside SQLAlchemy's greenlet: yields to the event loop
+            await_only(asyncio.sleep(seconds))
+
+
+def build_app(
+    url: str, db_latency: float, pool_size: int
+) -> Tuple[FastAPI, Engine, Engine, dict]:
+    # Both models get the same, ample pool so it is not the bottleneck
+    options = {"pool_size": pool_size}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    engine = create_engine(url, **options)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    async_engine = create_async_engine(
+        async_database_url(url), pool_size=pool_size
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add_all(
+            Problem(
+                title=f"Problem {i}",
+                description="Solve it. " * 50,
+                problem_type=ProblemType.DSA,
+                difficulty=DifficultyLevel.MEDIUM,
+                problem_metadata={"constraints": "1 <= n <= 1000"},
+            )
+            for i in range(PROBLEMS)
+        )
+        user = User(
+            email="bench@example.com",
+            username="bench",
+            hashed_password=get_password_hash("benchpassword"),
+        )
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    if db_latency:
+        add_latency(engine, db_latency, blocking=True)
+        add_latency(async_engine.sync_engine, db_latency, blocking=False)
+
+    def override_get_db():
+        with SessionLocal() as db:
+            yield db
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = create_app()
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    token = create_access_token(user_id)
+    context = {"user": user_id, "token": token}
+    return app, engine, async_engine.sync_engine, context
+
+
+async def request(app: FastAPI, path: str, token: str) -> int:
+    """One in-process ASGI GET; returns the status code."""
+    status = 0
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(
+        {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"host", b"bench"),
+                (b"authorization", f"Bearer {token}".encode()),
+            ],
+            "client": ("127.0.0.1", 1),
+            "server": ("bench", 80),
+        },
+        receive,
+        send,
+    )
+    return status
+
+
+async def drive(
+    app: FastAPI, route: str, context: dict, concurrency: int, duration: float
+) -> dict:
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def worker(offset: int) -> None:
+        i = offset
+        while time.perf_counter() < deadline:
+            path = route.format(id=i % PROBLEMS + 1, user=context["user"])
+            started = time.perf_counter()
+            status = await request(app, path, context["token"])
+            assert status == 200, (path, status)
+            latencies.append(time.perf_counter() - started)
+            i += concurrency
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def run(url: str, args: argparse.Namespace) -> None:
+    app, engine, async_engine, context = build_app(
+        url, args.db_latency_ms / 1000, args.pool_size
+    )
+    # Statements per request, from one warm-up request per route
+    statements = {}
+    for _, route in ROUTES:
+        with count_queries(engine, async_engine) as stats:
+            path = route.format(id=1, user=context["user"])
+            assert await request(app, path, context["token"]) == 200
+        statements[route] = stats.count
+
+    latency = (
+        f"{args.db_latency_ms:g} ms simulated latency per SQL statement"
+        if args.db_latency_ms
+        else "no added SQL latency"
+    )
+    print(f"create_app() routes, {args.duration:g}s per run, {latency}")
+    print(
+        f"{'clients':>8} {'model':>6} {'route':<28} {'sql':>4} "
+        f"{'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}"
+    )
+    for concurrency in args.concurrency:
+        for model, route in ROUTES:
+            result = await drive(
+                app, route, context, concurrency, args.duration
+            )
+            print(
+                f"{concurrency:>8} {model:>6} {route[7:]:<28} "
+                f"{statements[route]:>4} {result['rps']:>9.0f} "
+                f"{result['p50']:>8.2f} {result['p99']:>8.2f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 50, 200]
+    )
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    parser.add_argument("--pool-size", type=int, default=200)
+    parser.add_argument(
+        "--database-url",
+        help="an empty database to use instead of a temporary SQLite file",
+    )
+    args = parser.parse_args()
+
+    if args.database_url:
+        asyncio.run(run(args.database_url, args))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(f"sqlite:///{os.path.join(tmp, 'bench.db')}", args))
+
+
+if __name__ == "__main__":
+    main()
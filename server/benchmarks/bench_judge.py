@@ -0,0 +1,327 @@
+"""
+Benchmark: judge throughput, per-stage latency and verdict correctness.
+
+Stores a corpus of reference submissions - fast, slow, time limit, memory
+limit, crash and huge-output solutions in several languages, each with
+the verdict a correct judge must reach - as pending submissions in a
+temporary SQLite database, then judges all of them through
+``judge_service`` (the judge behind ``POST /submissions/``) with N worker
+threads, as a burst enqueued at once. For each concurrency it reports
+submissions judged per second, p50/p95/p99 latency of every stage
+(``queue`` wait, ``load``, ``compile``, ``run``, ``check``, ``persist``,
+and ``total``) and how many verdicts match the corpus. ``compile`` is 0
+for interpreted languages.
+
+The compiler and test runner are still stubs that accept everything, so
+``compile`` and ``run`` measure only the stubs and only accepted cases
+are judged correctly until a sandboxed runner replaces them; the corpus
+and the correctness report are there for it.
+
+``--save`` and ``--baseline`` write and compare JSON baselines as in
+``bench_load``.
+
+Usage (from ``server/``)::
+
+    python -m benchmarks.bench_judge [--concurrency 1 4 16]
+        [--repeat 20] [--save baseline.json] [--baseline baseline.json]
+        [--threshold 0.2]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.metrics import JUDGE_QUEUE_DEPTH
+from app.db.base import Base
+from app.db.engine import create_db_engine
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.submission import Submission, SubmissionStatus
+from app.models.user import User
+from app.services.judge_service import STAGES as JUDGE_STAGES
+from app.services.judge_service import judge_service
+from app.services.leaderboard_service import leaderboard_service
+from app.services.submission_service import submission_service
+from benchmarks.bench_load import compare, percentile
+
+USERS = 20
+STAGES = JUDGE_STAGES + ("total",)
+# Stages take fractions of a millisecond; smaller p95 changes are noise
+MIN_REGRESSION_MS = 1.0
+
+
+class Case(NamedTuple):
+    name: str
+    language: str
+    content: str
+    expected: SubmissionStatus
+
+
+_SOLUTIONS = {
+    "python": {
+        "fast": "def solve(n):\n    return n * n\n",
+        "slow": "def solve(n):\n    return sum(n for _ in range(n))\n",
+        "tle": "def solve(n):\n    while True:\n        pass\n",
+        "mle": "def solve(n):\n    return [0] * 10**10\n",
+        "crash": "def solve(n):\n    return 1 // 0\n",
+        "huge_output": "def solve(n):\n    print('x' * 10**9)\n",
+    },
+    "cpp": {
+        "fast": "long solve(long n) { return n * n; }\n",
+        "slow": (
+            "long solve(long n) {\n  long s = 0;\n"
+            "  for (long i = 0; i < n; i++) s += n;\n  return s;\n}\n"
+        ),
+        "tle": "long solve(long n) { for (;;) {} }\n",
+        "mle": (
+            "#include <vector>\nlong solve(long n) {\n"
+            "  std::vector<long> v(1L << 40);\n  return v[0];\n}\n"
+        ),
+        "crash": "long solve(long n) { return *(long *)0; }\n",
+        "huge_output": (
+            "#include <cstdio>\nlong solve(long n) {\n"
+            "  for (;;) putchar('x');\n}\n"
+        ),
+    },
+    "java": {
+        "fast": "class Solution { long solve(long n) { return n * n; } }\n",
+        "slow": (
+            "class Solution { long solve(long n) {\n  long s = 0;\n"
+            "  for (long i = 0; i < n; i++) s += n;\n  return s;\n} }\n"
+        ),
+        "tle": "class Solution { long solve(long n) { for (;;) {} } }\n",
+        "mle": (
+            "class Solution { long solve(long n) {\n"
+            "  return new long[Integer.MAX_VALUE][16].length;\n} }\n"
+        ),
+        "crash": (
+            "class Solution { long solve(long n) {\n"
+            "  throw new RuntimeException();\n} }\n"
+        ),
+        "huge_output": (
+            "class Solution { long solve(long n) {\n"
+            '  for (;;) System.out.print("x");\n} }\n'
+        ),
+    },
+    "go": {
+        "fast": "func solve(n int64) int64 { return n * n }\n",
+        "slow": (
+            "func solve(n int64) (s int64) {\n"
+            "\tfor i := int64(0); i < n; i++ {\n\t\ts += n\n\t}\n"
+            "\treturn\n}\n"
+        ),
+        "tle": "func solve(n int64) int64 { for {} }\n",
+        "mle": (
+            "func solve(n int64) int64 {\n"
+            "\treturn int64(len(make([]int64, 1<<40)))\n}\n"
+        ),
+        "crash": 'func solve(n int64) int64 { panic("boom") }\n',
+        "huge_output": (
+            "func solve(n int64) int64 {\n"
+            '\tfor {\n\t\tfmt.Print("x")\n\t}\n}\n'
+        ),
+    },
+}
+
+# What a correct judge answers for each kind of solution
+_EXPECTED = {
+    "fast": SubmissionStatus.ACCEPTED,
+    "slow": SubmissionStatus.ACCEPTED,
+    "tle": SubmissionStatus.REJECTED,
+    "mle": SubmissionStatus.REJECTED,
+    "crash": SubmissionStatus.ERROR,
+    "huge_output": SubmissionStatus.REJECTED,
+}
+
+CORPUS = [
+    Case(name, language, content, _EXPECTED[name])
+    for language, solutions in _SOLUTIONS.items()
+    for name, content in solutions.items()
+]
+
+
+def seed(db: Session) -> Dict[str, Any]:
+    users = [
+        User(
+            email=f"user{i}@example.com",
+            username=f"user{i}",
+            hashed_password="x",
+        )
+        for i in range(USERS)
+    ]
+    problem = Problem(
+        title="Square",
+        description="Return n squared.",
+        problem_type=ProblemType.DSA,
+        difficulty=DifficultyLevel.EASY,
+        problem_metadata={},
+    )
+    db.add_all(users + [problem])
+    db.commit()
+    return {"users": [user.id for user in users], "problem": problem.id}
+
+
+def submit(
+    SessionLocal: sessionmaker, dataset: Dict[str, Any], repeat: int
+) -> Dict[int, Case]:
+    """Store ``repeat`` pending copies of the corpus, as the API does."""
+    cases = {}
+    with SessionLocal() as db:
+        for i in range(repeat):
+            for j, case in enumerate(CORPUS):
+                submission = submission_service.create(
+                    db,
+                    submission=Submission(
+                        user_id=dataset["users"][(i + j) % USERS],
+                        problem_id=dataset["problem"],
+                        content=case.content,
+                        language=case.language,
+                        status=SubmissionStatus.PENDING,
+                    ),
+                )
+                cases[submission.id] = case
+    return cases
+
+
+def judge(
+    SessionLocal: sessionmaker, cases: Dict[int, Case], concurrency: int
+) -> Dict[str, Any]:
+    def work(submission_id: int, queued_at: float) -> Dict[str, float]:
+        started = time.perf_counter()
+        with SessionLocal() as db:
+            stages = judge_service.judge(
+                db, submission_id=submission_id, queued_at=queued_at
+            )
+        stages["total"] = time.perf_counter() - started + stages["queue"]
+        return stages
+
+    # The whole corpus arrives at once
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = []
+        for submission_id in cases:
+            JUDGE_QUEUE_DEPTH.inc()
+            futures.append(
+                pool.submit(work, submission_id, time.perf_counter())
+            )
+        timings = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    for stages in timings:
+        for stage, seconds in stages.items():
+            latencies[stage].append(seconds)
+    results = {}
+    for stage in STAGES:
+        values = sorted(latencies[stage])
+        results[stage] = {
+            "requests": len(values),
+            "errors": 0,
+            "rps": len(values) / elapsed,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+        }
+    return results
+
+
+def verdicts(SessionLocal: sessionmaker, cases: Dict[int, Case]) -> Counter:
+    """(case, language, correct) counts of the judged submissions."""
+    outcome: Counter = Counter()
+    with SessionLocal() as db:
+        for submission_id, status in db.query(
+            Submission.id, Submission.status
+        ).filter(Submission.id.in_(cases)):
+            case = cases[submission_id]
+            outcome[case.name, case.language, status == case.expected] += 1
+    return outcome
+
+
+def report(concurrency: int, results: Dict[str, Any], outcome: Counter):
+    correct = sum(n for (_, _, ok), n in outcome.items() if ok)
+    judged = sum(outcome.values())
+    print(
+        f"\n{concurrency} workers: {results['total']['rps']:.1f} "
+        f"submissions/s, {correct}/{judged} verdicts correct"
+    )
+    print(f"{'stage':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for stage in STAGES:
+        stats = results[stage]
+        print(
+            f"{stage:>8} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+            f"{stats['p99_ms']:>8.2f}"
+        )
+    wrong = Counter()
+    for (name, language, ok), n in outcome.items():
+        if not ok:
+            wrong[name] += n
+    for name, n in sorted(wrong.items()):
+        print(f"  {n} {name} submissions not judged {_EXPECTED[name].value}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 4, 16]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--save", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare with this baseline")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    options = {"repeat": args.repeat, "corpus": len(CORPUS)}
+    results: Dict[str, Any] = {"options": options, "workloads": {}}
+    print(
+        f"{len(CORPUS)} reference solutions x {args.repeat}, "
+        f"{len(_SOLUTIONS)} languages"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'j.db')}")
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(bind=engine, autoflush=False)
+        with SessionLocal() as db:
+            dataset = seed(db)
+
+        for concurrency in args.concurrency:
+            leaderboard_service.reset()
+            cases = submit(SessionLocal, dataset, args.repeat)
+            stages = judge(SessionLocal, cases, concurrency)
+            report(concurrency, stages, verdicts(SessionLocal, cases))
+            results["workloads"][f"{concurrency} workers"] = stages
+        leaderboard_service.reset()
+        engine.dispose()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("options") != options:
+            print(
+                f"\nWarning: baseline was taken with {baseline.get('options')}"
+            )
+        regressions = compare(
+            baseline, results, args.threshold, MIN_REGRESSION_MS
+        )
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,587 @@
+"""
+Load test: mixed HTTP workloads against a locally started API server.
+
+Seeds a temporary SQLite database (users, tagged problems and a history
+of judged submissions), starts ``uvicorn main:app`` on it in a
+subprocess and drives it over real HTTP with virtual users, each with
+its own ``httpx.AsyncClient``, for a fixed time per workload:
+
+* ``login``  - login storm: users request tokens over and over (bcrypt)
+* ``browse`` - problem browsing: list pages, filters, facets, problem
+  detail and the global leaderboard
+* ``submit`` - submission bursts: a user posts a few submissions at once,
+  polls each until it is judged, then lists their submissions
+* ``mixed``  - 60% browsing, 30% submitting and 10% logging in
+* ``contest`` - a contest start: 80% of the users read contest problems,
+  submit to the contest (backing off on 429), poll and read the
+  scoreboard, while the others keep browsing practice problems; compare
+  its practice routes with ``browse`` to see what a contest costs them
+  (``--contest-judges N`` judges in a ``scripts.contest_judge`` process
+  with N workers instead of in the API)
+
+and reports throughput and p50/p95/p99 latency per route template. The
+dataset and every virtual user's choices derive from ``--seed``, so runs
+with the same options issue the same requests.
+
+``--save`` writes the results to a JSON baseline; ``--baseline`` compares
+a run with one and exits with status 1 when a route's p95 latency rose, or
+its throughput fell, by more than ``--threshold`` (routes with fewer than
+``MIN_REQUESTS`` requests are not compared). Baselines record the options
+they were taken with and are only comparable on the same machine.
+
+Usage (from ``server/``)::
+
+    python -m benchmarks.bench_load [--workloads login browse submit mixed]
+        [--users 50] [--duration 10] [--workers 1] [--contest-judges 0]
+        [--seed 0]
+        [--save baseline.json] [--baseline baseline.json]
+        [--threshold 0.2]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterator, List
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.security import create_access_token, get_password_hash
+from app.db.base import Base
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.submission import Submission, SubmissionStatus
+from app.models.tag import Tag
+from app.models.user import User
+from app.services.contest_service import contest_service
+from app.services.facet_service import facet_service
+from app.services.heatmap_service import heatmap_service
+from app.services.progress_service import progress_service
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API = settings.API_V1_STR
+
+PROBLEMS = 500
+TAGS = ("graphs", "dp", "sql", "caching", "queues", "sharding", "trees")
+HISTORY = 10  # judged submissions per seeded user
+PASSWORD = "load-test"
+SOLUTION = "def solve(n):\n    return n * n\n"
+BURST = 3  # submissions posted at once by a submitting user
+POLL_INTERVAL = 0.05
+# Routes with fewer requests in either run are too noisy to compare
+MIN_REQUESTS = 50
+# The seeded contest runs on the first problems; one user in
+# PRACTICE_SHARE keeps browsing practice problems during it
+CONTEST_PROBLEMS = 5
+PRACTICE_SHARE = 5
+
+WORKLOADS = ("login", "browse", "submit", "mixed", "contest")
+
+
+def seed(db: Session, users: int, rng: random.Random) -> None:
+    tags = [Tag(name=name) for name in TAGS]
+    problems = [
+        Problem(
+            title=f"Problem {i}",
+            description="Solve it. " * rng.randint(20, 200),
+            problem_type=rng.choice(list(ProblemType)),
+            difficulty=rng.choice(list(DifficultyLevel)),
+            problem_metadata={"constraints": "1 <= n <= 1000"},
+            tags=rng.sample(tags, rng.randint(1, 3)),
+        )
+        for i in range(PROBLEMS)
+    ]
+    # One hash for everyone: bcrypt would dominate seeding otherwise
+    hashed_password = get_password_hash(PASSWORD)
+    people = [
+        User(
+            email=f"user{i}@example.com",
+            username=f"user{i}",
+            hashed_password=hashed_password,
+            full_name=f"User {i}",
+        )
+        for i in range(users)
+    ]
+    # After the users, so user<n> keeps id n + 1
+    admin = User(
+        email="admin@example.com",
+        username="admin",
+        hashed_password=hashed_password,
+        is_admin=True,
+    )
+    db.add_all(problems + people + [admin])
+    db.flush()
+    db.add_all(
+        Submission(
+            user_id=user.id,
+            problem_id=problem.id,
+            content=SOLUTION,
+            language="python",
+            status=rng.choice(
+                (SubmissionStatus.ACCEPTED, SubmissionStatus.REJECTED)
+            ),
+            score=rng.choice((0.0, 50.0, 100.0)),
+            results={"summary": {"totalTests": 10, "passedTests": 10}},
+        )
+        # Every other user starts without history, so their first
+        # submissions race to create the aggregate rows under load
+        for user in people[::2]
+        for problem in rng.sample(problems, HISTORY)
+    )
+    db.commit()
+    # The aggregates the API maintains incrementally
+    for service in (facet_service, progress_service, heatmap_service):
+        service.rebuild(db)
+    now = datetime.now(timezone.utc)
+    contest_service.create(
+        db,
+        title="Load test",
+        starts_at=now,
+        ends_at=now + timedelta(days=1),
+        freeze_at=None,
+        problem_ids=[problem.id for problem in problems[:CONTEST_PROBLEMS]],
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def serve(
+    database_url: str, archive_dir: str, workers: int, contest_judges: int
+) -> Iterator[str]:
+    """
+    Run the API in a uvicorn subprocess, and with ``contest_judges`` the
+    contest judge in one of its own; yields the API's base URL.
+    """
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "SUBMISSION_ARCHIVE_DIR": archive_dir,
+        "LEADERBOARD_SNAPSHOT_INTERVAL": "0",
+    }
+    judge = None
+    if contest_judges:
+        env["CONTEST_JUDGE_WORKERS"] = "0"
+        judge = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "scripts.contest_judge",
+                "--workers",
+                str(contest_judges),
+            ],
+            cwd=SERVER_DIR,
+            env=env,
+            stderr=subprocess.DEVNULL,
+        )
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            # Longer than the client's keep-alive expiry: a connection the
+            # server drops just as the client reuses it fails the request
+            "--timeout-keep-alive",
+            "30",
+        ],
+        cwd=SERVER_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError("The API server exited during startup")
+            try:
+                if httpx.get(base_url + "/").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("The API server did not start in 30s")
+            time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        if judge is not None:
+            judge.terminate()
+            judge.wait(timeout=30)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted ``values``."""
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+class Recorder:
+    """Latencies and failures per route template."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(
+        self,
+        client: httpx.AsyncClient,
+        route: str,
+        method: str,
+        url: str,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[route].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[route] += 1
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        routes = {}
+        everything: List[float] = []
+        for route, latencies in sorted(self.latencies.items()):
+            routes[route] = self._stats(
+                sorted(latencies), self.errors[route], elapsed
+            )
+            everything.extend(latencies)
+        if everything:
+            routes["total"] = self._stats(
+                sorted(everything), sum(self.errors.values()), elapsed
+            )
+        return routes
+
+    @staticmethod
+    def _stats(
+        latencies: List[float], errors: int, elapsed: float
+    ) -> Dict[str, float]:
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+        }
+
+
+class VirtualUser:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        recorder: Recorder,
+        number: int,
+        seed: int,
+    ) -> None:
+        self.client = client
+        self.recorder = recorder
+        self.username = f"user{number}"
+        self.rng = random.Random(seed * 100003 + number)
+        # Users are seeded in order, so user<n> has id n + 1; browsing and
+        # submitting users skip the (bcrypt-bound) login
+        token = create_access_token(number + 1)
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def _call(self, route: str, method: str, url: str, **kwargs: Any):
+        kwargs.setdefault("headers", self.headers)
+        return self.recorder.call(
+            self.client, route, method, API + url, **kwargs
+        )
+
+    async def login(self) -> None:
+        response = await self._call(
+            "POST /auth/login",
+            "POST",
+            "/auth/login",
+            data={"username": self.username, "password": PASSWORD},
+            headers={},
+        )
+        if response.status_code == 200:
+            token = response.json()["access_token"]
+            self.headers = {"Authorization": f"Bearer {token}"}
+
+    async def browse(self) -> None:
+        rng = self.rng
+        page = {"skip": rng.randrange(0, PROBLEMS, 20), "limit": 20}
+        await self._call("GET /problems/", "GET", "/problems/", params=page)
+        if rng.random() < 0.3:
+            params = {"difficulty": rng.choice(list(DifficultyLevel)).value}
+            if rng.random() < 0.5:
+                params["tags"] = rng.choice(TAGS)
+            await self._call(
+                "GET /problems/ (filtered)", "GET", "/problems/", params=params
+            )
+        if rng.random() < 0.2:
+            await self._call("GET /problems/facets", "GET", "/problems/facets")
+        for _ in range(2):
+            problem_id = rng.randint(1, PROBLEMS)
+            await self._call(
+                "GET /problems/{problem_id}",
+                "GET",
+                f"/problems/{problem_id}",
+            )
+        if rng.random() < 0.2:
+            await self._call(
+                "GET /leaderboards/{scope}", "GET", "/leaderboards/global"
+            )
+
+    async def submit(self) -> None:
+        responses = await asyncio.gather(
+            *(
+                self._call(
+                    "POST /submissions/",
+                    "POST",
+                    "/submissions/",
+                    json={
+                        "problem_id": self.rng.randint(1, PROBLEMS),
+                        "content": SOLUTION,
+                        "language": "python",
+                    },
+                )
+                for _ in range(BURST)
+            )
+        )
+        await asyncio.gather(
+            *(
+                self._poll(response.json()["id"])
+                for response in responses
+                if response.status_code == 200
+            )
+        )
+        await self._call("GET /submissions/", "GET", "/submissions/")
+
+    async def _poll(self, submission_id: int) -> None:
+        while True:
+            response = await self._call(
+                "GET /submissions/{submission_id}",
+                "GET",
+                f"/submissions/{submission_id}",
+            )
+            if (
+                response.status_code != 200
+                or response.json()["status"] != SubmissionStatus.PENDING.value
+            ):
+                return
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def contest(self) -> None:
+        problem_id = self.rng.randint(1, CONTEST_PROBLEMS)
+        await self._call(
+            "GET /problems/{problem_id} (contest)",
+            "GET",
+            f"/problems/{problem_id}",
+        )
+        response = await self._call(
+            "POST /submissions/ (contest)",
+            "POST",
+            "/submissions/",
+            json={
+                "problem_id": problem_id,
+                "content": SOLUTION,
+                "language": "python",
+                "contest_id": 1,
+            },
+        )
+        if response.status_code == 429:
+            # Admission control: the contest judge queue is full
+            await asyncio.sleep(int(response.headers["Retry-After"]))
+        elif response.status_code == 200:
+            await self._poll(response.json()["id"])
+        await self._call(
+            "GET /contests/{contest_id}/scoreboard",
+            "GET",
+            "/contests/1/scoreboard",
+        )
+
+    def action(self, workload: str, number: int) -> Callable[[], Awaitable]:
+        if workload == "mixed":
+            workload = ("browse",) * 6 + ("submit",) * 3 + ("login",)
+            workload = workload[number % 10]
+        elif workload == "contest" and number % PRACTICE_SHARE == 0:
+            workload = "browse"
+        return getattr(self, workload)
+
+
+async def run_workload(
+    base_url: str, workload: str, users: int, duration: float, seed: int
+) -> Dict[str, Dict[str, float]]:
+    recorder = Recorder()
+    if workload == "contest":
+        # Problem sets are warmed ahead of the start, here through
+        # /contests/refresh rather than waiting for the periodic one
+        admin_token = create_access_token(users + 1)
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            await client.post(
+                API + "/contests/refresh",
+                headers={"Authorization": f"Bearer {admin_token}"},
+            )
+    deadline = time.perf_counter() + duration
+
+    async def loop(number: int) -> None:
+        # One client per user: a shared connection pool scans all of its
+        # connections for every request, which on a small machine takes
+        # CPU time from the server under test
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            action = VirtualUser(client, recorder, number, seed).action(
+                workload, number
+            )
+            while time.perf_counter() < deadline:
+                await action()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(loop(n) for n in range(users)))
+    elapsed = time.perf_counter() - started
+    return recorder.summary(elapsed)
+
+
+def compare(
+    baseline: Dict[str, Any],
+    results: Dict[str, Any],
+    threshold: float,
+    min_ms: float = 0.0,
+) -> List[str]:
+    """Routes whose p95 latency or throughput regressed past the threshold.
+
+    Latency increases smaller than ``min_ms`` are ignored as noise.
+    """
+    regressions = []
+    for workload, routes in results["workloads"].items():
+        before_routes = baseline["workloads"].get(workload, {})
+        for route, after in routes.items():
+            before = before_routes.get(route)
+            if (
+                before is None
+                or min(before["requests"], after["requests"]) < MIN_REQUESTS
+            ):
+                continue
+            if after["p95_ms"] > max(
+                before["p95_ms"] * (1 + threshold), before["p95_ms"] + min_ms
+            ):
+                regressions.append(
+                    f"{workload} {route}: p95 {before['p95_ms']:.1f} -> "
+                    f"{after['p95_ms']:.1f} ms"
+                )
+            if after["rps"] < before["rps"] * (1 - threshold):
+                regressions.append(
+                    f"{workload} {route}: {before['rps']:.1f} -> "
+                    f"{after['rps']:.1f} req/s"
+                )
+    return regressions
+
+
+def report(workload: str, routes: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{workload}")
+    print(
+        f"{'route':>36} {'requests':>9} {'errors':>7} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for route, stats in routes.items():
+        print(
+            f"{route:>36} {stats['requests']:>9} {stats['errors']:>7} "
+            f"{stats['rps']:>8.1f} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS)
+    )
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--contest-judges",
+        type=int,
+        default=0,
+        help="judge contest submissions in a separate process with this "
+        "many workers instead of in the API",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare with this baseline")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    options = {
+        "users": args.users,
+        "duration": args.duration,
+        "workers": args.workers,
+        "contest_judges": args.contest_judges,
+        "seed": args.seed,
+    }
+    results: Dict[str, Any] = {"options": options, "workloads": {}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            seed(db, args.users, random.Random(args.seed))
+        engine.dispose()
+
+        with serve(
+            url,
+            os.path.join(tmp, "archive"),
+            args.workers,
+            args.contest_judges,
+        ) as base:
+            for workload in args.workloads:
+                routes = asyncio.run(
+                    run_workload(
+                        base, workload, args.users, args.duration, args.seed
+                    )
+                )
+                results["workloads"][workload] = routes
+                report(workload, routes)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("options") != options:
+            print(
+                f"\nWarning: baseline was taken with {baseline.get('options')}"
+            )
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Benchmark: ORM hydration versus Core rows on the hot list endpoints.
+
+For each page size, runs the list queries behind ``GET /problems/``
+(summaries with tags), ``GET /submissions/`` and ``GET /users/`` on a
+temporary SQLite database and serializes the page with ``ModelResponse``,
+two ways:
+
+* ``orm``  - ``select(Model)`` entities (identity map, instance state,
+  relationship loaders), as the endpoints did before
+* ``core`` - Core ``select()`` of table columns, row mappings fed to the
+  response model, as the endpoints do now
+
+and reports the best CPU time per page and the peak memory allocated while
+building one page (``tracemalloc``).
+
+Usage (from ``server/``)::
+
+    python -m benchmarks.bench_read_path [--pages 20 100 1000]
+        [--repeat 20]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine, desc, select
+from sqlalchemy.orm import Session, load_only, selectinload, sessionmaker
+
+from app.api.endpoints.submissions import SUBMISSION_LIST_COLUMNS
+from app.core.responses import ModelResponse
+from app.db.base import Base
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.submission import Submission, SubmissionStatus
+from app.models.tag import Tag
+from app.models.user import User
+from app.schemas.problem import PROBLEM_SUMMARY_FIELDS, ProblemSummaryList
+from app.schemas.submission import SubmissionList
+from app.schemas.user import User as UserSchema
+from app.services.tag_service import tag_service
+from app.services.user_service import user_service
+
+ROWS = 1000
+
+
+def seed(db: Session) -> None:
+    tags = [Tag(name=name) for name in ("graphs", "dp", "sql", "caching")]
+    problems = [
+        Problem(
+            title=f"Problem {i}",
+            description="Solve it. " * 100,
+            problem_type=list(ProblemType)[i % len(ProblemType)],
+            difficulty=list(DifficultyLevel)[i % len(DifficultyLevel)],
+            problem_metadata={},
+            tags=tags[: i % 3 + 1],
+        )
+        for i in range(ROWS)
+    ]
+    users = [
+        User(
+            email=f"user{i}@example.com",
+            username=f"user{i}",
+            hashed_password="x",
+            full_name=f"User {i}",
+        )
+        for i in range(ROWS)
+    ]
+    db.add_all(problems + users)
+    db.flush()
+    db.add_all(
+        Submission(
+            user_id=users[0].id,
+            problem_id=problem.id,
+            content="def solve(n):\n    return n * n\n" * 20,
+            language="python",
+            status=SubmissionStatus.ACCEPTED,
+            score=100.0,
+            results={"summary": {"totalTests": 10, "passedTests": 10}},
+        )
+        for problem in problems
+    )
+    db.commit()
+
+
+def orm_problems(db: Session, limit: int) -> ModelResponse:
+    fields = PROBLEM_SUMMARY_FIELDS
+    problems = db.scalars(
+        select(Problem)
+        .options(
+            load_only(*(getattr(Problem, f) for f in fields if f != "tags")),
+            selectinload(Problem.tags),
+        )
+        .limit(limit)
+    )
+    items = [{f: getattr(p, f) for f in fields} for p in problems]
+    return ModelResponse(
+        ProblemSummaryList, {"items": items, "total": ROWS}, exclude_unset=True
+    )
+
+
+def core_problems(db: Session, limit: int) -> ModelResponse:
+    fields = PROBLEM_SUMMARY_FIELDS
+    rows = db.execute(
+        select(*(Problem.__table__.c[f] for f in fields if f != "tags")).limit(
+            limit
+        )
+    )
+    items = [dict(row) for row in rows.mappings()]
+    by_problem: Dict[int, list] = {}
+    for row in db.execute(
+        tag_service.problem_tags_select([item["id"] for item in items])
+    ).mappings():
+        by_problem.setdefault(row["problem_id"], []).append(row)
+    for item in items:
+        item["tags"] = by_problem.get(item["id"], [])
+    return ModelResponse(
+        ProblemSummaryList, {"items": items, "total": ROWS}, exclude_unset=True
+    )
+
+
+def orm_submissions(db: Session, limit: int) -> ModelResponse:
+    submissions = db.scalars(
+        select(Submission).order_by(desc(Submission.created_at)).limit(limit)
+    )
+    return ModelResponse(
+        SubmissionList, {"items": submissions.all(), "total": ROWS}
+    )
+
+
+def core_submissions(db: Session, limit: int) -> ModelResponse:
+    rows = db.execute(
+        select(*SUBMISSION_LIST_COLUMNS)
+        .order_by(desc(Submission.created_at))
+        .limit(limit)
+    )
+    return ModelResponse(
+        SubmissionList, {"items": rows.mappings().all(), "total": ROWS}
+    )
+
+
+def orm_users(db: Session, limit: int) -> ModelResponse:
+    users = db.query(User).order_by(User.id).limit(limit).all()
+    return ModelResponse(List[UserSchema], users)
+
+
+def core_users(db: Session, limit: int) -> ModelResponse:
+    users = user_service.list_offset(db, limit=limit)
+    return ModelResponse(List[UserSchema], users)
+
+
+PATHS = {
+    "problems": (orm_problems, core_problems),
+    "submissions": (orm_submissions, core_submissions),
+    "users": (orm_users, core_users),
+}
+
+
+def measure(
+    SessionLocal: sessionmaker,
+    build: Callable[[Session, int], ModelResponse],
+    limit: int,
+    repeat: int,
+) -> Dict[str, float]:
+    # Fresh session per page, as per request, so the identity map is empty
+    def page() -> bytes:
+        with SessionLocal() as db:
+            return build(db, limit).body
+
+    page()
+    # Best of ``repeat``: the least disturbed run
+    cpu = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        page()
+        cpu = min(cpu, time.process_time() - started)
+
+    tracemalloc.start()
+    page()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"cpu_ms": cpu * 1000, "peak_kib": peak / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--pages", type=int, nargs="+", default=[20, 100, 1000]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(bind=engine, autoflush=False)
+        with SessionLocal() as db:
+            seed(db)
+
+        print(
+            f"{'endpoint':>12} {'rows':>5} {'orm ms':>8} {'core ms':>8} "
+            f"{'speedup':>8} {'orm KiB':>9} {'core KiB':>9}"
+        )
+        for name, (orm, core) in PATHS.items():
+            for limit in args.pages:
+                before = measure(SessionLocal, orm, limit, args.repeat)
+                after = measure(SessionLocal, core, limit, args.repeat)
+                print(
+                    f"{name:>12} {limit:>5} {before['cpu_ms']:>8.2f} "
+                    f"{after['cpu_ms']:>8.2f} "
+                    f"{before['cpu_ms'] / after['cpu_ms']:>7.2f}x "
+                    f"{before['peak_kib']:>9.0f} {after['peak_kib']:>9.0f}"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Micro-benchmark: response serialization paths.
+
+Compares, on realistic problem and submission list payloads:
+
+* ``jsonable_encoder``  - validate, ``jsonable_encoder``, ``json.dumps``
+* ``serialize+dumps``   - validate, ``dump_python(mode="json")``,
+  ``json.dumps`` (what ``JSONResponse`` does for a ``response_model``)
+* ``ModelResponse``     - validate, ``dump_json`` straight to bytes
+
+and reports the gzip ratio of each payload.
+
+Usage (from ``server/``)::
+
+    python -m benchmarks.bench_serialization [--items 100] [--repeat 50]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import string
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import ModelResponse, get_adapter
+from app.db.base import Base  # noqa: F401  (configures all mappers)
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.submission import Submission, SubmissionStatus
+from app.models.tag import Tag
+from app.schemas.problem import ProblemList
+from app.schemas.submission import SubmissionList
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+        for _ in range(words)
+    )
+
+
+def make_problems(count: int, rng: random.Random) -> list:
+    tags = [
+        Tag(id=i, name=name)
+        for i, name in enumerate(
+            ["graphs", "dp", "caching", "kubernetes", "sql", "strings"], 1
+        )
+    ]
+    now = datetime.now(timezone.utc)
+    return [
+        Problem(
+            id=i,
+            title=_text(rng, 5).title(),
+            description=_text(rng, 400),
+            problem_type=rng.choice(list(ProblemType)),
+            difficulty=rng.choice(list(DifficultyLevel)),
+            problem_metadata={
+                "constraints": _text(rng, 20),
+                "template": "def solve(nums):\n    pass\n",
+                "test_cases": [
+                    {
+                        "input": [rng.randint(-1000, 1000) for _ in range(30)],
+                        "output": rng.randint(-1000, 1000),
+                    }
+                    for _ in range(20)
+                ],
+            },
+            tags=rng.sample(tags, 2),
+            created_at=now - timedelta(days=i),
+            updated_at=now,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def make_submissions(count: int, rng: random.Random) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        Submission(
+            id=i,
+            user_id=1,
+            problem_id=rng.randint(1, 500),
+            content="def solve(nums):\n" + "    x = 1\n" * 40,
+            language="python",
+            status=rng.choice(list(SubmissionStatus)),
+            score=rng.random() * 100,
+            results={
+                "testCases": [
+                    {
+                        "name": f"Test {t}",
+                        "passed": rng.random() > 0.2,
+                        "executionTime": rng.random(),
+                        "memoryUsed": rng.randint(1024, 65536),
+                    }
+                    for t in range(20)
+                ],
+                "summary": {"totalTests": 20, "passedTests": 17},
+            },
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def old_jsonable_encoder(model, content) -> bytes:
+    value = get_adapter(model).validate_python(content, from_attributes=True)
+    return json.dumps(
+        jsonable_encoder(value), ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def old_serialize_dumps(model, content) -> bytes:
+    adapter = get_adapter(model)
+    value = adapter.validate_python(content, from_attributes=True)
+    return json.dumps(
+        adapter.dump_python(value, mode="json"),
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def new_model_response(model, content) -> bytes:
+    return ModelResponse(model, content).body
+
+
+PATHS = [
+    ("jsonable_encoder", old_jsonable_encoder),
+    ("serialize+dumps", old_serialize_dumps),
+    ("ModelResponse", new_model_response),
+]
+
+
+def run(items: int, repeat: int) -> None:
+    rng = random.Random(42)
+    payloads = [
+        ("ProblemList", ProblemList, make_problems(items, rng)),
+        ("SubmissionList", SubmissionList, make_submissions(items, rng)),
+    ]
+    for name, model, objects in payloads:
+        content = {"items": objects, "total": len(objects)}
+        body = new_model_response(model, content)
+        print(
+            f"\n{name}: {items} items, {len(body) / 1024:.1f} KiB, "
+            f"gzip {len(gzip.compress(body, 6)) / 1024:.1f} KiB"
+        )
+        baseline = None
+        for label, func in PATHS:
+            func(model, content)  # warm up adapters
+            best = min(
+                timeit.repeat(
+                    lambda: func(model, content), number=1, repeat=repeat
+                )
+            )
+            baseline = baseline or best
+            print(
+                f"  {label:<18} {best * 1000:8.2f} ms"
+                f"  ({baseline / best:4.2f}x)"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    run(args.items, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Benchmark: cold start of the API and of judge workers.
+
+Each measurement runs in a fresh interpreter:
+
+* ``import``: ``python -X importtime`` of the API (``main``, which builds
+  the app) and of what a judge worker needs (``app.services.judge_service``
+  and ``app.db.session``), broken down by package so the modules that
+  dominate startup are visible, with a check that the worker does not load
+  the web stack (fastapi, jose, passlib, email_validator, uvicorn);
+* ``first request``: time from spawning ``uvicorn main:app`` until
+  ``GET /`` first answers, what an autoscaled replica waits before it can
+  take traffic.
+
+Medians of ``--runs`` runs are reported. ``--save`` and ``--baseline``
+write and compare JSON baselines as in ``bench_load``.
+
+Usage (from ``server/``)::
+
+    python -m benchmarks.bench_startup [--runs 5] [--top 15]
+        [--save baseline.json] [--baseline baseline.json] [--threshold 0.2]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.bench_load import SERVER_DIR, _free_port
+
+TARGETS = {
+    "api": "import main",
+    "judge worker": "import app.services.judge_service, app.db.session",
+}
+# Only needed to serve HTTP; judge workers should never load them
+WEB_PACKAGES = ("fastapi", "jose", "passlib", "email_validator", "uvicorn")
+# Startup times vary by a few milliseconds between runs
+MIN_REGRESSION_MS = 20.0
+
+# "import time: <self us> | <cumulative us> | <indented module name>"
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+\d+ \| \s*(\S+)$")
+
+
+def _group(module: str) -> str:
+    """Application modules by subpackage, the rest by distribution."""
+    parts = module.split(".")
+    return ".".join(parts[:2]) if parts[0] == "app" else parts[0]
+
+
+def import_profile(
+    statement: str, env: Dict[str, str]
+) -> Tuple[float, Counter, List[str]]:
+    """Total import ms, self ms per package and the web packages loaded."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=SERVER_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    packages: Counter = Counter()
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match:
+            own, module = match.groups()
+            packages[_group(module)] += int(own) / 1000
+    loaded = [name for name in WEB_PACKAGES if name in packages]
+    return sum(packages.values()), packages, loaded
+
+
+def first_request(env: Dict[str, str]) -> float:
+    """Milliseconds from spawning the API server to its first response."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=SERVER_DIR,
+        env=env,
+    )
+    try:
+        with httpx.Client() as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError("The API server exited during startup")
+                try:
+                    if client.get(url).status_code == 200:
+                        return (time.perf_counter() - started) * 1000
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() - started > 30:
+                    raise RuntimeError("The API server did not start in 30s")
+                time.sleep(0.005)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def compare(
+    baseline: Dict[str, Any], results: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Timings that got slower than the baseline past the threshold."""
+    regressions = []
+    for name, after in results["timings"].items():
+        before = baseline["timings"].get(name)
+        if before is None:
+            continue
+        if after > max(before * (1 + threshold), before + MIN_REGRESSION_MS):
+            regressions.append(f"{name}: {before:.0f} -> {after:.0f} ms")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--top", type=int, default=15, help="packages to list per target"
+    )
+    parser.add_argument("--save", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare with this baseline")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {"timings": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+            "SUBMISSION_ARCHIVE_DIR": os.path.join(tmp, "archive"),
+            "LEADERBOARD_SNAPSHOT_INTERVAL": "0",
+        }
+        # The first run warms the filesystem cache and writes bytecode
+        for statement in TARGETS.values():
+            import_profile(statement, env)
+
+        for target, statement in TARGETS.items():
+            totals = []
+            packages: Counter = Counter()
+            for _ in range(args.runs):
+                total, own, loaded = import_profile(statement, env)
+                totals.append(total)
+                packages.update(own)
+            results["timings"][f"{target} import"] = statistics.median(totals)
+            print(
+                f"\n{target} import ({statement}): "
+                f"{statistics.median(totals):.0f} ms"
+            )
+            if target != "api":
+                print(f"  web packages loaded: {', '.join(loaded) or 'none'}")
+            for name, ms in packages.most_common(args.top):
+                print(f"  {ms / args.runs:>8.1f} ms  {name}")
+
+        timings = [first_request(env) for _ in range(args.runs)]
+        results["timings"]["first request"] = statistics.median(timings)
+        print(
+            f"\nfirst request: {statistics.median(timings):.0f} ms "
+            f"(min {min(timings):.0f}, max {max(timings):.0f})"
+        )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
-import uvicorn
 from app.app import create_app
 
 app = create_app()
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
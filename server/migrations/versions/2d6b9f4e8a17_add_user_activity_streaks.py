@@ -0,0 +1,37 @@
+"""Add per-user activity streaks
+
+Revision ID: 2d6b9f4e8a17
+Revises: f3a8c51d9e20
+Create Date: 2026-10-20 16:41:27.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d6b9f4e8a17'
+down_revision: Union[str, None] = 'f3a8c51d9e20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_activity_streak',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('current_streak', sa.Integer(), nullable=False),
+    sa.Column('longest_streak', sa.Integer(), nullable=False),
+    sa.Column('last_active_day', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Streaks of existing activity are computed with:
+    #   python -m scripts.progress backfill-heatmaps
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_activity_streak')
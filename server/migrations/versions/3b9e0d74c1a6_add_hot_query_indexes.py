@@ -0,0 +1,32 @@
+"""Add composite indexes for hot query shapes
+
+Revision ID: 3b9e0d74c1a6
+Revises: e4f19a7c2d58
+Create Date: 2026-10-19 17:05:12.184309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e0d74c1a6'
+down_revision: Union[str, None] = 'e4f19a7c2d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_submission_user_id_created_at', 'submission', ['user_id', sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_submission_user_id_problem_id', 'submission', ['user_id', 'problem_id'], unique=False)
+    op.create_index('ix_problem_type_difficulty_id', 'problem', ['problem_type', 'difficulty', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_problem_type_difficulty_id', table_name='problem')
+    op.drop_index('ix_submission_user_id_problem_id', table_name='submission')
+    op.drop_index('ix_submission_user_id_created_at', table_name='submission')
@@ -0,0 +1,75 @@
+"""Add problem tags and precomputed facet counts
+
+Revision ID: 3f1c2a7d9b41
+Revises: 9de87c605df0
+Create Date: 2026-10-19 09:12:44.218301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b41'
+down_revision: Union[str, None] = '9de87c605df0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Enum types already exist (created with the problem table)
+problem_type_enum = postgresql.ENUM('DSA', 'LLD', 'HLD', 'SQL', 'DEVOPS', name='problemtype', create_type=False)
+difficulty_enum = postgresql.ENUM('EASY', 'MEDIUM', 'HARD', 'EXPERT', name='difficultylevel', create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tag',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tag_id'), 'tag', ['id'], unique=False)
+    op.create_index(op.f('ix_tag_name'), 'tag', ['name'], unique=True)
+    op.create_table('problem_tag',
+    sa.Column('problem_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['problem_id'], ['problem.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tag_id'], ['tag.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('problem_id', 'tag_id')
+    )
+    op.create_index(op.f('ix_problem_tag_tag_id'), 'problem_tag', ['tag_id'], unique=False)
+    op.create_table('problem_facet_count',
+    sa.Column('problem_type', problem_type_enum, nullable=False),
+    sa.Column('difficulty', difficulty_enum, nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('problem_type', 'difficulty')
+    )
+    op.create_table('tag_facet_count',
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('problem_type', problem_type_enum, nullable=False),
+    sa.Column('difficulty', difficulty_enum, nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tag_id'], ['tag.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('tag_id', 'problem_type', 'difficulty')
+    )
+
+    # Backfill counts for the problems that already exist (no tags yet)
+    op.execute(
+        "INSERT INTO problem_facet_count (problem_type, difficulty, count) "
+        "SELECT problem_type, difficulty, COUNT(*) FROM problem "
+        "GROUP BY problem_type, difficulty"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('tag_facet_count')
+    op.drop_table('problem_facet_count')
+    op.drop_index(op.f('ix_problem_tag_tag_id'), table_name='problem_tag')
+    op.drop_table('problem_tag')
+    op.drop_index(op.f('ix_tag_name'), table_name='tag')
+    op.drop_index(op.f('ix_tag_id'), table_name='tag')
+    op.drop_table('tag')
@@ -0,0 +1,30 @@
+"""Add trace context to submissions
+
+Revision ID: 5c8e2d7a4f19
+Revises: 7f2c4a9e1b63
+Create Date: 2026-10-19 21:04:12.518307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8e2d7a4f19'
+down_revision: Union[str, None] = '7f2c4a9e1b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('submission', sa.Column('trace_id', sa.String(length=32), nullable=True))
+    op.add_column('submission', sa.Column('span_id', sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('submission', 'span_id')
+    op.drop_column('submission', 'trace_id')
@@ -0,0 +1,61 @@
+"""Add immutable content-hashed problem versions
+
+Revision ID: 7b2e4c91d5a0
+Revises: 3f1c2a7d9b41
+Create Date: 2026-10-19 11:40:02.551918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4c91d5a0'
+down_revision: Union[str, None] = '3f1c2a7d9b41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Enum types already exist (created with the problem table)
+problem_type_enum = postgresql.ENUM('DSA', 'LLD', 'HLD', 'SQL', 'DEVOPS', name='problemtype', create_type=False)
+difficulty_enum = postgresql.ENUM('EASY', 'MEDIUM', 'HARD', 'EXPERT', name='difficultylevel', create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('problem_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('problem_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('problem_type', problem_type_enum, nullable=False),
+    sa.Column('difficulty', difficulty_enum, nullable=False),
+    sa.Column('problem_metadata', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['problem_id'], ['problem.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('problem_id', 'version')
+    )
+    op.create_index(op.f('ix_problem_version_content_hash'), 'problem_version', ['content_hash'], unique=True)
+    op.create_index(op.f('ix_problem_version_id'), 'problem_version', ['id'], unique=False)
+    op.create_index(op.f('ix_problem_version_problem_id'), 'problem_version', ['problem_id'], unique=False)
+    op.add_column('problem', sa.Column('version_hash', sa.String(length=64), nullable=True))
+    op.add_column('submission', sa.Column('problem_version_hash', sa.String(length=64), nullable=True))
+    # Existing problems are versioned with:
+    #   python -m scripts.problems backfill-versions
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('submission') as batch_op:
+        batch_op.drop_column('problem_version_hash')
+    with op.batch_alter_table('problem') as batch_op:
+        batch_op.drop_column('version_hash')
+    op.drop_index(op.f('ix_problem_version_problem_id'), table_name='problem_version')
+    op.drop_index(op.f('ix_problem_version_id'), table_name='problem_version')
+    op.drop_index(op.f('ix_problem_version_content_hash'), table_name='problem_version')
+    op.drop_table('problem_version')
@@ -0,0 +1,29 @@
+"""Add archive segment to submissions
+
+Revision ID: 7f2c4a9e1b63
+Revises: 3b9e0d74c1a6
+Create Date: 2026-10-19 18:12:47.302551
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f2c4a9e1b63'
+down_revision: Union[str, None] = '3b9e0d74c1a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('submission', sa.Column('archive_segment', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Archived rows must be restored first; stubs have no content
+    op.drop_column('submission', 'archive_segment')
@@ -0,0 +1,79 @@
+"""Add contests
+
+Revision ID: 8e3b61d2c7a4
+Revises: 5c8e2d7a4f19
+Create Date: 2026-10-19 23:12:45.903117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3b61d2c7a4'
+down_revision: Union[str, None] = '5c8e2d7a4f19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('contest',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('starts_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('ends_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('freeze_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_contest_id'), 'contest', ['id'], unique=False)
+    op.create_table('contest_problem',
+    sa.Column('contest_id', sa.Integer(), nullable=False),
+    sa.Column('problem_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['contest_id'], ['contest.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['problem_id'], ['problem.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('contest_id', 'problem_id')
+    )
+    op.create_table('contest_result',
+    sa.Column('contest_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('problem_id', sa.Integer(), nullable=False),
+    sa.Column('failed_attempts', sa.Integer(), nullable=False),
+    sa.Column('solved_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['contest_id'], ['contest.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['problem_id'], ['problem.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('contest_id', 'user_id', 'problem_id')
+    )
+    op.create_table('contest_scoreboard_snapshot',
+    sa.Column('contest_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(), nullable=True),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('solved', sa.Integer(), nullable=False),
+    sa.Column('penalty', sa.Integer(), nullable=False),
+    sa.Column('taken_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['contest_id'], ['contest.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('contest_id', 'user_id')
+    )
+    with op.batch_alter_table('submission') as batch_op:
+        batch_op.add_column(sa.Column('contest_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_submission_contest_id_contest', 'contest', ['contest_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('submission') as batch_op:
+        batch_op.drop_constraint('fk_submission_contest_id_contest', type_='foreignkey')
+        batch_op.drop_column('contest_id')
+    op.drop_table('contest_scoreboard_snapshot')
+    op.drop_table('contest_result')
+    op.drop_table('contest_problem')
+    op.drop_index(op.f('ix_contest_id'), table_name='contest')
+    op.drop_table('contest')
@@ -0,0 +1,56 @@
+"""Add incrementally maintained user progress aggregates
+
+Revision ID: a41d6e0c8f13
+Revises: 7b2e4c91d5a0
+Create Date: 2026-10-19 13:05:37.904126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41d6e0c8f13'
+down_revision: Union[str, None] = '7b2e4c91d5a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SOLVED_COLUMNS = (
+    'solved_dsa', 'solved_lld', 'solved_hld', 'solved_sql', 'solved_devops',
+    'solved_easy', 'solved_medium', 'solved_hard', 'solved_expert',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_progress',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('attempts_total', sa.Integer(), nullable=False),
+    sa.Column('solved_total', sa.Integer(), nullable=False),
+    *(sa.Column(name, sa.Integer(), nullable=False) for name in SOLVED_COLUMNS),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('user_problem_progress',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('problem_id', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('solved', sa.Boolean(), nullable=False),
+    sa.Column('best_score', sa.Float(), nullable=True),
+    sa.Column('first_accepted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_submitted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['problem_id'], ['problem.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'problem_id')
+    )
+    # Existing submissions are folded in with:
+    #   python -m scripts.progress backfill
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_problem_progress')
+    op.drop_table('user_progress')
@@ -0,0 +1,30 @@
+"""Order the submission user/problem index by creation time
+
+Revision ID: b7d4e19a3f62
+Revises: 8e3b61d2c7a4
+Create Date: 2026-10-20 09:41:27.518263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d4e19a3f62'
+down_revision: Union[str, None] = '8e3b61d2c7a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_submission_user_id_problem_id_created_at', 'submission', ['user_id', 'problem_id', sa.text('created_at DESC')], unique=False)
+    op.drop_index('ix_submission_user_id_problem_id', table_name='submission')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_submission_user_id_problem_id', 'submission', ['user_id', 'problem_id'], unique=False)
+    op.drop_index('ix_submission_user_id_problem_id_created_at', table_name='submission')
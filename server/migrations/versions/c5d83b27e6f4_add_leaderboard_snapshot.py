@@ -0,0 +1,37 @@
+"""Add leaderboard snapshots
+
+Revision ID: c5d83b27e6f4
+Revises: a41d6e0c8f13
+Create Date: 2026-10-19 14:22:10.417385
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d83b27e6f4'
+down_revision: Union[str, None] = 'a41d6e0c8f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('leaderboard_snapshot',
+    sa.Column('scope', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('taken_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('scope', 'user_id')
+    )
+    # Without a snapshot the boards are built from user_problem_progress
+    # on first use.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('leaderboard_snapshot')
@@ -0,0 +1,42 @@
+"""Add write-behind activity events
+
+Revision ID: d8a1f3c60b27
+Revises: c5d83b27e6f4
+Create Date: 2026-10-19 15:03:48.205116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a1f3c60b27'
+down_revision: Union[str, None] = 'c5d83b27e6f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('activity_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(length=32), nullable=False),
+    sa.Column('problem_id', sa.Integer(), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['problem_id'], ['problem.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_activity_event_id'), 'activity_event', ['id'], unique=False)
+    op.create_index(op.f('ix_activity_event_created_at'), 'activity_event', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_activity_event_created_at'), table_name='activity_event')
+    op.drop_index(op.f('ix_activity_event_id'), table_name='activity_event')
+    op.drop_table('activity_event')
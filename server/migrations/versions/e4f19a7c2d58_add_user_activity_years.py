@@ -0,0 +1,37 @@
+"""Add per-user daily activity rollups
+
+Revision ID: e4f19a7c2d58
+Revises: d8a1f3c60b27
+Create Date: 2026-10-19 15:48:31.660472
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4f19a7c2d58'
+down_revision: Union[str, None] = 'd8a1f3c60b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_activity_year',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('submissions', sa.LargeBinary(), nullable=False),
+    sa.Column('accepts', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'year')
+    )
+    # Existing submissions are folded in with:
+    #   python -m scripts.progress backfill-heatmaps
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_activity_year')
@@ -0,0 +1,36 @@
+"""Add the contest judge queue
+
+Revision ID: f3a8c51d9e20
+Revises: b7d4e19a3f62
+Create Date: 2026-10-20 14:12:05.331872
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8c51d9e20'
+down_revision: Union[str, None] = 'b7d4e19a3f62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('contest_judge_queue',
+    sa.Column('submission_id', sa.Integer(), nullable=False),
+    sa.Column('enqueued_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['submission_id'], ['submission.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('submission_id')
+    )
+    op.create_index(op.f('ix_contest_judge_queue_enqueued_at'), 'contest_judge_queue', ['enqueued_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_contest_judge_queue_enqueued_at'), table_name='contest_judge_queue')
+    op.drop_table('contest_judge_queue')
@@ -0,0 +1,64 @@
+"""
+Archival of old submissions to compressed segment files.
+
+Usage (from ``server/``)::
+
+    python -m scripts.archive submissions [--days 180] [--batch-size 10000]
+"""
+
+import argparse
+import sys
+import time
+from datetime import timedelta
+
+from app.core.config import settings
+from app.db.base import Base  # noqa: F401  (configures all mappers)
+from app.db.session import SessionLocal
+from app.services.archive_service import submission_archive_service
+
+
+def archive_submissions(days: int, batch_size: int) -> int:
+    started = time.perf_counter()
+    total = 0
+    db = SessionLocal()
+    try:
+        # One segment per batch, until nothing older than the cutoff is left
+        while True:
+            archived = submission_archive_service.archive(
+                db, older_than=timedelta(days=days), limit=batch_size
+            )
+            if not archived:
+                break
+            total += archived
+            print(f"archived {total} submissions", file=sys.stderr)
+    finally:
+        db.close()
+    print(
+        f"archived {total} submissions older than {days} days to "
+        f"{submission_archive_service.directory} in "
+        f"{time.perf_counter() - started:.1f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    submissions = commands.add_parser(
+        "submissions", help="move old judged submissions to cold storage"
+    )
+    submissions.add_argument(
+        "--days", type=int, default=settings.SUBMISSION_ARCHIVE_AFTER_DAYS
+    )
+    submissions.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.SUBMISSION_ARCHIVE_BATCH_SIZE,
+    )
+    args = parser.parse_args()
+    return archive_submissions(args.days, args.batch_size)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Contest judge worker, judging contest submissions outside the API.
+
+Claims submissions from the contest judge queue in the database, next to
+the judge threads of the API processes or, with the API run with
+``CONTEST_JUDGE_WORKERS=0``, instead of them. Stops on SIGINT or SIGTERM
+once the submissions at hand are judged.
+
+Usage (from ``server/``)::
+
+    python -m scripts.contest_judge [--workers 4]
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+
+from app.db.base import Base  # noqa: F401  (configures all mappers)
+from app.db.session import SessionLocal, engine
+from app.services.contest_judge_service import contest_judge_service
+
+
+def run(workers: int) -> int:
+    stopping = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+
+    contest_judge_service.workers = workers
+    contest_judge_service.start(engine)
+    print(
+        f"judging contest submissions with {workers} workers", file=sys.stderr
+    )
+    stopping.wait()
+    # Submissions not claimed yet stay queued for the next start
+    contest_judge_service.stop()
+    with SessionLocal() as db:
+        stats = contest_judge_service.stats(db)
+    print(
+        f"judged {stats['judged']} contest submissions "
+        f"({stats['errors']} errors, {stats['queued']} still queued)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    return run(args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Maintenance of the leaderboard snapshots.
+
+Usage (from ``server/``)::
+
+    python -m scripts.leaderboard rebuild
+"""
+
+import argparse
+import sys
+import time
+
+from app.db.base import Base  # noqa: F401  (configures all mappers)
+from app.db.session import SessionLocal
+from app.services.leaderboard_service import leaderboard_service
+
+
+def rebuild() -> int:
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        leaderboard_service.rebuild(db)
+        rows = leaderboard_service.snapshot()
+    finally:
+        db.close()
+    print(
+        f"snapshotted {rows} leaderboard rows in "
+        f"{time.perf_counter() - started:.1f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "rebuild", help="re-rank every user and replace the snapshots"
+    )
+    parser.parse_args()
+    return rebuild()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Bulk import / export of the problem bank as NDJSON.
+
+Usage (from ``server/``)::
+
+    python -m scripts.problems import bank.ndjson [--batch-size 500]
+    python -m scripts.problems export [-o bank.ndjson]
+    python -m scripts.problems backfill-versions
+"""
+
+import argparse
+import sys
+import time
+
+from app.core.config import settings
+from app.db.base import Base  # noqa: F401  (configures all mappers)
+from app.db.session import SessionLocal
+from app.services.problem_io_service import problem_io_service
+from app.services.problem_version_service import problem_version_service
+
+
+def import_problems(path: str, batch_size: int) -> int:
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        with open(path, "rb") as lines:
+            report = problem_io_service.import_ndjson(
+                db, lines, batch_size=batch_size
+            )
+    finally:
+        db.close()
+    for error in report["errors"]:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+    print(
+        f"imported {report['imported']}, failed {report['failed']} "
+        f"in {time.perf_counter() - started:.1f}s",
+        file=sys.stderr,
+    )
+    return 1 if report["failed"] else 0
+
+
+def export_problems(path: str) -> int:
+    db = SessionLocal()
+    out = open(path, "wb") if path != "-" else sys.stdout.buffer
+    try:
+        for line in problem_io_service.export_ndjson(db):
+            out.write(line)
+    finally:
+        db.close()
+        if out is not sys.stdout.buffer:
+            out.close()
+    return 0
+
+
+def backfill_versions() -> int:
+    db = SessionLocal()
+    try:
+        created = problem_version_service.backfill(db)
+    finally:
+        db.close()
+    print(f"versioned {created} problems", file=sys.stderr)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = commands.add_parser("import", help="import an NDJSON file")
+    import_cmd.add_argument("path")
+    import_cmd.add_argument(
+        "--batch-size", type=int, default=settings.PROBLEM_IMPORT_BATCH_SIZE
+    )
+
+    export_cmd = commands.add_parser("export", help="export as NDJSON")
+    export_cmd.add_argument("-o", "--output", default="-")
+
+    commands.add_parser(
+        "backfill-versions", help="create versions for unversioned problems"
+    )
+
+    args = parser.parse_args()
+    if args.command == "import":
+        return import_problems(args.path, args.batch_size)
+    if args.command == "backfill-versions":
+        return backfill_versions()
+    return export_problems(args.output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
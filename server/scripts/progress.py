@@ -0,0 +1,51 @@
+"""
+Maintenance of the user progress aggregates.
+
+Usage (from ``server/``)::
+
+    python -m scripts.progress backfill
+    python -m scripts.progress backfill-heatmaps
+"""
+
+import argparse
+import sys
+import time
+
+from app.db.base import Base  # noqa: F401  (configures all mappers)
+from app.db.session import SessionLocal
+from app.services.heatmap_service import heatmap_service
+from app.services.progress_service import progress_service
+
+
+def backfill(service, name: str) -> int:
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        service.rebuild(db)
+    finally:
+        db.close()
+    print(
+        f"rebuilt {name} in {time.perf_counter() - started:.1f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "backfill", help="recompute all progress from submissions"
+    )
+    commands.add_parser(
+        "backfill-heatmaps",
+        help="recompute daily activity calendars from submissions",
+    )
+    args = parser.parse_args()
+    if args.command == "backfill-heatmaps":
+        return backfill(heatmap_service, "activity calendars")
+    return backfill(progress_service, "progress")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
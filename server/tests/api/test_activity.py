@@ -0,0 +1,150 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.app import create_app
+from app.db.session import get_db
+from app.models.activity import ActivityEvent
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.services.activity_service import ActivityService, activity_service
+
+
+def _events(count: int) -> dict:
+    return {
+        "events": [
+            {"event_type": "page_view", "payload": {"path": f"/p/{i}"}}
+            for i in range(count)
+        ]
+    }
+
+
+def test_record_activity(
+    client: TestClient, db: Session, user_token_headers, admin_token_headers
+) -> None:
+    """Test that events are buffered, then written in bulk."""
+    response = client.post(
+        "/api/v1/activity/", headers=user_token_headers, json=_events(3)
+    )
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 3, "dropped": 0}
+
+    activity_service.flush()
+    events = db.query(ActivityEvent).order_by(ActivityEvent.id).all()
+    assert [e.payload["path"] for e in events] == ["/p/0", "/p/1", "/p/2"]
+    assert all(e.event_type == "page_view" for e in events)
+
+    response = client.get(
+        "/api/v1/activity/stats", headers=admin_token_headers
+    )
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["accepted"] == 3
+    assert stats["flushed"] == 3
+    assert stats["buffered"] == 0
+
+    response = client.get("/api/v1/activity/stats", headers=user_token_headers)
+    assert response.status_code == 403
+
+
+def test_record_activity_rejects_bad_events(
+    client: TestClient, user_token_headers
+) -> None:
+    """Test event type validation and the batch size limit."""
+    response = client.post(
+        "/api/v1/activity/",
+        headers=user_token_headers,
+        json={"events": [{"event_type": "DROP TABLE"}]},
+    )
+    assert response.status_code == 422
+    response = client.post(
+        "/api/v1/activity/", headers=user_token_headers, json=_events(101)
+    )
+    assert response.status_code == 422
+    response = client.post(
+        "/api/v1/activity/",
+        headers=user_token_headers,
+        json={
+            "events": [{"event_type": "editor", "payload": {"s": "x" * 5000}}]
+        },
+    )
+    assert response.status_code == 422
+
+
+def test_record_activity_checks_problems(
+    client: TestClient, db: Session, user_token_headers
+) -> None:
+    """Test that events may only point at existing problems."""
+    problem = Problem(
+        title="Two Sum",
+        description="Add them up.",
+        problem_type=ProblemType.DSA,
+        difficulty=DifficultyLevel.EASY,
+        problem_metadata={},
+    )
+    db.add(problem)
+    db.commit()
+    for problem_id, status_code in ((problem.id, 202), (9999, 404)):
+        response = client.post(
+            "/api/v1/activity/",
+            headers=user_token_headers,
+            json={
+                "events": [
+                    {"event_type": "page_view", "problem_id": problem.id},
+                    {"event_type": "page_view", "problem_id": problem_id},
+                ]
+            },
+        )
+        assert response.status_code == status_code
+
+
+def test_activity_flush_discards_rejected_rows(db: Session) -> None:
+    """Test that a row the database rejects does not hold up the rest."""
+    service = ActivityService(batch_size=8)
+    events = [{"event_type": "editor"}] * 10
+    events[3] = {"event_type": None}
+    service.record(db, user_id=1, events=events)
+
+    assert service.flush() == 9
+    assert db.query(ActivityEvent).count() == 9
+    stats = service.stats()
+    assert stats["rejected"] == 1
+    assert stats["flushed"] == 9
+    assert stats["buffered"] == 0
+
+
+def test_activity_sampling_and_drops(db: Session) -> None:
+    """Test sampling above the threshold and drops once full."""
+    events = [{"event_type": "editor"}] * 20
+
+    sampled = ActivityService(
+        capacity=10, sample_threshold=0.5, sample_rate=0.0
+    )
+    assert sampled.record(db, user_id=1, events=events) == (5, 0)
+    assert sampled.stats()["sampled_out"] == 15
+
+    full = ActivityService(capacity=10, sample_threshold=1.0)
+    assert full.record(db, user_id=1, events=events) == (10, 10)
+    assert full.stats()["dropped"] == 10
+
+
+def test_activity_backpressure(
+    client: TestClient, user_token_headers, monkeypatch
+) -> None:
+    """Test that a full buffer asks clients to retry later."""
+    monkeypatch.setattr(activity_service, "capacity", 0)
+    response = client.post(
+        "/api/v1/activity/", headers=user_token_headers, json=_events(2)
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_activity_flushed_on_shutdown(db: Session, user_token_headers) -> None:
+    """Test that buffered events survive a graceful shutdown."""
+    app = create_app()
+    app.dependency_overrides[get_db] = lambda: db
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/v1/activity/", headers=user_token_headers, json=_events(4)
+        )
+        assert response.status_code == 202
+    assert db.query(ActivityEvent).count() == 4
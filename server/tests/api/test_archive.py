@@ -0,0 +1,149 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.submission import Submission, SubmissionStatus
+from app.models.user import User
+from app.services.archive_service import (
+    SubmissionArchiveService,
+    submission_archive_service,
+)
+
+OLD = datetime.now(timezone.utc) - timedelta(days=400)
+
+
+@pytest.fixture(scope="function")
+def archive_dir(tmp_path, monkeypatch) -> str:
+    directory = str(tmp_path / "archive")
+    monkeypatch.setattr(submission_archive_service, "directory", directory)
+    return directory
+
+
+@pytest.fixture(scope="function")
+def history(db: Session, test_user, test_admin):
+    """Old judged submissions of two users, plus a recent and a pending."""
+    problem = Problem(
+        title="Square",
+        description="Square a number.",
+        problem_type=ProblemType.DSA,
+        difficulty=DifficultyLevel.EASY,
+        problem_metadata={},
+    )
+    db.add(problem)
+    db.flush()
+    users = db.query(User).order_by(User.id).all()
+    submissions = [
+        Submission(
+            user_id=users[i % 2].id,
+            problem_id=problem.id,
+            content=f"def solve(n):\n    return n * n  # {i}",
+            language="python",
+            status=SubmissionStatus.ACCEPTED,
+            score=100.0,
+            results={"summary": {"passedTests": i}},
+            created_at=OLD + timedelta(minutes=i),
+        )
+        for i in range(6)
+    ]
+    submissions.append(
+        Submission(
+            user_id=users[0].id,
+            problem_id=problem.id,
+            content="recent",
+            status=SubmissionStatus.REJECTED,
+        )
+    )
+    submissions.append(
+        Submission(
+            user_id=users[0].id,
+            problem_id=problem.id,
+            content="pending",
+            status=SubmissionStatus.PENDING,
+            created_at=OLD,
+        )
+    )
+    db.add_all(submissions)
+    db.commit()
+    return submissions
+
+
+def test_archive_leaves_stub_rows(
+    db: Session, history, archive_dir: str
+) -> None:
+    service = SubmissionArchiveService(archive_dir, block_size=128)
+    assert service.archive(db, older_than=timedelta(days=30), limit=4) == 4
+    assert service.archive(db, older_than=timedelta(days=30)) == 2
+    assert service.archive(db, older_than=timedelta(days=30)) == 0
+    assert sorted(os.listdir(archive_dir)) == [
+        "segment-000001.idx",
+        "segment-000001.seg",
+        "segment-000002.idx",
+        "segment-000002.seg",
+    ]
+
+    db.expire_all()
+    archived = [s for s in history if s.archived]
+    assert len(archived) == 6
+    for submission in archived:
+        assert submission.content == ""
+        assert submission.results is None
+        assert submission.status == SubmissionStatus.ACCEPTED
+
+        record = service.read(submission)
+        assert record["content"].endswith(
+            f"# {record['results']['summary']['passedTests']}"
+        )
+        assert record["user_id"] == submission.user_id
+    # Recent and pending submissions stay hot
+    assert history[6].content == "recent"
+    assert history[7].content == "pending"
+
+
+def test_get_submission_faults_in_archived_row(
+    client: TestClient,
+    db: Session,
+    history,
+    archive_dir: str,
+    user_token_headers,
+    admin_token_headers,
+) -> None:
+    submission_archive_service.archive(db, older_than=timedelta(days=30))
+    submission_id = history[0].id
+
+    response = client.get(
+        f"/api/v1/submissions/{submission_id}", headers=user_token_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["archived"] is True
+    assert data["content"] == "def solve(n):\n    return n * n  # 0"
+    assert data["results"] == {"summary": {"passedTests": 0}}
+
+    # Lists return the stubs
+    response = client.get("/api/v1/submissions/", headers=user_token_headers)
+    items = {item["id"]: item for item in response.json()["items"]}
+    assert items[submission_id]["archived"] is True
+    assert items[submission_id]["content"] == ""
+    assert items[history[6].id]["archived"] is False
+
+    # Reading does not write the row back
+    db.expire_all()
+    assert history[0].content == ""
+
+    # Re-judging restores it to the hot table
+    response = client.put(
+        f"/api/v1/submissions/{submission_id}",
+        headers=admin_token_headers,
+        json={"score": 90.0},
+    )
+    assert response.status_code == 200
+    assert response.json()["archived"] is False
+    db.expire_all()
+    assert history[0].archive_segment is None
+    assert history[0].content == "def solve(n):\n    return n * n  # 0"
+    assert history[0].results == {"summary": {"passedTests": 0}}
+    assert history[0].score == 90.0
@@ -0,0 +1,516 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.contest import ContestJudgeJob, ContestResult
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.submission import Submission, SubmissionStatus
+from app.models.user import User
+from app.services.contest_judge_service import contest_judge_service
+from app.services.contest_service import contest_service
+from app.services.submission_service import submission_service
+
+
+@pytest.fixture(scope="function")
+def problems(db: Session) -> List[Problem]:
+    """An easy, a medium and a hard problem."""
+    problems = [
+        Problem(
+            title=f"Problem {difficulty.value}",
+            description="Solve it.",
+            problem_type=ProblemType.DSA,
+            difficulty=difficulty,
+            problem_metadata={},
+        )
+        for difficulty in (
+            DifficultyLevel.EASY,
+            DifficultyLevel.MEDIUM,
+            DifficultyLevel.HARD,
+        )
+    ]
+    db.add_all(problems)
+    db.commit()
+    return problems
+
+
+def _contest(
+    client: TestClient,
+    headers: Dict[str, str],
+    problems: List[Problem],
+    *,
+    starts_in: int,
+    duration: int = 3600,
+    freeze_in: Optional[int] = None,
+) -> Dict:
+    """Create a contest starting ``starts_in`` seconds from now."""
+    now = datetime.now(timezone.utc)
+    response = client.post(
+        "/api/v1/contests/",
+        headers=headers,
+        json={
+            "title": "Weekly",
+            "starts_at": (now + timedelta(seconds=starts_in)).isoformat(),
+            "ends_at": (
+                now + timedelta(seconds=starts_in + duration)
+            ).isoformat(),
+            "freeze_at": (
+                (now + timedelta(seconds=freeze_in)).isoformat()
+                if freeze_in is not None
+                else None
+            ),
+            "problem_ids": [problem.id for problem in problems],
+        },
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def _submit(
+    client: TestClient,
+    headers: Dict[str, str],
+    problem: Problem,
+    contest_id: Optional[int],
+):
+    return client.post(
+        "/api/v1/submissions/",
+        headers=headers,
+        json={
+            "problem_id": problem.id,
+            "content": "pass",
+            "contest_id": contest_id,
+        },
+    )
+
+
+def test_create_contest(
+    client: TestClient,
+    problems: List[Problem],
+    admin_token_headers,
+    user_token_headers,
+) -> None:
+    contest = _contest(
+        client, admin_token_headers, problems[1::-1], starts_in=60
+    )
+    response = client.get(
+        f"/api/v1/contests/{contest['id']}", headers=user_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["problem_ids"] == [problems[1].id, problems[0].id]
+    response = client.get("/api/v1/contests/", headers=user_token_headers)
+    assert [c["id"] for c in response.json()] == [contest["id"]]
+
+    now = datetime.now(timezone.utc)
+    contest_in = {
+        "title": "Broken",
+        "starts_at": now.isoformat(),
+        "ends_at": (now + timedelta(hours=1)).isoformat(),
+        "problem_ids": [problems[0].id],
+    }
+    response = client.post(
+        "/api/v1/contests/", headers=user_token_headers, json=contest_in
+    )
+    assert response.status_code == 403
+    for changes, status_code in (
+        ({"ends_at": now.isoformat()}, 400),
+        ({"freeze_at": (now + timedelta(hours=2)).isoformat()}, 400),
+        ({"problem_ids": [problems[0].id, problems[0].id]}, 400),
+        ({"problem_ids": [problems[0].id, 9999]}, 404),
+    ):
+        response = client.post(
+            "/api/v1/contests/",
+            headers=admin_token_headers,
+            json={**contest_in, **changes},
+        )
+        assert response.status_code == status_code
+
+
+def test_contest_problems_are_prewarmed(
+    client: TestClient,
+    problems: List[Problem],
+    admin_token_headers,
+    user_token_headers,
+    query_budget,
+) -> None:
+    problem = problems[0]
+    expected = client.get(
+        f"/api/v1/problems/{problem.id}", headers=user_token_headers
+    ).json()
+    _contest(client, admin_token_headers, problems[:2], starts_in=60)
+
+    # Warmed ahead of the start
+    response = client.post(
+        "/api/v1/contests/refresh", headers=admin_token_headers
+    )
+    assert response.json() == {"problems": 2, "scoreboards": 0}
+
+    with query_budget(1) as stats:
+        response = client.get(
+            f"/api/v1/problems/{problem.id}", headers=user_token_headers
+        )
+    assert response.status_code == 200
+    assert response.json() == expected
+    # Only the user is looked up
+    assert not [s for s in stats.statements if "FROM problem" in s]
+
+    # Changed problems are served fresh until the next refresh
+    response = client.put(
+        f"/api/v1/problems/{problem.id}",
+        headers=admin_token_headers,
+        json={"title": "Renamed"},
+    )
+    assert response.status_code == 200
+    response = client.get(
+        f"/api/v1/problems/{problem.id}", headers=user_token_headers
+    )
+    assert response.json()["title"] == "Renamed"
+    assert contest_service.cached_problem(problem.id) is None
+
+
+def test_contest_scoreboard_from_snapshots(
+    client: TestClient,
+    db: Session,
+    problems: List[Problem],
+    admin_token_headers,
+    user_token_headers,
+    query_budget,
+) -> None:
+    # Started a little over ten minutes ago
+    contest = _contest(client, admin_token_headers, problems, starts_in=-630)
+    user = db.scalar(select(User).where(User.username == "testuser"))
+    admin = db.scalar(select(User).where(User.username == "adminuser"))
+
+    # A rejected attempt before the solve costs the user penalty minutes
+    rejected = Submission(
+        user_id=user.id,
+        problem_id=problems[1].id,
+        content="fail",
+        contest_id=contest["id"],
+    )
+    db.add(rejected)
+    db.commit()
+    submission_service.record_verdict(
+        db, submission=rejected, status=SubmissionStatus.REJECTED
+    )
+
+    for headers in (user_token_headers, admin_token_headers):
+        for problem in problems[:2]:
+            response = _submit(client, headers, problem, contest["id"])
+            assert response.status_code == 200
+            assert response.json()["contest_id"] == contest["id"]
+    contest_judge_service.join()
+
+    # Nothing materialized yet
+    scoreboard_url = f"/api/v1/contests/{contest['id']}/scoreboard"
+    response = client.get(scoreboard_url, headers=user_token_headers)
+    assert response.json() == {
+        "contest_id": contest["id"],
+        "taken_at": None,
+        "frozen": False,
+        "total": 0,
+        "entries": [],
+    }
+
+    response = client.post(
+        "/api/v1/contests/refresh", headers=admin_token_headers
+    )
+    assert response.json() == {"problems": 3, "scoreboards": 1}
+
+    with query_budget(2) as stats:
+        response = client.get(scoreboard_url, headers=user_token_headers)
+    assert not [s for s in stats.statements if "submission" in s]
+    scoreboard = response.json()
+    assert scoreboard["taken_at"] is not None
+    assert scoreboard["frozen"] is False
+    assert scoreboard["total"] == 2
+    assert [
+        (e["rank"], e["username"], e["score"], e["solved"], e["penalty"])
+        for e in scoreboard["entries"]
+    ] == [(1, "adminuser", 3, 2, 20), (2, "testuser", 3, 2, 40)]
+    assert scoreboard["entries"][0]["user_id"] == admin.id
+
+    response = client.get(
+        scoreboard_url, headers=user_token_headers, params={"skip": 1}
+    )
+    assert [e["username"] for e in response.json()["entries"]] == ["testuser"]
+
+    response = client.get(
+        "/api/v1/contests/admission", headers=admin_token_headers
+    )
+    assert response.json()["judged"] == 4
+    assert response.json()["queued"] == 0
+
+
+def test_contest_results_do_not_depend_on_judge_order(
+    client: TestClient,
+    db: Session,
+    problems: List[Problem],
+    admin_token_headers,
+    test_user,
+) -> None:
+    contest = _contest(
+        client, admin_token_headers, problems, starts_in=-3600, duration=7200
+    )
+    info = contest_service.get(db, contest_id=contest["id"])
+    user = db.scalar(select(User).where(User.username == "testuser"))
+    now = datetime.now(timezone.utc)
+    submissions = {
+        minutes_ago: Submission(
+            user_id=user.id,
+            problem_id=problems[0].id,
+            content="pass",
+            contest_id=contest["id"],
+            created_at=now - timedelta(minutes=minutes_ago),
+        )
+        for minutes_ago in (50, 5, 1)
+    }
+    db.add_all(submissions.values())
+    db.commit()
+
+    # The accepted submission is judged before the earlier rejection and
+    # a later rejection, as parallel judge workers may finish them
+    for minutes_ago, status in (
+        (5, SubmissionStatus.ACCEPTED),
+        (1, SubmissionStatus.REJECTED),
+        (50, SubmissionStatus.REJECTED),
+    ):
+        submission_service.record_verdict(
+            db, submission=submissions[minutes_ago], status=status
+        )
+    result = db.get(ContestResult, (contest["id"], user.id, problems[0].id))
+    assert result.failed_attempts == 1
+    # 55 minutes into the contest plus one rejection
+    [entry] = contest_service.materialize(db, info).entries
+    assert (entry["score"], entry["penalty"]) == (1, 55 + 20)
+
+    # Re-judging the accepted submission moves the solve to the next one
+    submission_service.record_verdict(
+        db, submission=submissions[5], status=SubmissionStatus.REJECTED
+    )
+    submission_service.record_verdict(
+        db, submission=submissions[1], status=SubmissionStatus.ACCEPTED
+    )
+    db.refresh(result)
+    assert result.failed_attempts == 2
+    [entry] = contest_service.materialize(db, info).entries
+    assert entry["penalty"] == 59 + 2 * 20
+
+
+def test_refresh_keeps_a_fresh_snapshot(
+    client: TestClient,
+    db: Session,
+    problems: List[Problem],
+    admin_token_headers,
+    test_user,
+) -> None:
+    contest = _contest(
+        client, admin_token_headers, problems, starts_in=-3600, duration=7200
+    )
+    info = contest_service.get(db, contest_id=contest["id"])
+    solved_at = datetime.now(timezone.utc) - timedelta(minutes=30)
+
+    def solve(username: str, problem: Problem) -> None:
+        user = db.scalar(select(User).where(User.username == username))
+        db.add(
+            ContestResult(
+                contest_id=contest["id"],
+                user_id=user.id,
+                problem_id=problem.id,
+                failed_attempts=0,
+                solved_at=solved_at,
+            )
+        )
+        db.commit()
+
+    solve("adminuser", problems[0])
+    first = contest_service.materialize(db, info)
+    solve("testuser", problems[1])
+
+    # Another worker's refresh loads the snapshot instead of writing it
+    kept = contest_service.materialize(db, info, max_age=60)
+    assert kept.taken_at == first.taken_at
+    assert [e["username"] for e in kept.entries] == ["adminuser"]
+    # ... unless it is older than max_age
+    later = info.starts_at + timedelta(minutes=90)
+    fresh = contest_service.materialize(db, info, now=later, max_age=60)
+    assert fresh.taken_at == later
+    assert len(fresh.entries) == 2
+
+
+def test_scoreboard_freeze(
+    client: TestClient,
+    db: Session,
+    problems: List[Problem],
+    admin_token_headers,
+    user_token_headers,
+) -> None:
+    # Frozen half an hour ago, ends in half an hour
+    contest = _contest(
+        client,
+        admin_token_headers,
+        problems,
+        starts_in=-3600,
+        duration=7200,
+        freeze_in=-1800,
+    )
+    admin = db.scalar(select(User).where(User.username == "adminuser"))
+    db.add(
+        ContestResult(
+            contest_id=contest["id"],
+            user_id=admin.id,
+            problem_id=problems[2].id,
+            failed_attempts=0,
+            solved_at=datetime.now(timezone.utc) - timedelta(minutes=40),
+        )
+    )
+    db.commit()
+    response = _submit(client, user_token_headers, problems[0], contest["id"])
+    assert response.status_code == 200
+    contest_judge_service.join()
+
+    client.post("/api/v1/contests/refresh", headers=admin_token_headers)
+    response = client.get(
+        f"/api/v1/contests/{contest['id']}/scoreboard",
+        headers=user_token_headers,
+    )
+    scoreboard = response.json()
+    assert scoreboard["frozen"] is True
+    assert [(e["username"], e["score"]) for e in scoreboard["entries"]] == [
+        ("adminuser", 3)
+    ]
+
+    # After the end the final standings count every solve
+    info = contest_service.get(db, contest_id=contest["id"])
+    final = contest_service.materialize(
+        db, info, now=info.ends_at + timedelta(seconds=1)
+    )
+    assert final.frozen is False
+    assert [(e["username"], e["score"]) for e in final.entries] == [
+        ("adminuser", 3),
+        ("testuser", 1),
+    ]
+
+
+def test_contest_submission_checks(
+    client: TestClient,
+    problems: List[Problem],
+    admin_token_headers,
+    user_token_headers,
+) -> None:
+    upcoming = _contest(
+        client, admin_token_headers, problems[:1], starts_in=3600
+    )
+    running = _contest(
+        client, admin_token_headers, problems[:1], starts_in=-60
+    )
+    for problem, contest_id, status_code, detail in (
+        (problems[0], upcoming["id"], 400, "Contest is not running"),
+        (
+            problems[1],
+            running["id"],
+            400,
+            "Problem is not part of this contest",
+        ),
+        (problems[0], 9999, 404, "Contest not found"),
+    ):
+        response = _submit(client, user_token_headers, problem, contest_id)
+        assert response.status_code == status_code
+        assert response.json()["detail"] == detail
+
+
+def test_contest_admission_control(
+    monkeypatch,
+    client: TestClient,
+    db: Session,
+    problems: List[Problem],
+    admin_token_headers,
+    user_token_headers,
+) -> None:
+    contest = _contest(client, admin_token_headers, problems, starts_in=-60)
+    monkeypatch.setattr(contest_judge_service, "capacity", 0)
+
+    # A full contest queue turns submitters away before storing anything
+    response = _submit(client, user_token_headers, problems[0], contest["id"])
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert db.scalar(select(func.count()).select_from(Submission)) == 0
+
+    # Practice submissions are judged as before
+    response = _submit(client, user_token_headers, problems[0], None)
+    assert response.status_code == 200
+    assert db.scalar(select(Submission.status)) == SubmissionStatus.ACCEPTED
+
+    # So does a process short of CPU, whatever room the queue has
+    monkeypatch.setattr(contest_judge_service, "capacity", 10)
+    monkeypatch.setattr(contest_judge_service, "max_loop_lag", 0.0)
+    response = _submit(client, user_token_headers, problems[0], contest["id"])
+    assert response.status_code == 429
+
+    response = client.get(
+        "/api/v1/contests/admission", headers=admin_token_headers
+    )
+    assert response.json()["rejected"] == 2
+    assert response.json()["admitted"] == 0
+
+
+def test_contest_judge_queue_retakes_abandoned_claims(
+    db: Session, problems: List[Problem], test_user
+) -> None:
+    now = datetime.now(timezone.utc)
+    contest = contest_service.create(
+        db,
+        title="Weekly",
+        starts_at=now - timedelta(minutes=5),
+        ends_at=now + timedelta(hours=1),
+        freeze_at=None,
+        problem_ids=[problem.id for problem in problems],
+    )
+    user = db.scalar(select(User).where(User.username == "testuser"))
+    abandoned, claimed, judged = (
+        Submission(
+            user_id=user.id,
+            problem_id=problem.id,
+            content="def solve(n):\n    return n\n",
+            contest_id=contest.id,
+        )
+        for problem in problems
+    )
+    lease = contest_judge_service.lease
+    db.add_all(
+        [
+            # Claimed by a worker that died mid-judge
+            ContestJudgeJob(
+                submission=abandoned,
+                enqueued_at=now - 2 * lease,
+                claimed_at=now - 2 * lease,
+            ),
+            # Being judged by a live worker
+            ContestJudgeJob(
+                submission=claimed, enqueued_at=now, claimed_at=now
+            ),
+            # Judged by a worker that died before deleting the row
+            ContestJudgeJob(
+                submission=judged,
+                enqueued_at=now - lease,
+                claimed_at=now - 2 * lease,
+            ),
+        ]
+    )
+    db.commit()
+    submission_service.record_verdict(
+        db, submission=judged, status=SubmissionStatus.REJECTED
+    )
+
+    while contest_judge_service.judge_next(db.get_bind()):
+        pass
+
+    assert list(db.scalars(select(ContestJudgeJob.submission_id))) == [
+        claimed.id
+    ]
+    db.expire_all()
+    assert abandoned.status == SubmissionStatus.ACCEPTED
+    assert claimed.status == SubmissionStatus.PENDING
+    assert judged.status == SubmissionStatus.REJECTED
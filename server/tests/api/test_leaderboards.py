@@ -0,0 +1,185 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.security import get_password_hash
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.submission import Submission, SubmissionStatus
+from app.models.user import User
+from app.services.leaderboard_service import Leaderboard, leaderboard_service
+from app.services.submission_service import submission_service
+
+
+@pytest.fixture(scope="function")
+def problems(db: Session):
+    """One DSA problem per difficulty and an easy SQL problem."""
+    problems = [
+        Problem(
+            title=f"{problem_type.value} {difficulty.value}",
+            description="Solve it.",
+            problem_type=problem_type,
+            difficulty=difficulty,
+            problem_metadata={},
+        )
+        for problem_type, difficulty in [
+            (ProblemType.DSA, DifficultyLevel.EASY),
+            (ProblemType.DSA, DifficultyLevel.MEDIUM),
+            (ProblemType.DSA, DifficultyLevel.HARD),
+            (ProblemType.SQL, DifficultyLevel.EASY),
+        ]
+    ]
+    db.add_all(problems)
+    db.commit()
+    return problems
+
+
+def _user(db: Session, name: str) -> User:
+    user = User(
+        email=f"{name}@example.com",
+        username=name,
+        hashed_password=get_password_hash("password"),
+        is_active=True,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _solve(db: Session, user: User, problem: Problem) -> Submission:
+    submission = Submission(
+        user_id=user.id,
+        problem_id=problem.id,
+        content="pass",
+        language="python",
+    )
+    db.add(submission)
+    db.commit()
+    return submission_service.record_verdict(
+        db,
+        submission=submission,
+        status=SubmissionStatus.ACCEPTED,
+        score=100.0,
+    )
+
+
+def test_leaderboard_matches_sorted_order() -> None:
+    """Test ranks, top-K and neighbors against a plain sort."""
+    rng = random.Random(7)
+    board = Leaderboard("test", capacity=4)
+    scores = {}
+    for _ in range(2000):
+        user_id = rng.randrange(200)
+        score = rng.choice([0, rng.randrange(1, 50), rng.randrange(1, 5000)])
+        board.set_score(user_id, score)
+        if score:
+            scores[user_id] = score
+        else:
+            scores.pop(user_id, None)
+
+    ordered = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    expected = [
+        (1 + sum(s > score for s in scores.values()), user_id, score)
+        for user_id, score in ordered
+    ]
+    assert len(board) == len(scores)
+    assert board.top(25) == expected[:25]
+    for position, (rank, user_id, score) in enumerate(expected):
+        assert board.rank(user_id) == rank
+        assert (
+            board.around(user_id, 3)
+            == expected[max(0, position - 3) : position + 4]
+        )
+    assert board.rank(10_000) is None
+    assert board.around(10_000, 3) == []
+
+
+def test_leaderboards_follow_verdicts(
+    client: TestClient,
+    db: Session,
+    problems,
+    test_user,
+    user_token_headers,
+) -> None:
+    """Test that verdicts move users on the global and per-type boards."""
+    me = db.query(User).filter(User.username == test_user["username"]).one()
+    alice, bob = _user(db, "alice"), _user(db, "bob")
+    dsa_easy, dsa_medium, dsa_hard, sql_easy = problems
+
+    # Load the (empty) boards so the verdicts below are applied live
+    response = client.get(
+        "/api/v1/leaderboards/global", headers=user_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["total"] == 0
+
+    _solve(db, alice, dsa_hard)  # 3 points
+    _solve(db, bob, dsa_easy)  # 1
+    _solve(db, bob, dsa_medium)  # 3
+    _solve(db, me, sql_easy)  # 1
+    _solve(db, me, sql_easy)  # solved already, no change
+
+    response = client.get(
+        "/api/v1/leaderboards/global", headers=user_token_headers
+    )
+    board = response.json()
+    assert board["total"] == 3
+    assert [
+        (e["rank"], e["username"], e["score"]) for e in board["entries"]
+    ] == [(1, "alice", 3), (1, "bob", 3), (3, "testuser", 1)]
+
+    response = client.get(
+        "/api/v1/leaderboards/global/me?radius=1", headers=user_token_headers
+    )
+    position = response.json()
+    assert position["entry"]["rank"] == 3
+    assert [e["username"] for e in position["neighbors"]] == [
+        "bob",
+        "testuser",
+    ]
+
+    response = client.get(
+        "/api/v1/leaderboards/sql", headers=user_token_headers
+    )
+    assert [e["username"] for e in response.json()["entries"]] == ["testuser"]
+    response = client.get(
+        f"/api/v1/leaderboards/sql/users/{alice.id}",
+        headers=user_token_headers,
+    )
+    assert response.json()["entry"] is None
+
+    response = client.get(
+        "/api/v1/leaderboards/nope", headers=user_token_headers
+    )
+    assert response.status_code == 404
+
+
+def test_leaderboards_restart_from_snapshot(
+    client: TestClient,
+    db: Session,
+    problems,
+    test_user,
+    user_token_headers,
+) -> None:
+    """Test that a reload uses the snapshot and catches up after it."""
+    alice, bob = _user(db, "alice"), _user(db, "bob")
+    dsa_easy, dsa_medium, dsa_hard, sql_easy = problems
+    _solve(db, alice, dsa_easy)
+
+    response = client.get(
+        "/api/v1/leaderboards/global", headers=user_token_headers
+    )
+    assert [e["username"] for e in response.json()["entries"]] == ["alice"]
+    assert leaderboard_service.snapshot() == 2  # global and dsa
+
+    # Restart, then record a verdict before the boards are read again
+    leaderboard_service.reset()
+    _solve(db, bob, dsa_hard)
+
+    response = client.get(
+        "/api/v1/leaderboards/global", headers=user_token_headers
+    )
+    assert [
+        (e["username"], e["score"]) for e in response.json()["entries"]
+    ] == [("bob", 3), ("alice", 1)]
@@ -0,0 +1,158 @@
+import re
+import threading
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram, Registry
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+
+SAMPLE = re.compile(r"^([a-z_]+)(\{.*\})? (\S+)$")
+TOKEN = "scrape-me"
+SCRAPER = {"Authorization": f"Bearer {TOKEN}"}
+
+
+@pytest.fixture(autouse=True)
+def metrics_token(monkeypatch) -> None:
+    """Serve /metrics in apps created in the test (set before ``client``)."""
+    monkeypatch.setattr(settings, "METRICS_TOKEN", TOKEN)
+
+
+def _samples(text: str) -> Dict[str, float]:
+    samples = {}
+    for line in text.splitlines():
+        match = SAMPLE.match(line)
+        if match:
+            name, labels, value = match.groups()
+            samples[name + (labels or "")] = float(value)
+    return samples
+
+
+@pytest.fixture(scope="function")
+def problem(db: Session) -> Problem:
+    problem = Problem(
+        title="Square",
+        description="Square a number.",
+        problem_type=ProblemType.DSA,
+        difficulty=DifficultyLevel.EASY,
+        problem_metadata={},
+    )
+    db.add(problem)
+    db.commit()
+    return problem
+
+
+def test_metrics_use_route_templates(
+    client: TestClient, user_token_headers, problem: Problem
+) -> None:
+    route = 'method="GET",route="/api/v1/problems/{problem_id}"'
+    before = _samples(client.get("/metrics", headers=SCRAPER).text)
+
+    for problem_id in (problem.id, problem.id, 999):
+        client.get(
+            f"/api/v1/problems/{problem_id}", headers=user_token_headers
+        )
+    client.get("/no/such/path")
+
+    response = client.get("/metrics", headers=SCRAPER)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    after = _samples(response.text)
+
+    def delta(key: str) -> float:
+        return after.get(key, 0) - before.get(key, 0)
+
+    assert delta(f'http_requests_total{{{route},status="200"}}') == 2
+    assert delta(f'http_requests_total{{{route},status="404"}}') == 1
+    assert (
+        delta(
+            'http_requests_total{method="GET",route="unmatched",'
+            'status="404"}'
+        )
+        == 1
+    )
+    assert delta(f"http_request_duration_seconds_count{{{route}}}") == 3
+    assert (
+        delta(f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}')
+        == 3
+    )
+    # Raw ids never become label values
+    assert "/api/v1/problems/999" not in response.text
+    # Only the /metrics request itself is in flight
+    assert after["http_requests_in_flight"] == 1
+    assert 'db_pool_checked_out{engine="sync"}' in after
+    assert 'db_statements_total{engine="async"}' in after
+
+
+def test_judge_metrics(
+    client: TestClient, user_token_headers, problem: Problem
+) -> None:
+    before = _samples(client.get("/metrics", headers=SCRAPER).text)
+    response = client.post(
+        "/api/v1/submissions/",
+        headers=user_token_headers,
+        json={"problem_id": problem.id, "content": "x"},
+    )
+    assert response.status_code == 200
+    after = _samples(client.get("/metrics", headers=SCRAPER).text)
+
+    assert after["judge_queue_depth"] == before.get("judge_queue_depth", 0)
+    assert (
+        after["judge_duration_seconds_count"]
+        - before.get("judge_duration_seconds_count", 0)
+        == 1
+    )
+    accepted = 'judge_verdicts_total{status="accepted"}'
+    assert after[accepted] - before.get(accepted, 0) == 1
+    for stage in ("queue", "load", "compile", "run", "check", "persist"):
+        count = f'judge_stage_duration_seconds_count{{stage="{stage}"}}'
+        assert after[count] - before.get(count, 0) == 1
+
+
+def test_metrics_token(client: TestClient) -> None:
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer x"})
+    assert response.status_code == 401
+    assert client.get("/metrics", headers=SCRAPER).status_code == 200
+
+
+def test_metrics_not_served_without_token(monkeypatch, request) -> None:
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    client = request.getfixturevalue("client")
+    assert client.get("/metrics").status_code == 404
+
+
+def test_sharded_metrics_merge_across_threads() -> None:
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "R.", ("kind",)))
+    depth = registry.register(Gauge("depth", "D."))
+    latency = registry.register(
+        Histogram("latency_seconds", "L.", buckets=(0.1, 1.0))
+    )
+
+    def work() -> None:
+        for _ in range(1000):
+            requests.inc("a")
+            depth.inc()
+            latency.observe(0.5)
+        depth.dec(amount=1000)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latency.observe(0.1)
+    latency.observe(5)
+
+    samples = _samples(registry.render())
+    assert samples['requests_total{kind="a"}'] == 4000
+    assert samples["depth"] == 0
+    assert samples['latency_seconds_bucket{le="0.1"}'] == 1
+    assert samples['latency_seconds_bucket{le="1"}'] == 4001
+    assert samples['latency_seconds_bucket{le="+Inf"}'] == 4002
+    assert samples["latency_seconds_count"] == 4002
+    assert samples["latency_seconds_sum"] == pytest.approx(2005.1)
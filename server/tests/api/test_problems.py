@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
@@ -145,3 +147,336 @@ def test_update_problem_admin_only(
     updated_problem = response.json()
     assert updated_problem["title"] == update_data["title"]
     assert updated_problem["difficulty"] == update_data["difficulty"]
+
+
+def test_create_problem_with_tags_and_filter(
+    client: TestClient, admin_token_headers, user_token_headers
+):
+    """Test tagging problems and filtering the list by tags."""
+    for title, tags in [
+        ("Shortest Path", ["Graphs", "BFS"]),
+        ("Course Schedule", ["graphs", "topological-sort"]),
+        ("Edit Distance", ["dp"]),
+    ]:
+        response = client.post(
+            "/api/v1/problems/",
+            headers=admin_token_headers,
+            json={
+                "title": title,
+                "description": "Solve it.",
+                "problem_type": "dsa",
+                "difficulty": "medium",
+                "tags": tags,
+            },
+        )
+        assert response.status_code == 200
+
+    assert [t["name"] for t in response.json()["tags"]] == ["dp"]
+
+    response = client.get(
+        "/api/v1/problems/?tags=graphs", headers=user_token_headers
+    )
+    assert response.json()["total"] == 2
+
+    response = client.get(
+        "/api/v1/problems/?tags=graphs&tags=bfs", headers=user_token_headers
+    )
+    data = response.json()
+    assert data["total"] == 1
+    assert data["items"][0]["title"] == "Shortest Path"
+
+    response = client.get(
+        "/api/v1/problems/?tags=unknown", headers=user_token_headers
+    )
+    assert response.json()["total"] == 0
+
+
+def test_problem_facets_follow_edits(
+    client: TestClient, admin_token_headers, user_token_headers, test_problem
+):
+    """Test that facet counts stay correct as problems are edited."""
+    response = client.post(
+        "/api/v1/problems/",
+        headers=admin_token_headers,
+        json={
+            "title": "Design a Cache",
+            "description": "Design an LRU cache.",
+            "problem_type": "lld",
+            "difficulty": "hard",
+            "tags": ["caching"],
+        },
+    )
+    cache_problem_id = response.json()["id"]
+
+    response = client.get(
+        "/api/v1/problems/facets", headers=user_token_headers
+    )
+    assert response.status_code == 200
+    facets = response.json()
+    assert facets["problem_type"]["dsa"] == 1
+    assert facets["problem_type"]["lld"] == 1
+    assert facets["difficulty"]["hard"] == 1
+    assert facets["tags"] == {"caching": 1}
+
+    # Facets exclude their own filter but honour the others
+    response = client.get(
+        "/api/v1/problems/facets?problem_type=lld&tags=caching",
+        headers=user_token_headers,
+    )
+    facets = response.json()
+    assert facets["problem_type"]["lld"] == 1
+    assert facets["problem_type"]["dsa"] == 0
+    assert facets["difficulty"]["hard"] == 1
+    assert facets["difficulty"]["medium"] == 0
+
+    client.put(
+        f"/api/v1/problems/{test_problem.id}",
+        headers=admin_token_headers,
+        json={"problem_type": "lld", "tags": ["caching", "dp"]},
+    )
+    client.delete(
+        f"/api/v1/problems/{cache_problem_id}", headers=admin_token_headers
+    )
+
+    response = client.get(
+        "/api/v1/problems/facets", headers=user_token_headers
+    )
+    facets = response.json()
+    assert facets["problem_type"]["dsa"] == 0
+    assert facets["problem_type"]["lld"] == 1
+    assert facets["difficulty"] == {
+        "easy": 0,
+        "medium": 1,
+        "hard": 0,
+        "expert": 0,
+    }
+    assert facets["tags"] == {"caching": 1, "dp": 1}
+
+
+def test_problem_facets_with_several_tags(
+    client: TestClient, admin_token_headers, user_token_headers
+):
+    """Test facet counts for the problems carrying every selected tag."""
+    for problem_type, difficulty, tags in (
+        ("dsa", "easy", ["graphs", "dp"]),
+        ("lld", "hard", ["graphs", "dp", "caching"]),
+        ("dsa", "medium", ["graphs"]),
+    ):
+        response = client.post(
+            "/api/v1/problems/",
+            headers=admin_token_headers,
+            json={
+                "title": f"{problem_type} {difficulty}",
+                "description": "Solve it.",
+                "problem_type": problem_type,
+                "difficulty": difficulty,
+                "tags": tags,
+            },
+        )
+        assert response.status_code == 200
+
+    response = client.get(
+        "/api/v1/problems/facets?tags=graphs&tags=dp",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 200
+    facets = response.json()
+    assert facets["problem_type"] == {
+        "dsa": 1,
+        "lld": 1,
+        "hld": 0,
+        "sql": 0,
+        "devops": 0,
+    }
+    assert facets["difficulty"] == {
+        "easy": 1,
+        "medium": 0,
+        "hard": 1,
+        "expert": 0,
+    }
+
+    # The other filters still apply
+    response = client.get(
+        "/api/v1/problems/facets?problem_type=dsa&tags=graphs&tags=dp",
+        headers=user_token_headers,
+    )
+    facets = response.json()
+    assert facets["difficulty"]["easy"] == 1
+    assert facets["difficulty"]["hard"] == 0
+    assert facets["problem_type"]["lld"] == 1
+
+
+def test_list_problems_returns_summaries(
+    client: TestClient, user_token_headers, test_problem
+):
+    """Test that the list endpoint never returns problem metadata."""
+    response = client.get("/api/v1/problems/", headers=user_token_headers)
+    assert response.status_code == 200
+    item = response.json()["items"][0]
+    assert set(item) == {"id", "title", "problem_type", "difficulty", "tags"}
+
+    response = client.get(
+        "/api/v1/problems/?fields=title,problem_metadata",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 400
+
+
+def test_list_problems_field_projection(
+    client: TestClient, user_token_headers, test_problem
+):
+    """Test selecting the returned fields with ``fields=``."""
+    response = client.get(
+        "/api/v1/problems/?fields=title,description",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 200
+    item = response.json()["items"][0]
+    assert item == {
+        "id": test_problem.id,
+        "title": test_problem.title,
+        "description": test_problem.description,
+    }
+
+
+def test_large_problem_list_is_gzipped(
+    client: TestClient, user_token_headers, db: Session
+):
+    """Test that large list responses are compressed when accepted."""
+    for i in range(30):
+        db.add(
+            Problem(
+                title=f"Problem {i} " + "x" * 100,
+                description="Solve it.",
+                problem_type=ProblemType.DSA,
+                difficulty=DifficultyLevel.EASY,
+            )
+        )
+    db.commit()
+
+    response = client.get(
+        "/api/v1/problems/?limit=30",
+        headers={**user_token_headers, "Accept-Encoding": "gzip"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["total"] == 30
+
+    response = client.get(
+        "/api/v1/problems/?limit=30",
+        headers={**user_token_headers, "Accept-Encoding": "identity"},
+    )
+    assert "content-encoding" not in response.headers
+
+
+def test_bulk_import_and_export(
+    client: TestClient, admin_token_headers, user_token_headers
+):
+    """Test NDJSON import with per-line errors and streamed export."""
+    lines = [
+        json.dumps(
+            {
+                "title": f"Imported {i}",
+                "description": "Imported problem.",
+                "problem_type": "sql",
+                "difficulty": "easy",
+                "tags": ["sql", "joins"],
+            }
+        )
+        for i in range(5)
+    ]
+    lines.insert(2, "{not json")
+    lines.insert(4, json.dumps({"title": "Missing fields"}))
+    body = "\n".join(lines).encode()
+
+    response = client.post(
+        "/api/v1/problems/import?batch_size=2",
+        headers=user_token_headers,
+        files={"file": ("bank.ndjson", body)},
+    )
+    assert response.status_code == 403
+
+    response = client.post(
+        "/api/v1/problems/import?batch_size=2",
+        headers=admin_token_headers,
+        files={"file": ("bank.ndjson", body)},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 5
+    assert report["failed"] == 2
+    assert [e["line"] for e in report["errors"]] == [3, 5]
+
+    response = client.get(
+        "/api/v1/problems/facets", headers=user_token_headers
+    )
+    assert response.json()["tags"] == {"joins": 5, "sql": 5}
+
+    response = client.get(
+        "/api/v1/problems/export", headers=admin_token_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["title"] for r in records] == [f"Imported {i}" for i in range(5)]
+    assert records[0]["tags"] == ["joins", "sql"]
+    assert records[0]["problem_type"] == "sql"
+
+
+def test_problem_edits_create_immutable_versions(
+    client: TestClient, admin_token_headers, user_token_headers, test_problem
+):
+    """Test that each content edit yields a new content-hashed version."""
+    original_description = test_problem.description
+    response = client.get(
+        f"/api/v1/problems/{test_problem.id}", headers=user_token_headers
+    )
+    original_hash = response.json()["version_hash"]
+    assert len(original_hash) == 64
+    assert response.headers["etag"] == f'"{original_hash}"'
+
+    response = client.get(
+        f"/api/v1/problems/{test_problem.id}",
+        headers={**user_token_headers, "If-None-Match": f'"{original_hash}"'},
+    )
+    assert response.status_code == 304
+
+    response = client.put(
+        f"/api/v1/problems/{test_problem.id}",
+        headers=admin_token_headers,
+        json={"description": "A harder statement."},
+    )
+    edited_hash = response.json()["version_hash"]
+    assert edited_hash != original_hash
+
+    # Tag-only edits don't touch the test set and keep the version
+    response = client.put(
+        f"/api/v1/problems/{test_problem.id}",
+        headers=admin_token_headers,
+        json={"tags": ["arrays"]},
+    )
+    assert response.json()["version_hash"] == edited_hash
+
+    response = client.get(
+        f"/api/v1/problems/{test_problem.id}/versions",
+        headers=user_token_headers,
+    )
+    versions = response.json()
+    assert [v["version"] for v in versions] == [2, 1]
+    assert versions[0]["content_hash"] == edited_hash
+
+    response = client.get(
+        f"/api/v1/problems/versions/{original_hash}",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 200
+    assert "immutable" in response.headers["cache-control"]
+    assert response.json()["description"] == original_description
+
+    # Reverting the content points the head back at version 1
+    response = client.put(
+        f"/api/v1/problems/{test_problem.id}",
+        headers=admin_token_headers,
+        json={"description": original_description},
+    )
+    assert response.json()["version_hash"] == original_hash
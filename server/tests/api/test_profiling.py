@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from anyio import to_thread
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiling import Sampler, _stack, profile_store
+
+TOKEN = "profile-me"
+
+
+@pytest.fixture(scope="function")
+def profiled_client(monkeypatch, request) -> TestClient:
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", TOKEN)
+    monkeypatch.setattr(settings, "PROFILING_INTERVAL_MS", 1.0)
+    profile_store.clear()
+    yield request.getfixturevalue("client")
+    profile_store.clear()
+
+
+def test_profile_on_request(
+    profiled_client: TestClient, test_user, admin_token_headers
+) -> None:
+    client = profiled_client
+    # Logging in spends its time in bcrypt on a threadpool worker
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "testuser", "password": "testpassword"},
+        headers={"X-Profile": TOKEN},
+    )
+    assert response.status_code == 200
+    profile_id = int(response.headers["X-Profile-Id"])
+
+    # Requests without the header (or with a wrong token) are not profiled
+    for headers in ({}, {"X-Profile": "guess"}):
+        response = client.get("/", headers=headers)
+        assert "X-Profile-Id" not in response.headers
+
+    response = client.get(
+        "/api/v1/system/profiles", headers=admin_token_headers
+    )
+    assert response.status_code == 200
+    [summary] = response.json()
+    assert summary["id"] == profile_id
+    assert summary["route"] == "/api/v1/auth/login"
+    assert summary["status"] == 200
+    assert summary["samples"] > 0
+
+    response = client.get(
+        f"/api/v1/system/profiles/{profile_id}", headers=admin_token_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = response.text.splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+        assert stack.split(";")[0] in ("loop", "worker")
+    assert "app.core.security:verify_password" in response.text
+
+    merged = client.get(
+        "/api/v1/system/profiles/collapsed",
+        params={"route": "/api/v1/auth/login"},
+        headers=admin_token_headers,
+    )
+    assert merged.text == response.text
+    assert (
+        client.get(
+            "/api/v1/system/profiles/collapsed",
+            params={"route": "/"},
+            headers=admin_token_headers,
+        ).text
+        == ""
+    )
+    assert (
+        client.get(
+            "/api/v1/system/profiles/999", headers=admin_token_headers
+        ).status_code
+        == 404
+    )
+
+
+def test_profiles_require_admin(
+    profiled_client: TestClient, user_token_headers
+) -> None:
+    response = profiled_client.get(
+        "/api/v1/system/profiles", headers=user_token_headers
+    )
+    assert response.status_code == 403
+
+
+def test_disabled_by_default(client: TestClient) -> None:
+    response = client.get("/", headers={"X-Profile": "anything"})
+    assert "X-Profile-Id" not in response.headers
+    assert not any(
+        thread.name == "request profiler" for thread in threading.enumerate()
+    )
+
+
+def test_sampler_follows_the_profiled_request() -> None:
+    """Workers busy with other requests and idle workers are skipped."""
+    done = threading.Event()
+
+    def profiled_work() -> None:
+        while not done.is_set():
+            sum(range(1000))
+
+    def other_request() -> None:
+        while not done.is_set():
+            sum(range(1000))
+
+    async def serve() -> Sampler:
+        # Idle workers are left in the pool
+        await asyncio.gather(
+            *(to_thread.run_sync(time.sleep, 0.01) for _ in range(3))
+        )
+        # Started before profiling: a request served concurrently
+        other = asyncio.ensure_future(to_thread.run_sync(other_request))
+        sampler = Sampler(0.001, threading.get_ident())
+        sampler.start()
+        profiled = asyncio.ensure_future(to_thread.run_sync(profiled_work))
+        await asyncio.sleep(0.05)
+        sampler.stop()
+        done.set()
+        await asyncio.gather(other, profiled)
+        return sampler
+
+    sampler = asyncio.run(serve())
+    assert sampler.samples > 0
+    assert any(
+        stack.startswith("worker;") and "profiled_work" in stack
+        for stack in sampler.stacks
+    )
+    assert not any("other_request" in stack for stack in sampler.stacks)
+    assert all(
+        "profiled_work" in stack
+        for stack in sampler.stacks
+        if stack.startswith("worker;")
+    )
+
+
+def _frame(module: str, name: str, back=None) -> SimpleNamespace:
+    # Code objects only have co_qualname from Python 3.11
+    return SimpleNamespace(
+        f_globals={"__name__": module},
+        f_code=SimpleNamespace(co_name=name),
+        f_back=back,
+    )
+
+
+def test_stacks_without_qualified_names() -> None:
+    worker = _frame("anyio._backends._asyncio", "run")
+    handler = _frame("app.api.endpoints.problems", "read_problems", worker)
+    assert _stack(_frame("threading", "wait", worker)) is None
+    assert _stack(handler) == (
+        "anyio._backends._asyncio:run;app.api.endpoints.problems:read_problems"
+    )
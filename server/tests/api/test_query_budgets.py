@@ -0,0 +1,131 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.submission import Submission
+from app.models.tag import Tag
+from app.models.user import User
+
+
+def _add_catalog(db: Session, user_id: int, rows: int) -> None:
+    """Tagged problems with a submission each from the user."""
+    tags = db.query(Tag).all() or [Tag(name=f"tag-{i}") for i in range(3)]
+    problems = [
+        Problem(
+            title=f"Problem {i}",
+            description="Solve it.",
+            problem_type=ProblemType.DSA,
+            difficulty=DifficultyLevel.EASY,
+            problem_metadata={},
+            tags=tags[: i % 3 + 1],
+        )
+        for i in range(rows)
+    ]
+    db.add_all(problems)
+    db.flush()
+    db.add_all(
+        Submission(user_id=user_id, problem_id=problem.id, content="x")
+        for problem in problems
+    )
+    db.commit()
+
+
+@pytest.fixture(scope="function")
+def user_id(db: Session, test_user) -> int:
+    return (
+        db.query(User.id)
+        .filter(User.username == test_user["username"])
+        .scalar()
+    )
+
+
+# Statements per request, the current user's lookup included
+BUDGETS = {
+    "/api/v1/users/me": 1,
+    "/api/v1/users/me/progress": 2,
+    "/api/v1/problems/": 4,
+    "/api/v1/problems/?problem_type=dsa&difficulty=easy&tags=tag-0": 5,
+    "/api/v1/problems/1": 3,
+    "/api/v1/problems/facets": 4,
+    "/api/v1/submissions/": 3,
+    "/api/v1/submissions/1": 2,
+    "/api/v1/leaderboards/global": 3,
+}
+
+
+@pytest.mark.parametrize("path", list(BUDGETS))
+def test_read_endpoints_stay_within_query_budget(
+    client: TestClient,
+    db: Session,
+    user_id: int,
+    user_token_headers,
+    query_budget,
+    path: str,
+) -> None:
+    """Budgets hold and do not grow with the number of rows listed."""
+    for rows in (5, 20):
+        _add_catalog(db, user_id, rows)
+        with query_budget(BUDGETS[path]):
+            response = client.get(path, headers=user_token_headers)
+        assert response.status_code == 200
+
+
+def test_create_submission_query_budget(
+    client: TestClient,
+    db: Session,
+    user_id: int,
+    user_token_headers,
+    query_budget,
+) -> None:
+    _add_catalog(db, user_id, 1)
+    # Auth, problem and version lookup, insert and refresh, then the
+    # verdict with its progress, heatmap and leaderboard updates; a first
+    # submission also creates the user's aggregate rows (insert, re-read)
+    # and, as the first of its day, extends the user's streaks
+    with query_budget(26):
+        response = client.post(
+            "/api/v1/submissions/",
+            headers=user_token_headers,
+            json={"problem_id": 1, "content": "x", "language": "python"},
+        )
+    assert response.status_code == 200
+
+
+def test_query_budget_reports_repeated_statements(
+    db: Session, query_budget
+) -> None:
+    with pytest.raises(AssertionError) as failure:
+        with query_budget(2):
+            for user_id in range(3):
+                db.get(User, user_id + 1)
+    assert "3 statements" in str(failure.value)
+    assert "   3 x SELECT" in str(failure.value)
+
+
+def test_debug_headers_and_repeat_warning(db: Session, caplog) -> None:
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, repeat_warning=3)
+
+    @app.get("/users")
+    def read_users(n: int):
+        # One lookup per user: the N+1 shape
+        for user_id in range(n):
+            db.execute(select(User).where(User.id == user_id)).all()
+        return {}
+
+    with TestClient(app) as client, caplog.at_level(logging.WARNING):
+        response = client.get("/users?n=2")
+        assert response.headers["X-Query-Count"] == "2"
+        assert float(response.headers["X-Query-Time-Ms"]) > 0
+        assert response.headers["Server-Timing"].startswith("db;dur=")
+        assert not caplog.records
+
+        response = client.get("/users?n=3")
+        assert response.headers["X-Query-Count"] == "3"
+    assert "GET /users issued the same statement 3 times" in caplog.text
@@ -0,0 +1,146 @@
+from typing import Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.app import create_app
+from app.core.security import create_access_token, get_password_hash
+from app.db import session as db_session
+from app.db.base import Base
+from app.db.engine import create_db_engine
+from app.db.routing import DatabaseRouter, Replica
+from app.db.session import async_database_url
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.user import User
+
+
+def _database(url: str, title: str):
+    """A seeded database whose only problem is titled after it."""
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autoflush=False, bind=engine)
+    with SessionLocal() as db:
+        for name, is_admin in (("admin", True), ("reader", False)):
+            db.add(
+                User(
+                    email=f"{name}@example.com",
+                    username=name,
+                    hashed_password=get_password_hash("password"),
+                    is_active=True,
+                    is_admin=is_admin,
+                )
+            )
+        db.add(
+            Problem(
+                title=title,
+                description="Solve it.",
+                problem_type=ProblemType.DSA,
+                difficulty=DifficultyLevel.EASY,
+                problem_metadata={},
+            )
+        )
+        db.commit()
+    # Each test client runs its own event loop, so async connections
+    # are not pooled
+    async_engine = create_async_engine(
+        async_database_url(url), poolclass=NullPool
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+    return engine, async_engine, SessionLocal, AsyncSessionLocal
+
+
+@pytest.fixture(scope="function")
+def clock() -> List[float]:
+    return [1000.0]
+
+
+@pytest.fixture(scope="function")
+def router(tmp_path, clock, monkeypatch) -> DatabaseRouter:
+    """A primary and one replica in two SQLite files."""
+    _, _, SessionLocal, AsyncSessionLocal = _database(
+        f"sqlite:///{tmp_path / 'primary.db'}", "Primary"
+    )
+    engine, async_engine, _, _ = _database(
+        f"sqlite:///{tmp_path / 'replica.db'}", "Replica"
+    )
+    router = DatabaseRouter(
+        SessionLocal,
+        AsyncSessionLocal,
+        [Replica("replica-0", engine, async_engine)],
+        window=5.0,
+        retry_interval=30.0,
+        clock=lambda: clock[0],
+    )
+    monkeypatch.setattr(db_session, "db_router", router)
+    return router
+
+
+def _headers(user_id: int) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+
+def test_reads_go_to_replica_until_own_write(
+    router: DatabaseRouter, clock: List[float]
+) -> None:
+    admin, reader = _headers(1), _headers(2)
+    with TestClient(create_app()) as client:
+        # Async and sync GET endpoints both read the replica
+        r = client.get("/api/v1/problems/1", headers=admin)
+        assert r.status_code == 200
+        assert r.json()["title"] == "Replica"
+        r = client.get("/api/v1/problems/facets", headers=admin)
+        assert r.status_code == 200
+
+        r = client.put(
+            "/api/v1/problems/1", headers=admin, json={"title": "Edited"}
+        )
+        assert r.status_code == 200
+        assert r.json()["title"] == "Edited"
+
+        # The writer reads their own write from the primary ...
+        r = client.get("/api/v1/problems/1", headers=admin)
+        assert r.json()["title"] == "Edited"
+        # ... while everyone else keeps reading the replica
+        r = client.get("/api/v1/problems/1", headers=reader)
+        assert r.json()["title"] == "Replica"
+
+        clock[0] += 6
+        r = client.get("/api/v1/problems/1", headers=admin)
+        assert r.json()["title"] == "Replica"
+
+
+def test_failed_replica_is_skipped_until_retry(
+    router: DatabaseRouter, clock: List[float], tmp_path
+) -> None:
+    url = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+    broken = Replica(
+        "replica-broken",
+        create_db_engine(url),
+        create_async_engine(async_database_url(url), poolclass=NullPool),
+    )
+    router.replicas.insert(0, broken)
+    headers = _headers(2)
+
+    with TestClient(create_app()) as client:
+        for _ in range(4):
+            r = client.get("/api/v1/problems/1", headers=headers)
+            assert r.status_code == 200
+            assert r.json()["title"] == "Replica"
+        assert [r.name for r in router.read_candidates(None)] == ["replica-0"]
+        stats = {s["name"]: s for s in router.stats()}
+        assert not stats["replica-broken"]["healthy"]
+        assert stats["replica-broken"]["failures"] == 1
+        assert stats["replica-0"]["healthy"]
+
+        # With every replica down, reads fall back to the primary
+        router.mark_down(router.replicas[1], RuntimeError("down"))
+        r = client.get("/api/v1/problems/1", headers=headers)
+        assert r.json()["title"] == "Primary"
+
+        clock[0] += 31
+        assert len(router.read_candidates(None)) == 2
@@ -0,0 +1,178 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.db import slow_queries as slow_query_module
+from app.db.slow_queries import fingerprint, normalize
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.submission import Submission, SubmissionStatus
+from app.models.user import User
+
+
+def test_normalize_groups_literals_and_lists() -> None:
+    a = normalize(
+        "SELECT * FROM submission\n  WHERE user_id = 12 AND language = 'py'"
+        " AND id IN (?, ?, ?)"
+    )
+    b = normalize(
+        "SELECT * FROM submission WHERE user_id = %(user_id_1)s AND "
+        "language = 'it''s' AND id IN ($1, $2)"
+    )
+    assert (
+        a
+        == b
+        == (
+            "SELECT * FROM submission WHERE user_id = ? AND language = ? "
+            "AND id IN (?)"
+        )
+    )
+    assert normalize("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)") == (
+        "INSERT INTO t (a, b) VALUES (?)"
+    )
+    # Identifiers with digits are left alone
+    assert normalize("SELECT anon_1.id FROM t2 AS anon_1") == (
+        "SELECT anon_1.id FROM t2 AS anon_1"
+    )
+    assert fingerprint(a) == fingerprint(b)
+
+
+def _seed(db: Session) -> None:
+    problem = Problem(
+        title="Square",
+        description="Square a number.",
+        problem_type=ProblemType.DSA,
+        difficulty=DifficultyLevel.EASY,
+        problem_metadata={},
+    )
+    db.add(problem)
+    db.flush()
+    user = db.query(User).filter(User.username == "testuser").one()
+    db.add_all(
+        Submission(
+            user_id=user.id,
+            problem_id=problem.id,
+            content="x",
+            language=language,
+            status=SubmissionStatus.ACCEPTED,
+        )
+        for language in ("python", "go")
+    )
+    db.commit()
+
+
+def test_slow_queries_by_endpoint_with_plans(
+    slow_queries,
+    client: TestClient,
+    db: Session,
+    user_token_headers,
+    admin_token_headers,
+) -> None:
+    _seed(db)
+    slow_queries.reset()
+
+    response = client.get("/api/v1/submissions/", headers=user_token_headers)
+    assert response.status_code == 200
+    # A filter on an unindexed column, twice with different values
+    for language in ("python", "go"):
+        db.execute(
+            select(Submission.id).where(Submission.language == language)
+        ).all()
+    db.execute(text("SELECT 1")).all()
+
+    response = client.get(
+        "/api/v1/system/slow-queries", headers=admin_token_headers
+    )
+    assert response.status_code == 200
+    log = response.json()
+    assert log["enabled"] is True
+    assert log["threshold_ms"] == 0
+    queries = log["queries"]
+    assert [q["total_ms"] for q in queries] == sorted(
+        (q["total_ms"] for q in queries), reverse=True
+    )
+
+    [listing] = [
+        q
+        for q in queries
+        if "FROM submission WHERE submission.user_id = ? ORDER BY"
+        in q["statement"]
+    ]
+    assert listing["count"] == 1
+    assert listing["endpoints"] == {"GET /api/v1/submissions/": 1}
+    assert "INDEX" in listing["plan"]
+    [sample] = listing["samples"]
+    assert sample["endpoint"] == "GET /api/v1/submissions/"
+    assert sample["caller"].startswith("app.api.endpoints.submissions:")
+    # Parameters are redacted by default
+    assert all(p.startswith("<") for p in sample["parameters"])
+    assert sample["plan"] == listing["plan"]
+
+    [scan] = [
+        q
+        for q in queries
+        if q["statement"] == "SELECT submission.id FROM submission "
+        "WHERE submission.language = ?"
+    ]
+    assert scan["count"] == 2
+    assert scan["endpoints"] == {}
+    assert scan["plan"].startswith("SCAN submission")
+    # Explained once per interval, not per occurrence
+    assert [s["plan"] is None for s in scan["samples"]] == [True, False]
+    assert scan["p50_ms"] <= scan["p99_ms"] <= scan["max_ms"]
+
+    assert any(q["statement"] == "SELECT ?" for q in queries)
+
+    response = client.delete(
+        "/api/v1/system/slow-queries", headers=admin_token_headers
+    )
+    assert response.status_code == 204
+    assert not any(
+        q["statement"].startswith("SELECT submission.id")
+        for q in client.get(
+            "/api/v1/system/slow-queries", headers=admin_token_headers
+        ).json()["queries"]
+    )
+
+
+def test_unredacted_parameters(slow_queries, db: Session, monkeypatch) -> None:
+    monkeypatch.setattr(slow_queries, "redact", False)
+    db.execute(
+        select(Submission.id).where(Submission.language == "python")
+    ).all()
+    [query] = [
+        q
+        for q in slow_queries.queries()
+        if q["statement"].endswith("WHERE submission.language = ?")
+    ]
+    assert query["samples"][0]["parameters"] == ["'python'"]
+
+
+def test_slow_queries_require_admin(
+    client: TestClient, user_token_headers
+) -> None:
+    response = client.get(
+        "/api/v1/system/slow-queries", headers=user_token_headers
+    )
+    assert response.status_code == 403
+
+
+def test_caller_without_qualified_names(
+    slow_queries, db: Session, monkeypatch
+) -> None:
+    # Code objects only have co_qualname from Python 3.11
+    code = SimpleNamespace(co_name="handler")
+    frame = SimpleNamespace(
+        f_globals={"__name__": "app.api.endpoints.problems"},
+        f_code=code,
+        f_lineno=42,
+    )
+    monkeypatch.setattr(slow_query_module, "_frames", lambda: iter([frame]))
+    db.execute(text("SELECT 1")).all()
+    [query] = [
+        q for q in slow_queries.queries() if q["statement"] == "SELECT ?"
+    ]
+    assert query["samples"][0]["caller"] == (
+        "app.api.endpoints.problems:handler:42"
+    )
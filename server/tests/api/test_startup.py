@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+def _loaded(statement: str, packages) -> list:
+    """Which of ``packages`` a fresh interpreter loads to run ``statement``."""
+    script = (
+        f"import json, sys\n{statement}\n"
+        f"print(json.dumps([p for p in {list(packages)!r} "
+        "if p in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=SERVER_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def test_judge_worker_does_not_load_web_stack() -> None:
+    assert (
+        _loaded(
+            "import app.services.judge_service, app.db.session",
+            ("fastapi", "jose", "passlib", "email_validator", "uvicorn"),
+        )
+        == []
+    )
+
+
+def test_contest_judge_worker_does_not_load_web_stack() -> None:
+    assert (
+        _loaded(
+            "import scripts.contest_judge",
+            ("fastapi", "jose", "passlib", "email_validator", "uvicorn"),
+        )
+        == []
+    )
+
+
+def test_api_loads_password_hashing_on_first_use() -> None:
+    assert _loaded("import main", ("fastapi", "passlib", "uvicorn")) == [
+        "fastapi"
+    ]
+    assert _loaded(
+        "from app.core.security import get_password_hash\n"
+        "get_password_hash('x')",
+        ("passlib",),
+    ) == ["passlib"]
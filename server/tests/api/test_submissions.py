@@ -156,3 +156,150 @@ def test_admin_can_update_submission(
     assert updated["status"] == update_data["status"]
     assert updated["score"] == update_data["score"]
     assert updated["results"] == update_data["results"]
+
+
+def test_submission_records_problem_version(
+    client: TestClient, user_token_headers, test_problem
+):
+    """Test that a submission pins the problem version it is judged on."""
+    response = client.post(
+        "/api/v1/submissions/",
+        headers=user_token_headers,
+        json={"problem_id": test_problem.id, "content": "print(1)"},
+    )
+    assert response.status_code == 200
+    assert response.json()["problem_version_hash"] == (
+        test_problem.version_hash
+    )
+    assert test_problem.version_hash is not None
+
+
+def test_verdicts_update_user_progress(
+    client: TestClient,
+    user_token_headers,
+    admin_token_headers,
+    test_problem,
+    db: Session,
+):
+    """Test that judge verdicts maintain the progress aggregates."""
+    from app.services.progress_service import progress_service
+
+    for _ in range(2):
+        response = client.post(
+            "/api/v1/submissions/",
+            headers=user_token_headers,
+            json={"problem_id": test_problem.id, "content": "print(1)"},
+        )
+    submission_id = response.json()["id"]
+
+    response = client.get(
+        "/api/v1/users/me/progress", headers=user_token_headers
+    )
+    assert response.status_code == 200
+    progress = response.json()
+    assert progress["attempts_total"] == 2
+    assert progress["solved_total"] == 1
+    assert progress["solved_by_type"]["dsa"] == 1
+    assert progress["solved_by_difficulty"]["medium"] == 1
+
+    response = client.get(
+        "/api/v1/users/me/progress/problems", headers=user_token_headers
+    )
+    [problem_progress] = response.json()
+    assert problem_progress["problem_id"] == test_problem.id
+    assert problem_progress["attempts"] == 2
+    assert problem_progress["best_score"] == 100.0
+    assert problem_progress["first_accepted_at"] is not None
+
+    # Re-judging one submission keeps the problem solved by the other
+    client.put(
+        f"/api/v1/submissions/{submission_id}",
+        headers=admin_token_headers,
+        json={"status": "rejected", "score": 10.0},
+    )
+    response = client.get(
+        "/api/v1/users/me/progress", headers=user_token_headers
+    )
+    assert response.json()["solved_total"] == 1
+    assert response.json()["attempts_total"] == 2
+
+    # The backfill reproduces the incrementally maintained state
+    incremental = response.json()
+    progress_service.rebuild(db)
+    db.expire_all()
+    response = client.get(
+        "/api/v1/users/me/progress", headers=user_token_headers
+    )
+    assert response.json() == incremental
+
+
+def test_concurrent_verdicts_create_aggregate_rows(
+    monkeypatch, db: Session, test_submission
+):
+    """Test that judges racing to create an aggregate row both count."""
+    from app.db.upsert import insert_missing
+    from app.models.heatmap import UserActivityYear
+    from app.models.progress import UserProgress, UserProblemProgress
+    from app.services.heatmap_service import heatmap_service
+    from app.services.progress_service import progress_service
+
+    other = Submission(
+        user_id=test_submission.user_id,
+        problem_id=test_submission.problem_id,
+        content="pass",
+        status=SubmissionStatus.ACCEPTED,
+        created_at=test_submission.created_at,
+    )
+    db.add(other)
+    db.commit()
+    test_submission.status = SubmissionStatus.ACCEPTED
+
+    # The other judge commits the row between our lookup and our insert
+    other_judge = {
+        "user_activity_year": lambda other_db, submission: (
+            heatmap_service.record_submission(other_db, submission=submission)
+        ),
+        "user_problem_progress": lambda other_db, submission: (
+            progress_service.apply_verdict(
+                other_db,
+                submission=submission,
+                previous_status=SubmissionStatus.PENDING,
+            )
+        ),
+    }
+
+    def racing_insert_missing(session, table, values):
+        if session is db and table.name in other_judge:
+            with Session(bind=db.get_bind()) as other_db:
+                judge = other_judge.pop(table.name)
+                judge(other_db, other_db.get(Submission, other.id))
+                other_db.commit()
+        insert_missing(session, table, values)
+
+    for module in ("heatmap_service", "progress_service"):
+        monkeypatch.setattr(
+            f"app.services.{module}.insert_missing", racing_insert_missing
+        )
+
+    heatmap_service.record_submission(db, submission=test_submission)
+    db.commit()
+    progress_service.apply_verdict(
+        db,
+        submission=test_submission,
+        previous_status=SubmissionStatus.PENDING,
+    )
+    db.commit()
+    assert not other_judge
+
+    db.expire_all()
+    user_id = test_submission.user_id
+    [year] = db.query(UserActivityYear).filter_by(user_id=user_id).all()
+    heatmap = heatmap_service.get_heatmap(db, user_id=user_id, year=year.year)
+    assert heatmap["total_submissions"] == 2
+    problem_progress = db.get(
+        UserProblemProgress, (user_id, test_submission.problem_id)
+    )
+    assert problem_progress.attempts == 2
+    assert problem_progress.solved is True
+    progress = db.get(UserProgress, user_id)
+    assert (progress.attempts_total, progress.solved_total) == (2, 1)
@@ -0,0 +1,81 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.db.engine import _engine_options, create_db_engine, engine_stats
+
+
+def test_admin_database_stats(
+    client: TestClient, admin_token_headers, user_token_headers
+) -> None:
+    """Test the pool and timing report of both engines."""
+    response = client.get(
+        "/api/v1/system/database", headers=admin_token_headers
+    )
+    assert response.status_code == 200
+    engines = response.json()["engines"]
+    assert set(engines) == {"sync", "async"}
+    assert engines["sync"]["pool_size"] == settings.DB_POOL_SIZE
+
+    response = client.get(
+        "/api/v1/system/database", headers=user_token_headers
+    )
+    assert response.status_code == 403
+
+
+def test_sqlite_engine_profile(tmp_path) -> None:
+    """Test pragmas and the checkout / statement timings."""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        # NORMAL
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == (
+            settings.SQLITE_BUSY_TIMEOUT_MS
+        )
+    stats = engine_stats(engine)
+    assert stats["checkouts"] == 1
+    assert stats["statements"] == 3
+    assert stats["checked_out"] == 0
+    engine.dispose()
+
+
+def test_sqlite_statement_timeout(tmp_path, monkeypatch) -> None:
+    """Test that a runaway statement is interrupted."""
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 50)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'timeout.db'}")
+    runaway = text(
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+        "SELECT count(*) FROM n"
+    )
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError, match="interrupted"):
+            conn.execute(runaway)
+        # The connection stays usable
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    engine.dispose()
+
+
+def test_postgres_engine_profile() -> None:
+    """Test pool tuning and statement timeouts for both drivers."""
+    options = _engine_options(
+        make_url("postgresql://u:p@db/app"), is_async=False
+    )
+    assert options["pool_pre_ping"] is settings.DB_POOL_PRE_PING
+    assert options["pool_recycle"] == settings.DB_POOL_RECYCLE
+    assert options["max_overflow"] == settings.DB_MAX_OVERFLOW
+    assert options["connect_args"] == {
+        "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    }
+
+    options = _engine_options(
+        make_url("postgresql+asyncpg://u:p@db/app"), is_async=True
+    )
+    assert options["connect_args"] == {
+        "server_settings": {
+            "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)
+        }
+    }
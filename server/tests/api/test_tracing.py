@@ -0,0 +1,177 @@
+import json
+from typing import Any, Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.tracing import SpanContext, parse_traceparent
+from app.models.problem import Problem, ProblemType, DifficultyLevel
+from app.models.submission import Submission
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def _problem(db: Session) -> Problem:
+    problem = Problem(
+        title="Square",
+        description="Square a number.",
+        problem_type=ProblemType.DSA,
+        difficulty=DifficultyLevel.EASY,
+        problem_metadata={},
+    )
+    db.add(problem)
+    db.commit()
+    return problem
+
+
+def _exported(path) -> List[Dict[str, Any]]:
+    """Spans of the OTLP/JSON lines in the export file."""
+    spans = []
+    with open(path) as f:
+        for line in f:
+            request = json.loads(line)
+            [resource] = request["resourceSpans"]
+            assert resource["resource"]["attributes"] == [
+                {
+                    "key": "service.name",
+                    "value": {"stringValue": "skillslab-api"},
+                }
+            ]
+            for scope in resource["scopeSpans"]:
+                spans.extend(scope["spans"])
+    return spans
+
+
+def test_parse_traceparent() -> None:
+    header = f"00-{TRACE_ID}-{PARENT_ID}-01"
+    assert parse_traceparent(header) == SpanContext(TRACE_ID, PARENT_ID)
+    assert parse_traceparent(header.upper()) == SpanContext(
+        TRACE_ID, PARENT_ID
+    )
+    assert SpanContext(TRACE_ID, PARENT_ID).traceparent == header
+    for invalid in (
+        None,
+        "",
+        f"01-{TRACE_ID}-{PARENT_ID}-01",
+        f"00-{'0' * 32}-{PARENT_ID}-01",
+        f"00-{TRACE_ID}-{'0' * 16}-01",
+        f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01",
+    ):
+        assert parse_traceparent(invalid) is None
+
+
+def test_submission_trace(
+    traces,
+    tmp_path,
+    client: TestClient,
+    db: Session,
+    user_token_headers,
+    admin_token_headers,
+) -> None:
+    problem = _problem(db)
+    response = client.post(
+        "/api/v1/submissions/",
+        headers={
+            **user_token_headers,
+            "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01",
+        },
+        # Compiled, so that every judge stage is a span
+        json={"problem_id": problem.id, "content": "x", "language": "go"},
+    )
+    assert response.status_code == 200
+    assert response.headers["X-Trace-Id"] == TRACE_ID
+    submission_id = response.json()["id"]
+
+    # The submission record carries the request's span to the judge
+    submission = db.get(Submission, submission_id)
+    db.refresh(submission)
+    assert submission.trace_id == TRACE_ID
+
+    response = client.get(
+        f"/api/v1/submissions/{submission_id}/trace",
+        headers=admin_token_headers,
+    )
+    assert response.status_code == 200
+    trace = response.json()
+    assert trace["trace_id"] == TRACE_ID
+    spans = {span["span_id"]: span for span in trace["spans"]}
+    by_name = {span["name"]: span for span in trace["spans"]}
+
+    request = by_name["POST /api/v1/submissions/"]
+    assert request["parent_span_id"] == PARENT_ID
+    assert request["span_id"] == submission.span_id
+    assert request["attributes"]["http.route"] == "/api/v1/submissions/"
+    assert request["attributes"]["http.response.status_code"] == 200
+
+    judge = by_name["judge"]
+    assert judge["parent_span_id"] == submission.span_id
+    assert judge["attributes"] == {"submission.id": submission_id}
+    for stage in ("queue", "load", "compile", "run", "check", "persist"):
+        assert by_name[f"judge.{stage}"]["parent_span_id"] == judge["span_id"]
+        assert trace["breakdown"][stage] >= 0
+    assert trace["breakdown"]["api"] == request["duration_ms"]
+    assert trace["breakdown"]["total"] >= judge["duration_ms"]
+
+    # SQL statements are spans under the request or the judge stage that
+    # issued them, without literal values
+    statements = [
+        span for span in trace["spans"] if "db.statement" in span["attributes"]
+    ]
+    assert {spans[span["parent_span_id"]]["name"] for span in statements} >= {
+        "POST /api/v1/submissions/",
+        "judge.load",
+        "judge.persist",
+    }
+    assert all(
+        span["attributes"]["db.system"] == "sqlite" for span in statements
+    )
+    assert trace["breakdown"]["sql"] == pytest.approx(
+        sum(span["duration_ms"] for span in statements)
+    )
+
+    # The same spans went to the export file, as OTLP
+    exported = {
+        span["spanId"]: span
+        for span in _exported(tmp_path / "spans.jsonl")
+        if span["traceId"] == TRACE_ID
+    }
+    assert exported.keys() == spans.keys()
+    judge_span = exported[judge["span_id"]]
+    assert judge_span["parentSpanId"] == submission.span_id
+    assert int(judge_span["endTimeUnixNano"]) > int(
+        judge_span["startTimeUnixNano"]
+    )
+    assert judge_span["attributes"] == [
+        {"key": "submission.id", "value": {"intValue": str(submission_id)}}
+    ]
+
+
+def test_submission_trace_requires_tracing(
+    client: TestClient, db: Session, user_token_headers, admin_token_headers
+) -> None:
+    problem = _problem(db)
+    response = client.post(
+        "/api/v1/submissions/",
+        headers=user_token_headers,
+        json={"problem_id": problem.id, "content": "x"},
+    )
+    assert "X-Trace-Id" not in response.headers
+    submission_id = response.json()["id"]
+
+    response = client.get(
+        f"/api/v1/submissions/{submission_id}/trace",
+        headers=admin_token_headers,
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "No trace recorded for this submission"
+
+
+def test_submission_trace_requires_admin(
+    traces, client: TestClient, user_token_headers
+) -> None:
+    response = client.get(
+        "/api/v1/submissions/1/trace", headers=user_token_headers
+    )
+    assert response.status_code == 403
@@ -1,3 +1,7 @@
+import csv
+import io
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from typing import Dict
@@ -69,3 +73,188 @@ def test_regular_user_cannot_list_users(
     """Test that a regular user cannot list all users."""
     response = client.get("/api/v1/users/", headers=user_token_headers)
     assert response.status_code == 403  # Forbidden
+
+
+def _create_users(db, count: int) -> None:
+    from app.models.user import User
+
+    db.add_all(
+        User(
+            email=f"user{i}@example.com",
+            username=f"user{i}",
+            hashed_password="x",
+            full_name=f"User {i}",
+        )
+        for i in range(count)
+    )
+    db.commit()
+
+
+def test_admin_keyset_paging_users(
+    client: TestClient, admin_token_headers, db
+):
+    """Test paging through users with the keyset cursor."""
+    _create_users(db, 7)
+
+    seen = []
+    params = {"limit": 3}
+    while True:
+        response = client.get(
+            "/api/v1/users/", headers=admin_token_headers, params=params
+        )
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(u["id"] for u in page)
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+        params["after_id"] = cursor
+
+    assert len(seen) == 8  # 7 users plus the admin
+    assert seen == sorted(seen)
+
+
+def test_admin_export_users(client: TestClient, admin_token_headers, db):
+    """Test streaming the user base as NDJSON and CSV."""
+    _create_users(db, 3)
+
+    response = client.get("/api/v1/users/export", headers=admin_token_headers)
+    assert response.status_code == 200
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert len(users) == 4
+    assert "hashed_password" not in users[0]
+
+    response = client.get(
+        "/api/v1/users/export?format=csv", headers=admin_token_headers
+    )
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["username"] for r in rows[1:]] == ["user0", "user1", "user2"]
+
+
+def test_regular_user_cannot_export_users(
+    client: TestClient, user_token_headers
+):
+    """Test that a regular user cannot export users."""
+    response = client.get("/api/v1/users/export", headers=user_token_headers)
+    assert response.status_code == 403
+
+
+def test_activity_heatmap_and_streaks(
+    client: TestClient, user_token_headers, admin_token_headers, db
+):
+    """Test the daily calendar maintained on submit and on verdict."""
+    from datetime import datetime, timedelta, timezone
+
+    from app.models.problem import Problem, ProblemType, DifficultyLevel
+    from app.models.submission import Submission
+    from app.services.heatmap_service import heatmap_service
+
+    problem = Problem(
+        title="Heatmap Problem",
+        description="Solve it.",
+        problem_type=ProblemType.DSA,
+        difficulty=DifficultyLevel.EASY,
+        problem_metadata={},
+    )
+    db.add(problem)
+    db.commit()
+
+    for _ in range(2):
+        response = client.post(
+            "/api/v1/submissions/",
+            headers=user_token_headers,
+            json={"problem_id": problem.id, "content": "print(1)"},
+        )
+    submission_id = response.json()["id"]
+    # Re-judging one submission takes its accept back
+    client.put(
+        f"/api/v1/submissions/{submission_id}",
+        headers=admin_token_headers,
+        json={"status": "rejected"},
+    )
+
+    today = datetime.now(timezone.utc).date()
+    response = client.get(
+        "/api/v1/users/me/activity", headers=user_token_headers
+    )
+    assert response.status_code == 200
+    heatmap = response.json()
+    assert heatmap["year"] == today.year
+    assert len(heatmap["submissions"]) in (365, 366)
+    index = today.timetuple().tm_yday - 1
+    assert heatmap["submissions"][index] == 2
+    assert heatmap["accepts"][index] == 1
+    assert heatmap["total_submissions"] == 2
+    assert heatmap["current_streak"] == 1
+    assert heatmap["longest_streak"] == 1
+
+    # Three earlier consecutive days, then a gap, make the longest streak
+    user_id = heatmap["user_id"]
+    for days_ago in (5, 6, 7):
+        db.add(
+            Submission(
+                user_id=user_id,
+                problem_id=problem.id,
+                content="print(1)",
+                created_at=datetime.now(timezone.utc)
+                - timedelta(days=days_ago),
+            )
+        )
+    db.commit()
+    heatmap_service.rebuild(db)
+    db.expire_all()
+    response = client.get(
+        "/api/v1/users/me/activity", headers=user_token_headers
+    )
+    heatmap = response.json()
+    assert heatmap["current_streak"] == 1
+    assert heatmap["longest_streak"] == 3
+
+    response = client.get(
+        f"/api/v1/users/{user_id + 1}/activity", headers=user_token_headers
+    )
+    assert response.status_code == 403
+
+
+def test_streaks_follow_new_submissions(db, test_user):
+    """Test that streaks are extended as days become active."""
+    from datetime import datetime, timedelta, timezone
+
+    from app.models.heatmap import UserActivityStreak
+    from app.models.submission import Submission
+    from app.models.user import User
+    from app.services.heatmap_service import heatmap_service
+
+    user = db.query(User).filter(User.username == "testuser").one()
+    now = datetime.now(timezone.utc)
+
+    def submit(days_ago: int) -> None:
+        heatmap_service.record_submission(
+            db,
+            submission=Submission(
+                user_id=user.id, created_at=now - timedelta(days=days_ago)
+            ),
+        )
+        db.commit()
+
+    def streaks(days_later: int = 0):
+        heatmap = heatmap_service.get_heatmap(
+            db, user_id=user.id, today=now.date() + timedelta(days_later)
+        )
+        return heatmap["current_streak"], heatmap["longest_streak"]
+
+    for days_ago in (6, 5, 3, 1, 0, 0):
+        submit(days_ago)
+    assert streaks() == (2, 2)
+    # A streak stays current through the next day
+    assert streaks(days_later=1) == (2, 2)
+    assert streaks(days_later=2) == (0, 2)
+
+    # A backdated submission joins the runs around it
+    submit(4)
+    assert streaks() == (2, 4)
+    submit(2)
+    assert streaks() == (7, 7)
+    streak = db.get(UserActivityStreak, user.id)
+    assert streak.last_active_day == now.date()
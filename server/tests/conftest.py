@@ -1,15 +1,23 @@
+import contextlib
 import os
 import pytest
 from typing import Dict, Generator, Any
 
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.app import create_app
 from app.core.config import settings
+from app.core.tracing import tracer
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.query_stats import count_queries
+from app.db import tracing as sql_tracing
+from app.db.slow_queries import slow_query_log
+from app.db import session as db_session
+from app.db.session import async_database_url, get_async_db, get_db
 from app.models.user import User
 from app.core.security import get_password_hash
 
@@ -25,6 +33,15 @@ TestingSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine
 )
 
+# Async endpoints read the same database; every test client runs its own
+# event loop, so connections are not pooled across tests
+async_engine = create_async_engine(
+    async_database_url(TEST_DATABASE_URL), poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 @pytest.fixture(scope="function")
 def db() -> Generator:
@@ -39,6 +56,12 @@ def db() -> Generator:
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def primary_engine(monkeypatch) -> None:
+    """Point services the app binds at startup to the test database."""
+    monkeypatch.setattr(db_session, "engine", engine)
+
+
 @pytest.fixture(scope="function")
 def client(db) -> Generator:
     """Create a test client with the test database."""
@@ -51,7 +74,12 @@ def client(db) -> Generator:
         finally:
             pass
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as async_db:
+            yield async_db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
 
     with TestClient(app) as test_client:
         yield test_client
@@ -137,3 +165,109 @@ def admin_token_headers(
     tokens = r.json()
     access_token = tokens["access_token"]
     return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="function")
+def query_budget():
+    """
+    Fail when a block issues more SQL statements than its budget::
+
+        with query_budget(3):
+            client.get("/api/v1/problems/")
+
+    The failure lists the statements by count, so an N+1 loop shows up as
+    one statement repeated per row.
+    """
+
+    @contextlib.contextmanager
+    def budget(limit: int):
+        with count_queries(engine, async_engine.sync_engine) as stats:
+            yield stats
+        assert stats.count <= limit, (
+            f"Query budget of {limit} exceeded: {stats.report()}"
+        )
+
+    return budget
+
+
+@pytest.fixture(scope="function")
+def query_plans():
+    """
+    SQLite's plans of the SELECTs a block runs on the test databases,
+    with their actual parameters, keeping those that contain ``pattern``::
+
+        with query_plans("FROM submission") as plans:
+            client.get("/api/v1/submissions/")
+        assert "USING INDEX ix_submission_user_id_created_at" in plans[1]
+
+    The plans are filled in when the block exits.
+    """
+
+    @contextlib.contextmanager
+    def capture(pattern: str):
+        captured = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().startswith("SELECT") and pattern in statement:
+                captured.append((statement, parameters))
+
+        engines = (engine, async_engine.sync_engine)
+        for test_engine in engines:
+            event.listen(test_engine, "before_cursor_execute", record)
+        plans = []
+        try:
+            yield plans
+        finally:
+            for test_engine in engines:
+                event.remove(test_engine, "before_cursor_execute", record)
+        with engine.connect() as conn:
+            for statement, parameters in captured:
+                rows = conn.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                ).all()
+                plans.append("\n".join(row[-1] for row in rows))
+
+    return capture
+
+
+@pytest.fixture(scope="function")
+def slow_queries(monkeypatch):
+    """
+    Enable the slow query log for apps created in the test, on the test
+    databases, with a threshold of 0 so that every statement is logged.
+    """
+    monkeypatch.setattr(settings, "SLOW_QUERY_LOG_ENABLED", True)
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0)
+    slow_query_log.reset()
+    engines = (engine, async_engine.sync_engine)
+    for test_engine in engines:
+        slow_query_log.install(test_engine)
+    try:
+        yield slow_query_log
+    finally:
+        for test_engine in engines:
+            slow_query_log.uninstall(test_engine)
+        slow_query_log.reset()
+
+
+@pytest.fixture(scope="function")
+def traces(monkeypatch, tmp_path):
+    """
+    Enable request tracing for apps created in the test, with SQL spans on
+    the test databases, exporting to ``spans.jsonl`` in ``tmp_path``.
+    """
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracer, "enabled", True)
+    monkeypatch.setattr(
+        tracer.collector, "export_path", str(tmp_path / "spans.jsonl")
+    )
+    tracer.collector.clear()
+    engines = (engine, async_engine.sync_engine)
+    for test_engine in engines:
+        sql_tracing.install(test_engine)
+    try:
+        yield tracer
+    finally:
+        for test_engine in engines:
+            sql_tracing.uninstall(test_engine)
+        tracer.collector.clear()